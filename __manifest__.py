@@ -17,10 +17,14 @@
     'depends': ['base', 'web', 'product', 'stock'],
     'data': [
         'security/ir.model.access.csv',
+        'data/ir_cron_data.xml',
         'views/panel_views.xml',
         'views/stock_sheet_views.xml',
+        'views/remnant_views.xml',
         'views/optimizer_options_views.xml',
         'views/cutting_job_views.xml',
+        'views/optimization_cache_views.xml',
+        'views/nesting_views.xml',
         'views/menu_views.xml',
         # 'report/cutting_pattern_report_template.xml',
         # 'report/cutting_pattern_report.xml',
@@ -31,6 +35,6 @@
     'application': True,
     'auto_install': False,
     'external_dependencies': {
-        'python': ['numpy', 'matplotlib', 'pulp'],
+        'python': ['numpy', 'pulp'],
     },
 }
\ No newline at end of file
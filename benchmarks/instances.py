@@ -0,0 +1,105 @@
+"""
+Seeded instance generator for the optimizer benchmarks.
+
+Every family returns plain data so an instance can be rebuilt from its name,
+seed and size alone:
+    {'name', 'family', 'seed', 'size', 'panels': [(length, width, quantity, label, grain)],
+     'sheet': (length, width, quantity), 'options': {OptimizerOptions overrides}}
+"""
+import random
+
+SHEET = (2440, 1220)
+
+
+def _instance(family, seed, size, panels, sheet_quantity, **options):
+    return {
+        'name': f'{family}-{size}-s{seed}',
+        'family': family,
+        'seed': seed,
+        'size': size,
+        'panels': panels,
+        'sheet': (SHEET[0], SHEET[1], sheet_quantity),
+        'options': options,
+    }
+
+
+def _sheets_needed(panels, fill=0.6):
+    area = sum(length * width * quantity for length, width, quantity, _label, _grain in panels)
+    return max(1, int(area / (SHEET[0] * SHEET[1] * fill)) + 1)
+
+
+def uniform(seed, size):
+    """A single panel type in large quantity."""
+    rng = random.Random(seed)
+    length, width = rng.randint(200, 800), rng.randint(100, 500)
+    panels = [(length, width, size, 'Panel', 'none')]
+    return _instance('uniform', seed, size, panels, _sheets_needed(panels), kerf_thickness=3)
+
+
+def furniture(seed, size):
+    """Cabinet cut lists: sides, shelves, doors, backs and drawer parts in small quantities."""
+    rng = random.Random(seed)
+    parts = [
+        ('Side', (500, 2200), (300, 600), 'vertical'),
+        ('Shelf', (300, 1200), (250, 600), 'horizontal'),
+        ('Door', (300, 2000), (250, 600), 'vertical'),
+        ('Back', (500, 2000), (400, 1100), 'none'),
+        ('Drawer front', (150, 300), (300, 900), 'horizontal'),
+        ('Drawer side', (100, 250), (300, 550), 'none'),
+    ]
+    panels = []
+    remaining = size
+    while remaining > 0:
+        label, length_range, width_range, grain = rng.choice(parts)
+        quantity = min(remaining, rng.randint(1, 4))
+        panels.append((rng.randint(*length_range), rng.randint(*width_range), quantity,
+                       f'{label} {len(panels) + 1}', grain))
+        remaining -= quantity
+    return _instance('furniture', seed, size, panels, _sheets_needed(panels), kerf_thickness=4)
+
+
+def tiny(seed, size):
+    """Many small parts, a few dozen types."""
+    rng = random.Random(seed)
+    types = max(1, min(40, size // 25))
+    panels = []
+    for i in range(types):
+        quantity = size // types + (1 if i < size % types else 0)
+        if quantity:
+            panels.append((rng.randint(20, 120), rng.randint(20, 80), quantity, f'Part {i + 1}', 'none'))
+    return _instance('tiny', seed, size, panels, _sheets_needed(panels), kerf_thickness=2)
+
+
+def near_sheet(seed, size):
+    """Parts between 50% and 100% of the sheet in each direction, mostly one or two per sheet."""
+    rng = random.Random(seed)
+    panels = [(rng.randint(SHEET[0] // 2, SHEET[0]), rng.randint(SHEET[1] // 2, SHEET[1]), 1, f'Large {i + 1}', 'none')
+              for i in range(size)]
+    return _instance('near_sheet', seed, size, panels, size, kerf_thickness=3)
+
+
+def grain(seed, size):
+    """Mixed sizes where most parts must keep their grain direction."""
+    rng = random.Random(seed)
+    panels = []
+    remaining = size
+    while remaining > 0:
+        quantity = min(remaining, rng.randint(1, 6))
+        direction = rng.choice(('horizontal', 'horizontal', 'vertical', 'none'))
+        panels.append((rng.randint(100, 1200), rng.randint(80, 600), quantity, f'Grain {len(panels) + 1}', direction))
+        remaining -= quantity
+    return _instance('grain', seed, size, panels, _sheets_needed(panels), kerf_thickness=3, consider_grain=True)
+
+
+FAMILIES = {
+    'uniform': uniform,
+    'furniture': furniture,
+    'tiny': tiny,
+    'near_sheet': near_sheet,
+    'grain': grain,
+}
+
+
+def generate(family, seed, size):
+    """Build one instance of the family with the given seed and number of parts."""
+    return FAMILIES[family](seed, size)
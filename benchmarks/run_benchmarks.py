@@ -0,0 +1,224 @@
+"""
+Benchmark harness for the cutting stock optimizer, runnable without Odoo.
+
+Generates seeded instances (see instances.py), runs every strategy of
+EnhancedCuttingStockOptimizer on them and the full optimize()/optimize_multi()
+selection, and reports wall time, peak memory, placed panels, sheets, usage
+ratio and overlapping placements as JSON.
+
+    python3 benchmarks/run_benchmarks.py --output before.json
+    python3 benchmarks/run_benchmarks.py --output after.json --compare before.json
+
+With --compare the run is diffed against an earlier report and the exit code
+is 1 when a result got slower than the tolerance or worse in placed panels,
+sheets or usage.
+"""
+import argparse
+import contextlib
+import gc
+import importlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import types
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from instances import FAMILIES, generate  # noqa: E402
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models')
+DEFAULT_SIZES = {'uniform': 200, 'furniture': 120, 'tiny': 1000, 'near_sheet': 40, 'grain': 150}
+
+
+def load_optimizer():
+    """
+    Import models/paste5.py without Odoo. The models directory is registered as
+    a bare package, so its __init__ (which imports Odoo models) never runs while
+    relative imports between optimizer modules keep working.
+    """
+    package = types.ModuleType('cutlist_models')
+    package.__path__ = [MODELS_DIR]
+    sys.modules.setdefault('cutlist_models', package)
+    return importlib.import_module('cutlist_models.paste5')
+
+
+def build_optimizer(paste5, instance, multi_sheet):
+    panels = [paste5.Panel(length=length, width=width, quantity=quantity, label=label, grain_direction=grain)
+              for length, width, quantity, label, grain in instance['panels']]
+    length, width, quantity = instance['sheet']
+    sheet = paste5.StockSheet(length=length, width=width, quantity=quantity)
+    options = paste5.OptimizerOptions(use_single_sheet=not multi_sheet, **instance['options'])
+    return paste5.EnhancedCuttingStockOptimizer(panels, sheet, options)
+
+
+def count_overlaps(pattern):
+    """Number of placement pairs whose panels overlap, by a sweep over x."""
+    boxes = []
+    for panel, x, y, rotated, _panel_id in pattern.placements():
+        length, width = (panel.width, panel.length) if rotated else (panel.length, panel.width)
+        boxes.append((x, x + length, y, y + width))
+    boxes.sort()
+    overlaps = 0
+    active = []
+    eps = 1e-9
+    for box in boxes:
+        active = [other for other in active if other[1] > box[0] + eps]
+        overlaps += sum(1 for other in active if other[2] < box[3] - eps and box[2] < other[3] - eps)
+        active.append(box)
+    return overlaps
+
+
+def metrics(patterns, total_parts):
+    sheet_area = sum(pattern.stock_sheet.area() for pattern in patterns)
+    used_area = sum(pattern.stock_sheet.area() - pattern.waste_area for pattern in patterns)
+    placed = sum(len(pattern) for pattern in patterns)
+    return {
+        'placed': placed,
+        'unplaced': total_parts - placed,
+        'sheets': len(patterns),
+        'usage_ratio': round(used_area / sheet_area, 6) if sheet_area else 0.0,
+        'overlaps': sum(count_overlaps(pattern) for pattern in patterns),
+    }
+
+
+def measure(run, repeat, memory):
+    """Best wall time of repeat runs, then one traced run for the peak memory."""
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    peak = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        with contextlib.redirect_stdout(io.StringIO()):
+            run()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result, best, peak
+
+
+def run_instance(paste5, instance, multi_sheet, repeat, memory):
+    total_parts = sum(quantity for _length, _width, quantity, _label, _grain in instance['panels'])
+    optimizer = build_optimizer(paste5, instance, multi_sheet)
+    with contextlib.redirect_stdout(io.StringIO()):
+        tasks = optimizer._strategy_tasks(True) if multi_sheet else optimizer._single_sheet_tasks()
+
+    rows = []
+    for strategy, args in tasks:
+        (patterns, _unplaced), seconds, peak = measure(
+            lambda: optimizer._run_strategy(strategy, args), repeat, memory)
+        rows.append(dict(strategy=optimizer._strategy_label(strategy, args), seconds=round(seconds, 6),
+                         peak_bytes=peak, **metrics(patterns, total_parts)))
+
+    def run_selection():
+        selection = build_optimizer(paste5, instance, multi_sheet)
+        return selection.optimize_multi() if multi_sheet else [selection.optimize()]
+
+    patterns, seconds, peak = measure(run_selection, repeat, memory)
+    rows.append(dict(strategy='optimize_multi' if multi_sheet else 'optimize', seconds=round(seconds, 6),
+                     peak_bytes=peak, **metrics(patterns, total_parts)))
+
+    for row in rows:
+        row.update(instance=instance['name'], family=instance['family'], parts=total_parts,
+                   types=len(instance['panels']), mode='multi' if multi_sheet else 'single')
+    return rows
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=MODELS_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, baseline, tolerance):
+    """Print results that regressed against the baseline report and return how many did."""
+    def key(row):
+        return row['instance'], row['mode'], row['strategy']
+
+    previous = {key(row): row for row in baseline['results']}
+    regressions = 0
+    for row in report['results']:
+        old = previous.get(key(row))
+        if old is None:
+            continue
+        problems = []
+        if row['seconds'] > old['seconds'] * (1 + tolerance) and row['seconds'] - old['seconds'] > 0.005:
+            problems.append(f"time {old['seconds']:.4f}s -> {row['seconds']:.4f}s")
+        if row['placed'] < old['placed']:
+            problems.append(f"placed {old['placed']} -> {row['placed']}")
+        if row['placed'] == old['placed'] and row['sheets'] > old['sheets']:
+            problems.append(f"sheets {old['sheets']} -> {row['sheets']}")
+        if row['usage_ratio'] < old['usage_ratio'] - 1e-6 and row['sheets'] >= old['sheets']:
+            problems.append(f"usage {old['usage_ratio']:.4f} -> {row['usage_ratio']:.4f}")
+        if row['overlaps'] > old['overlaps']:
+            problems.append(f"overlaps {old['overlaps']} -> {row['overlaps']}")
+        if problems:
+            regressions += 1
+            print(f"REGRESSION {row['instance']} {row['mode']} {row['strategy']}: {', '.join(problems)}",
+                  file=sys.stderr)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--families', nargs='+', choices=sorted(FAMILIES), default=sorted(FAMILIES))
+    parser.add_argument('--seeds', nargs='+', type=int, default=[1])
+    parser.add_argument('--size', type=int, help="Parts per instance (default depends on the family)")
+    parser.add_argument('--mode', choices=['single', 'multi', 'both'], default='both')
+    parser.add_argument('--repeat', type=int, default=1, help="Timed runs per strategy, the best is reported")
+    parser.add_argument('--no-memory', action='store_true', help="Skip the traced run for peak memory")
+    parser.add_argument('--output', help="Write the JSON report to this file instead of stdout")
+    parser.add_argument('--compare', help="Earlier JSON report to check for regressions")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed relative slowdown for --compare")
+    args = parser.parse_args(argv)
+
+    paste5 = load_optimizer()
+    modes = {'single': [False], 'multi': [True], 'both': [False, True]}[args.mode]
+    results = []
+    for family in args.families:
+        for seed in args.seeds:
+            instance = generate(family, seed, args.size or DEFAULT_SIZES[family])
+            for multi_sheet in modes:
+                print(f"{instance['name']} ({'multi' if multi_sheet else 'single'})...", file=sys.stderr)
+                results.extend(run_instance(paste5, instance, multi_sheet, args.repeat, not args.no_memory))
+
+    report = {
+        'meta': {
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'arguments': vars(args),
+        },
+        'results': results,
+    }
+    encoded = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output:
+            output.write(encoded + '\n')
+    else:
+        print(encoded)
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            regressions = compare(report, json.load(baseline_file), args.tolerance)
+        print(f"{regressions} regression(s) against {args.compare}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
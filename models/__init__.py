@@ -4,4 +4,8 @@ from . import panel
 from . import stock_sheet
 from . import optimizer_options
 from . import cutting_job
-from . import paste5
\ No newline at end of file
+from . import nesting
+from . import remnant
+from . import optimization_cache
+from . import paste5
+from . import column_generation
\ No newline at end of file
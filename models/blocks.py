@@ -0,0 +1,218 @@
+"""
+Block packing of identical panels.
+
+block_layout computes how to cut as many copies of one panel as possible from
+a rectangle, with a three-stage guillotine layout: the first cuts divide the
+rectangle into sections, the second cut each section into strips and the last
+cut each strip into panels. Every strip holds one orientation, so the layout
+is a handful of homogeneous blocks (columns x rows of panels) and its cost
+depends on the dimensions only, not on the number of panels. Sections are
+chosen by a dynamic program over the remaining width, memoized per sheet
+sub-dimension, and both directions of the first cut are tried.
+
+Panel sizes include the kerf, like the footprints of the MaxRects packer.
+"""
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from .paste5 import Rectangle
+
+# Slack for float sums of panel sizes
+EPSILON = 1e-9
+
+# (x, y, columns, rows, rotated) of a homogeneous block of panels
+Block = Tuple[float, float, int, int, bool]
+
+
+class BlockLayout:
+    """
+    Layout of identical panels as homogeneous blocks, filled in order: block by block,
+    row by row. Free space outside the blocks is kept as disjoint leftover rectangles.
+    """
+    __slots__ = ('length', 'width', 'panel_length', 'panel_width', 'count', 'blocks', 'leftovers')
+    
+    def __init__(self, length: float, width: float, panel_length: float, panel_width: float,
+                 blocks: List[Block], leftovers: List[Rectangle]):
+        self.length = length
+        self.width = width
+        self.panel_length = panel_length
+        self.panel_width = panel_width
+        self.blocks = blocks
+        self.leftovers = leftovers
+        self.count = sum(columns * rows for _x, _y, columns, rows, _rotated in blocks)
+    
+    def __repr__(self):
+        return f"BlockLayout({self.count} panels in {len(self.blocks)} blocks)"
+    
+    def block_size(self, rotated: bool) -> Tuple[float, float]:
+        """Footprint of one panel of a block."""
+        if rotated:
+            return self.panel_width, self.panel_length
+        return self.panel_length, self.panel_width
+    
+    def fill(self, count: Optional[int] = None) -> List[Block]:
+        """
+        Blocks holding the first count panels (all of them by default). A block that is
+        only partly filled becomes its full rows plus one block for the last, partial row.
+        """
+        if count is None or count >= self.count:
+            return list(self.blocks)
+        filled = []
+        for x, y, columns, rows, rotated in self.blocks:
+            if count <= 0:
+                break
+            full_rows = min(rows, count // columns)
+            if full_rows:
+                filled.append((x, y, columns, full_rows, rotated))
+            rest = min(count, columns * rows) - full_rows * columns
+            if rest:
+                filled.append((x, y + full_rows * self.block_size(rotated)[1], rest, 1, rotated))
+            count -= columns * full_rows + rest
+        return filled
+    
+    def free_space(self, count: Optional[int] = None) -> List[Rectangle]:
+        """
+        Disjoint free rectangles left once the first count panels are placed: the leftovers,
+        plus the unfilled part of the blocks, split so that every piece can be cut edge to edge.
+        """
+        free = list(self.leftovers)
+        remaining = self.count if count is None else count
+        for x, y, columns, rows, rotated in self.blocks:
+            width, height = self.block_size(rotated)
+            used = min(max(remaining, 0), columns * rows)
+            remaining -= used
+            if used == columns * rows:
+                continue
+            full_rows, rest = divmod(used, columns)
+            if rest:
+                row_y = y + full_rows * height
+                free.append(Rectangle(x + rest * width, row_y, (columns - rest) * width, height))
+                full_rows += 1
+            if full_rows < rows:
+                free.append(Rectangle(x, y + full_rows * height, columns * width, (rows - full_rows) * height))
+        return free
+    
+    def placements(self, count: Optional[int] = None):
+        """Iterate over the (x, y, rotated) positions of the first count panels."""
+        for x, y, columns, rows, rotated in self.fill(count):
+            width, height = self.block_size(rotated)
+            for row in range(rows):
+                for column in range(columns):
+                    yield x + column * width, y + row * height, rotated
+
+
+def fit_count(space: float, size: float) -> int:
+    """How many times size fits in space."""
+    count = int(space / size)
+    while (count + 1) * size <= space + EPSILON:
+        count += 1
+    while count and count * size > space + EPSILON:
+        count -= 1
+    return count
+
+
+def block_bound(length: float, width: float, panel_length: float, panel_width: float, can_rotate: bool) -> int:
+    """Panels in the best single block, a lower bound of block_layout(...).count that costs nothing."""
+    best = fit_count(length, panel_length) * fit_count(width, panel_width)
+    if can_rotate:
+        best = max(best, fit_count(length, panel_width) * fit_count(width, panel_length))
+    return best
+
+
+@lru_cache(maxsize=512)
+def block_layout(length: float, width: float, panel_length: float, panel_width: float,
+                 can_rotate: bool) -> BlockLayout:
+    """
+    Three-stage guillotine layout with the most panels of the given size (kerf included) in
+    a length x width rectangle. Results are cached, identical panel groups share them.
+    """
+    sizes = [(panel_length, panel_width, False)]
+    if can_rotate and panel_length != panel_width:
+        sizes.append((panel_width, panel_length, True))
+    
+    # Sections side by side along the length, strips stacked along the width
+    count, blocks, leftovers = _sections(length, width, tuple(sizes))
+    area_bound = int(length * width / (panel_length * panel_width) + EPSILON)
+    if count < area_bound:
+        # The same with the first cuts across the length, coordinates swapped back
+        transposed = tuple((height, size, rotated) for size, height, rotated in sizes)
+        other_count, other_blocks, other_leftovers = _sections(width, length, transposed)
+        if other_count > count:
+            blocks = [(y, x, rows, columns, rotated) for x, y, columns, rows, rotated in other_blocks]
+            leftovers = [Rectangle(rect.y, rect.x, rect.height, rect.width) for rect in other_leftovers]
+    return BlockLayout(length, width, panel_length, panel_width, blocks, leftovers)
+
+
+def _strips(section: float, height: float, sizes) -> Tuple[int, List[Tuple[int, int]]]:
+    """
+    Best stack of strips in a section x height area, each strip holding one orientation
+    across the section. Returns (panels, [(size index, strips)]).
+    """
+    per_strip = [fit_count(section, size) for size, _height, _rotated in sizes]
+    first_height = sizes[0][1]
+    if len(sizes) == 1:
+        strips = fit_count(height, first_height)
+        return strips * per_strip[0], [(0, strips)]
+    
+    second_height = sizes[1][1]
+    best = (-1, [])
+    for first in range(fit_count(height, first_height) + 1):
+        second = fit_count(height - first * first_height, second_height)
+        count = first * per_strip[0] + second * per_strip[1]
+        if count > best[0]:
+            best = (count, [(0, first), (1, second)])
+    return best
+
+
+def _sections(length: float, height: float, sizes) -> Tuple[int, List[Block], List[Rectangle]]:
+    """
+    Best division of the length into sections of strips, by a dynamic program over the
+    length still free. Section lengths are whole numbers of panels of one orientation.
+    Returns the panel count, the blocks and the free rectangles next to and above the strips.
+    """
+    candidates = sorted({round(columns * size, 9) for size, _height, _rotated in sizes
+                         for columns in range(1, fit_count(length, size) + 1)})
+    section_cache: Dict[float, Tuple[int, List[Tuple[int, int]]]] = {}
+    
+    def section(section_length):
+        if section_length not in section_cache:
+            section_cache[section_length] = _strips(section_length, height, sizes)
+        return section_cache[section_length]
+    
+    @lru_cache(maxsize=None)
+    def best(free: float) -> Tuple[int, Optional[float]]:
+        # One section filling what is left, or a candidate section followed by the best of the rest
+        result = (section(free)[0], None)
+        for candidate in candidates:
+            if candidate > free - EPSILON:
+                break
+            count = section(candidate)[0] + best(round(free - candidate, 9))[0]
+            if count > result[0]:
+                result = (count, candidate)
+        return result
+    
+    total, _first = best(length)
+    
+    # Walk the choices back into blocks
+    blocks = []
+    leftovers = []
+    x, free = 0.0, length
+    while True:
+        _count, candidate = best(free)
+        section_length = free if candidate is None else candidate
+        y = 0.0
+        for index, strips in section(section_length)[1]:
+            if not strips:
+                continue
+            size, strip_height, rotated = sizes[index]
+            columns = fit_count(section_length, size)
+            if columns:
+                blocks.append((x, y, columns, strips, rotated))
+            leftovers.append(Rectangle(x + columns * size, y, section_length - columns * size, strips * strip_height))
+            y += strips * strip_height
+        leftovers.append(Rectangle(x, y, section_length, height - y))
+        if candidate is None:
+            break
+        x += candidate
+        free = round(free - candidate, 9)
+    return total, blocks, [rect for rect in leftovers if rect.width > EPSILON and rect.height > EPSILON]
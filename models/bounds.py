@@ -0,0 +1,124 @@
+"""
+Lower bounds on the number of stock sheets a job needs.
+
+They are computed up front from the panel dimensions only, in far less time than any
+packing, and serve two purposes: the optimizer stops trying strategies and searching
+as soon as a plan places every panel on as many sheets as the bound (no plan can do
+better), and the job reports how far its plan may be from the optimum.
+
+For sheets of one size the bound is the best of:
+
+- the area bound: the panel area over the sheet area, rounded up;
+- the large item bound: panels longer than half the sheet in every allowed orientation
+  all cross its middle line, so on one sheet they are stacked across it and their widths
+  add up to at most the sheet width (and the same the other way round);
+- the L2 bound of Martello and Vigo, extended to rotatable panels: for every pair of
+  thresholds (p, q), the panels larger than the sheet less (p, q) need a sheet each and
+  leave no room to the panels of at least (p, q), the panels larger than half the sheet
+  need a sheet each too, and the area of the panels of at least (p, q) that the free area
+  of the latter cannot hold needs more sheets.
+
+For several sizes to choose from, the continuous bound spreads the panel area over the
+largest size as if sheets could be cut into any shape.
+
+Panel sizes include the kerf, like the footprints of the MaxRects packer. Panels that
+fit on no sheet are left out: no plan places them.
+"""
+import math
+from typing import List, Sequence, Tuple
+
+# Slack for float sums of panel sizes
+EPSILON = 1e-9
+
+# Threshold values tried per side by the L2 bound, evenly picked among the panel sizes
+BOUND_BREAKPOINTS = 16
+
+# A panel type: (length, width, quantity, can rotate), kerf included
+Item = Tuple[float, float, int, bool]
+
+
+def orientations(item: Item, length: float, width: float) -> List[Tuple[float, float]]:
+    """The (length, width) orientations of the panel that fit on a length x width sheet."""
+    panel_length, panel_width, _quantity, can_rotate = item
+    shapes = [(panel_length, panel_width)]
+    if can_rotate and panel_length != panel_width:
+        shapes.append((panel_width, panel_length))
+    return [(a, b) for a, b in shapes if a <= length + EPSILON and b <= width + EPSILON]
+
+
+def area_bound(items: Sequence[Item], length: float, width: float) -> int:
+    """Sheets needed by the panel area alone."""
+    area = sum(item[0] * item[1] * item[2] for item in items)
+    return max(math.ceil(area / (length * width) - EPSILON), 0)
+
+
+def large_item_bound(items: Sequence[Item], length: float, width: float) -> int:
+    """Sheets needed to stack the panels longer (or wider) than half the sheet in every orientation."""
+    best = 0
+    for along, across, side in ((0, 1, width), (1, 0, length)):
+        half = (length, width)[along] / 2
+        stacked = 0.0
+        for item in items:
+            shapes = orientations(item, length, width)
+            if shapes and all(shape[along] > half + EPSILON for shape in shapes):
+                stacked += min(shape[across] for shape in shapes) * item[2]
+        best = max(best, math.ceil(stacked / side - EPSILON))
+    return best
+
+
+def l2_bound(items: Sequence[Item], length: float, width: float) -> int:
+    """The L2 bound of Martello and Vigo over BOUND_BREAKPOINTS thresholds per side, see the module docstring."""
+    sheet_area = length * width
+    # Smallest length and width of every panel over its orientations, and its area
+    shapes = []
+    for item in items:
+        fitting = orientations(item, length, width)
+        if fitting:
+            shapes.append((min(a for a, _b in fitting), min(b for _a, b in fitting), item[2], item[0] * item[1]))
+    if not shapes:
+        return 0
+    
+    best = 0
+    for p in _breakpoints([a for a, _b, _quantity, _area in shapes], length / 2):
+        for q in _breakpoints([b for _a, b, _quantity, _area in shapes], width / 2):
+            alone = large = 0
+            large_area = small_area = 0.0
+            for a, b, quantity, area in shapes:
+                if a > length - p + EPSILON and b > width - q + EPSILON:
+                    alone += quantity
+                elif a > length / 2 + EPSILON and b > width / 2 + EPSILON:
+                    large += quantity
+                    large_area += area * quantity
+                elif a >= p - EPSILON and b >= q - EPSILON:
+                    small_area += area * quantity
+            spill = small_area - (large * sheet_area - large_area)
+            best = max(best, alone + large + max(math.ceil(spill / sheet_area - EPSILON), 0))
+    return best
+
+
+def _breakpoints(values: List[float], limit: float) -> List[float]:
+    """0 and up to BOUND_BREAKPOINTS of the distinct values not above limit, evenly spread."""
+    candidates = sorted({value for value in values if value <= limit + EPSILON})
+    if len(candidates) > BOUND_BREAKPOINTS:
+        step = len(candidates) / BOUND_BREAKPOINTS
+        candidates = [candidates[int(position * step)] for position in range(BOUND_BREAKPOINTS)]
+    return [0.0] + candidates
+
+
+def sheet_bound(items: Sequence[Item], length: float, width: float) -> int:
+    """Lower bound on the length x width sheets the panels that fit need, the best of the bounds above."""
+    items = [item for item in items if item[2] > 0 and orientations(item, length, width)]
+    if not items:
+        return 0
+    return max(area_bound(items, length, width), large_item_bound(items, length, width),
+               l2_bound(items, length, width))
+
+
+def continuous_bound(items: Sequence[Item], sizes: Sequence[Tuple[float, float]]) -> int:
+    """Lower bound on the sheets of several sizes the panels that fit on one of them need."""
+    if len(sizes) == 1:
+        return sheet_bound(items, *sizes[0])
+    items = [item for item in items if item[2] > 0 and any(orientations(item, *size) for size in sizes)]
+    if not items:
+        return 0
+    return area_bound(items, *max(sizes, key=lambda size: size[0] * size[1]))
@@ -0,0 +1,411 @@
+"""
+Exact mode of the cutting stock optimizer.
+
+The MaxRects heuristic runs first. Its sheets seed a column generation over
+two-stage guillotine patterns: the sheet is cut into horizontal strips, and
+each strip into panels placed side by side. The master problem chooses how
+many sheets to cut with each pattern so that every panel is cut, and is
+solved with PuLP. New patterns are priced with two knapsack dynamic programs
+(panels into a strip, strips into a sheet) over the dual values of the
+demands. The integer master is then solved over all generated patterns
+within the solver time limit and MIP gap. Its plan is used only when it beats
+the heuristic plan, so running out of time falls back to the heuristic result.
+"""
+import logging
+import math
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pulp
+
+from .paste5 import CuttingPattern, EnhancedCuttingStockOptimizer, PanelRuns
+
+_logger = logging.getLogger(__name__)
+
+
+class Column:
+    """A sheet pattern of the master problem: panels cut per type and their (type, x, y, rotated) placements."""
+    __slots__ = ('counts', 'placements')
+    
+    def __init__(self, counts: Tuple[int, ...], placements: List[Tuple[int, float, float, bool]]):
+        self.counts = counts
+        self.placements = placements
+
+
+class ColumnGenerationOptimizer(EnhancedCuttingStockOptimizer):
+    """Cutting stock optimizer minimizing the sheet count with column generation, see the module docstring."""
+    
+    # Resolution of the pricing dynamic programs, in units along the longer sheet side
+    GRID_UNITS = 4000
+    # Stop pricing once this many patterns were generated
+    MAX_COLUMNS = 1000
+    # Patterns priced per round, each over the panel types the previous ones left out
+    COLUMNS_PER_ROUND = 5
+    # Reduced cost a new pattern must beat to enter the master problem
+    EPSILON = 1e-6
+    
+    def optimize(self) -> CuttingPattern:
+        """Best single sheet pattern: the heuristic one unless the integer master finds a better one."""
+        pattern = super().optimize()
+        found = self._solve_exact([pattern], sheet_limit=1)
+        if found is not None and found[0]:
+            return found[0][0]
+        return pattern
+    
+    def optimize_multi(self) -> List[CuttingPattern]:
+        """
+        Best multi-sheet plan: the heuristic one unless the integer master finds a better one.
+        The solver is not run when the heuristic plan meets the lower bound.
+        """
+        plan = super().optimize_multi()
+        if self._is_optimal(plan, self.unplaced_panels, multi_sheet=True):
+            return plan
+        found = self._solve_exact(plan, sheet_limit=self.stock_sheet.quantity)
+        if found is not None:
+            plan, self.unplaced_panels = found
+        return plan
+    
+    def _solve_exact(self, heuristic_plan: List[CuttingPattern],
+                     sheet_limit: int) -> Optional[Tuple[List[CuttingPattern], PanelRuns]]:
+        """
+        Run the column generation from the heuristic plan. Returns the plan and unplaced
+        panels of the integer master if it beats the heuristic plan, otherwise None.
+        """
+        start = time.perf_counter()
+        deadline = start + self.options.solver_time_limit
+        # Pricing stops half way, so the integer master gets at least the other half
+        pricing_deadline = start + self.options.solver_time_limit / 2
+        demand = [panel.quantity for panel in self.panels]
+        self._prepare_pricing()
+        
+        # The heuristic sheets are the warm start, so the master is never worse than them
+        columns: Dict[Tuple[int, ...], Column] = {}
+        initial: Dict[Tuple[int, ...], int] = {}
+        for column in self._plan_columns(heuristic_plan):
+            columns.setdefault(column.counts, column)
+            initial[column.counts] = initial.get(column.counts, 0) + 1
+        # Sheets filled greedily by area give a starting plan of guillotine patterns
+        remaining = list(demand)
+        areas = [panel.area() for panel in self.panels]
+        greedy_sheets = 0
+        while any(remaining) and greedy_sheets < sheet_limit:
+            column = self._price(areas, remaining)
+            if column is None:
+                break
+            columns.setdefault(column.counts, column)
+            remaining = [quantity - count for quantity, count in zip(remaining, column.counts)]
+            greedy_sheets += 1
+        
+        # Fewest sheets of a starting plan that cuts every panel. Pricing stops once a
+        # lower bound on the sheets shows it cannot be beaten.
+        complete = []
+        if sum(len(pattern) for pattern in heuristic_plan) == sum(demand):
+            complete.append(len(heuristic_plan))
+        if not any(remaining) and greedy_sheets <= sheet_limit:
+            complete.append(greedy_sheets)
+        incumbent = min(complete, default=None)
+        lower_bound = math.ceil(sum(area * quantity for area, quantity in zip(areas, demand))
+                                / self.stock_sheet.area() - self.EPSILON)
+        if sheet_limit > 1:
+            # The bound of the heuristic, kerf and large panels included, see bounds.py
+            lower_bound = max(lower_bound, self.sheet_bound)
+        
+        status = 'not solved'
+        iterations = 0
+        try:
+            while (time.perf_counter() < pricing_deadline and len(columns) < self.MAX_COLUMNS
+                   and (incumbent is None or incumbent > lower_bound)):
+                duals = self._solve_master(list(columns.values()), demand, sheet_limit)
+                if duals is None:
+                    break
+                values, sheet_dual, objective = duals
+                iterations += 1
+                added = 0
+                for _ in range(self.COLUMNS_PER_ROUND):
+                    column = self._price(values, demand)
+                    if column is None or column.counts in columns:
+                        break
+                    reduced_cost = 1.0 - sheet_dual - sum(
+                        value * count for value, count in zip(values, column.counts))
+                    if reduced_cost > -self.EPSILON:
+                        break
+                    # Lagrangian bound: no plan of at most incumbent sheets beats the relaxation
+                    # by more than that many times the best reduced cost
+                    if not added and incumbent is not None and math.ceil(
+                            objective + incumbent * reduced_cost - self.EPSILON) >= incumbent:
+                        break
+                    columns[column.counts] = column
+                    added += 1
+                    values = [0.0 if count else value for value, count in zip(values, column.counts)]
+                if not added:
+                    break
+            else:
+                self.time_limited = self.time_limited or time.perf_counter() >= pricing_deadline
+            self.stats.add('column generation', time.perf_counter() - start, iterations)
+            
+            start = time.perf_counter()
+            column_list = list(columns.values())
+            time_limit = max(deadline - start, 1.0)
+            solution = self._solve_master(column_list, demand, sheet_limit, integer=True, time_limit=time_limit,
+                                          initial=[initial.get(column.counts, 0) for column in column_list])
+            self.stats.add('integer master', time.perf_counter() - start)
+        except pulp.PulpSolverError as e:
+            _logger.warning("Solver failed (%s), keeping the heuristic result", e)
+            solution = None
+        
+        found = None
+        if solution is not None:
+            status = 'solved'
+            plan, unplaced = self._build_plan(column_list, solution, demand)
+            if self._rounded_key(plan) > self._rounded_key(heuristic_plan):
+                found = plan, unplaced
+        
+        _logger.debug("Column generation: %d patterns after %d pricing rounds, %s, improved: %s",
+                      len(columns), iterations, status, found is not None)
+        if self.trace is not None:
+            self.trace.append(('solver', len(columns), iterations, status, found is not None))
+        return found
+    
+    def _rounded_key(self, plan: List[CuttingPattern]) -> Tuple[float, int, float]:
+        """_plan_key rounded, so summing the same areas in another order does not count as better."""
+        placed_area, sheets, last_usage = self._plan_key(plan)
+        return round(placed_area, 6), sheets, round(last_usage, 9)
+    
+    def _plan_columns(self, plan: List[CuttingPattern]) -> List[Column]:
+        """Turn the sheets of a plan into master problem columns."""
+        columns = []
+        for panel_types, _panel_ids, xs, ys, rotated in self._compact_result(plan, [])[0]:
+            counts = [0] * len(self.panels)
+            for panel_type in panel_types:
+                counts[panel_type] += 1
+            columns.append(Column(tuple(counts), list(zip(panel_types, xs, ys, map(bool, rotated)))))
+        return columns
+    
+    def _solve_master(self, columns: List[Column], demand: List[int], sheet_limit: int, integer: bool = False,
+                      time_limit: Optional[float] = None, initial: Optional[List[int]] = None):
+        """
+        Solve the master problem: minimize the sheets cut, with an area proportional
+        penalty for every panel left out that outweighs any sheet. Returns the dual
+        values of the demands and of the sheet limit and the objective value for the
+        linear relaxation, or the
+        number of sheets cut per column for the integer problem. None if not solved.
+        """
+        problem = pulp.LpProblem('cutting_stock', pulp.LpMinimize)
+        category = pulp.LpInteger if integer else pulp.LpContinuous
+        sheets = [pulp.LpVariable(f'x{j}', lowBound=0, upBound=sheet_limit, cat=category)
+                  for j in range(len(columns))]
+        missing = [pulp.LpVariable(f's{i}', lowBound=0, upBound=quantity) for i, quantity in enumerate(demand)]
+        
+        penalty = 2.0 / min(panel.area() for panel in self.panels)
+        problem += pulp.lpSum(sheets) + pulp.lpSum(
+            penalty * panel.area() * variable for panel, variable in zip(self.panels, missing))
+        for i, quantity in enumerate(demand):
+            problem += (pulp.lpSum(column.counts[i] * variable for column, variable in zip(columns, sheets)
+                                   if column.counts[i]) + missing[i] >= quantity, f'demand{i}')
+        problem += (pulp.lpSum(sheets) <= sheet_limit, 'sheets')
+        
+        if not integer:
+            problem.solve(pulp.PULP_CBC_CMD(msg=False))
+            if problem.status != pulp.LpStatusOptimal:
+                return None
+            values = [problem.constraints[f'demand{i}'].pi or 0.0 for i in range(len(demand))]
+            return values, problem.constraints['sheets'].pi or 0.0, pulp.value(problem.objective)
+        
+        if initial:
+            for variable, value in zip(sheets, initial):
+                variable.setInitialValue(value)
+        problem.solve(pulp.PULP_CBC_CMD(msg=False, timeLimit=time_limit, gapRel=self.options.solver_mip_gap,
+                                        warmStart=bool(initial and any(initial))))
+        if problem.sol_status != pulp.LpSolutionOptimal:
+            # Not proven optimal within the time limit (or the gap): a rerun may find another plan
+            self.time_limited = True
+        if problem.sol_status not in (pulp.LpSolutionOptimal, pulp.LpSolutionIntegerFeasible):
+            return None
+        return [int(round(variable.varValue or 0)) for variable in sheets]
+    
+    def _build_plan(self, columns: List[Column], solution: List[int],
+                    demand: List[int]) -> Tuple[List[CuttingPattern], PanelRuns]:
+        """Cut the chosen patterns, leaving out panels beyond the demand. Fullest sheets come first."""
+        remaining = list(demand)
+        plan = []
+        for column, copies in zip(columns, solution):
+            for _ in range(copies):
+                pattern = CuttingPattern(self.stock_sheet, self.panels, self.panel_index)
+                for panel_type, x, y, rotated in column.placements:
+                    if remaining[panel_type]:
+                        remaining[panel_type] -= 1
+                        pattern.add_placement(panel_type, x, y, rotated, panel_type)
+                if len(pattern):
+                    plan.append(pattern)
+        plan.sort(key=lambda pattern: pattern.waste_area)
+        unplaced = [(panel_type, count) for panel_type, count in enumerate(remaining) if count]
+        return plan, unplaced
+    
+    def _prepare_pricing(self) -> None:
+        """Scale the sheet to the pricing grid and list the panel orientations that fit, by strip height."""
+        sheet = self.stock_sheet
+        kerf = self.options.kerf_thickness
+        scale = self.GRID_UNITS / max(sheet.length, sheet.width)
+        self._length_units = int(math.floor(sheet.length * scale + 1e-6))
+        self._width_units = int(math.floor(sheet.width * scale + 1e-6))
+        
+        # (height units, length units, panel type, rotated, length, height); sizes are rounded up so
+        # whatever fits on the grid fits on the sheet
+        orientations = []
+        for panel_type, panel in enumerate(self.panels):
+            shapes = [(panel.length, panel.width, False)]
+            if panel.can_rotate(self.options.consider_grain) and panel.length != panel.width:
+                shapes.append((panel.width, panel.length, True))
+            for length, height, rotated in shapes:
+                length_units = math.ceil((length + kerf) * scale - 1e-6)
+                height_units = math.ceil((height + kerf) * scale - 1e-6)
+                if length_units <= self._length_units and height_units <= self._width_units:
+                    orientations.append((height_units, length_units, panel_type, rotated, length, height))
+        orientations.sort()
+        self._orientations = orientations
+    
+    @staticmethod
+    def _binary_split(bound: int):
+        """Split a bounded item into 1, 2, 4, ... copies, so 0/1 knapsack choices can add up to any count."""
+        multiple = 1
+        while bound > 0:
+            take = min(multiple, bound)
+            yield take
+            bound -= take
+            multiple *= 2
+    
+    @staticmethod
+    def _knapsack_add(dp: np.ndarray, size: int, value: float) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        0/1 knapsack step over all capacities at once. dp[c] is the best value within
+        capacity c. Returns the new dp and where the item was taken, or None if it never helps.
+        """
+        if size > len(dp) - 1:
+            return None
+        candidate = dp[:-size] + value
+        better = candidate > dp[size:] + 1e-12
+        if not better.any():
+            return None
+        updated = dp.copy()
+        updated[size:][better] = candidate[better]
+        taken = np.zeros(len(dp), dtype=bool)
+        taken[size:] = better
+        return updated, taken
+    
+    def _price(self, values: List[float], demand: List[int]) -> Optional[Column]:
+        """
+        Find a two-stage guillotine pattern of high total value: every strip height is
+        filled with the best panels along the sheet length, and a knapsack over the sheet
+        width chooses the strips to stack. Strips compete for the same panels, so chosen
+        strips are laid out densest first only while all of their panels are still
+        demanded, then the strips are recomputed for the remaining panels and width.
+        """
+        orientations = self._orientations
+        kerf = self.options.kerf_thickness
+        remaining = list(demand)
+        counts = [0] * len(self.panels)
+        placements = []
+        width_units = self._width_units
+        y = 0.0
+        while True:
+            strips = self._strip_options(values, remaining)
+            chosen = self._stack_strips(strips, remaining, width_units)
+            if not chosen:
+                break
+            chosen.sort(key=lambda choice: -strips[choice[0]][1] / strips[choice[0]][0])
+            placed = len(placements)
+            for index, multiple in chosen:
+                height_units, _value, contents = strips[index]
+                needed: Dict[int, int] = {}
+                for position in contents:
+                    panel_type = orientations[position][2]
+                    needed[panel_type] = needed.get(panel_type, 0) + multiple
+                # The densest strip always goes in, possibly short of panels, so every round progresses
+                if len(placements) > placed and any(remaining[t] < n for t, n in needed.items()):
+                    continue
+                strip_height = max(orientations[position][5] for position in contents)
+                # Strips go upwards, panels in each strip from the left
+                for _ in range(multiple):
+                    x = 0.0
+                    for position in contents:
+                        _height_units, _item_units, panel_type, rotated, length, _height = orientations[position]
+                        if remaining[panel_type]:
+                            remaining[panel_type] -= 1
+                            counts[panel_type] += 1
+                            placements.append((panel_type, x, y, rotated))
+                        x += length + kerf
+                    y += strip_height + kerf
+                width_units -= multiple * height_units
+            if len(placements) == placed:
+                break
+        if not placements:
+            return None
+        return Column(tuple(counts), placements)
+    
+    def _strip_options(self, values: List[float], demand: List[int]) -> List[Tuple[int, float, List[int]]]:
+        """
+        Best strip of every height as (height units, value, orientations placed), by one
+        bounded knapsack over the sheet length. Orientations come by increasing height,
+        so the dp after the last orientation of a height is the best strip of that height.
+        Strips no better than a lower one are left out.
+        """
+        orientations = self._orientations
+        length_units = self._length_units
+        dp = np.zeros(length_units + 1)
+        copies = []  # (orientation, multiple, taken)
+        strips = []
+        for position, (height_units, item_units, panel_type, _rotated, _length, _height) in enumerate(orientations):
+            value = values[panel_type]
+            if value > self.EPSILON and demand[panel_type]:
+                for multiple in self._binary_split(min(demand[panel_type], length_units // item_units)):
+                    step = self._knapsack_add(dp, multiple * item_units, multiple * value)
+                    if step is not None:
+                        dp, taken = step
+                        copies.append((position, multiple, taken))
+            last_of_height = position + 1 == len(orientations) or orientations[position + 1][0] != height_units
+            if last_of_height and dp[-1] > self.EPSILON and (not strips or dp[-1] > strips[-1][1] + self.EPSILON):
+                strips.append((height_units, float(dp[-1]), self._strip_contents(copies, length_units)))
+        return strips
+    
+    def _strip_contents(self, copies, capacity: int) -> List[int]:
+        """Orientations taken by the knapsack whose item copies are given, tallest first."""
+        contents = []
+        for position, multiple, taken in reversed(copies):
+            if taken[capacity]:
+                contents.extend([position] * multiple)
+                capacity -= multiple * self._orientations[position][1]
+        # The rest of the strip keeps the offcut together
+        contents.sort(key=lambda position: -self._orientations[position][5])
+        return contents
+    
+    def _stack_strips(self, strips, demand: List[int], width_units: int) -> List[Tuple[int, int]]:
+        """
+        Choose (strip, repeats) of the highest total value within the width, by a bounded
+        knapsack where a strip repeats at most as often as all of its panels are demanded.
+        """
+        dp = np.zeros(width_units + 1)
+        copies = []  # (strip, multiple, taken)
+        for index, (height_units, value, contents) in enumerate(strips):
+            per_type: Dict[int, int] = {}
+            for position in contents:
+                panel_type = self._orientations[position][2]
+                per_type[panel_type] = per_type.get(panel_type, 0) + 1
+            bound = min([width_units // height_units] + [demand[t] // n for t, n in per_type.items()])
+            if not bound:
+                # Partly demanded strip, worth placing once with the panels still needed
+                bound = 1 if height_units <= width_units else 0
+            for multiple in self._binary_split(bound):
+                step = self._knapsack_add(dp, multiple * height_units, multiple * value)
+                if step is not None:
+                    dp, taken = step
+                    copies.append((index, multiple, taken))
+        
+        chosen = []
+        capacity = width_units
+        for index, multiple, taken in reversed(copies):
+            if taken[capacity]:
+                chosen.append((index, multiple))
+                capacity -= multiple * strips[index][0]
+        chosen.sort()
+        return chosen
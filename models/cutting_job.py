@@ -1,20 +1,378 @@
 import base64
-import tempfile
-import os
-from datetime import datetime
+import cProfile
+import io
+import json
+import logging
+import marshal
+import pstats
+import time
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from functools import partial
 
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
+from odoo.fields import Command
 
-import numpy as np
-import matplotlib
-matplotlib.use('Agg')  # Use Agg backend to avoid GUI
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-from matplotlib.backends.backend_pdf import PdfPages
 # Import the EnhancedCuttingStockOptimizer from paste5
-from odoo.addons.cutlist.models.paste5 import Panel, StockSheet, OptimizerOptions, EnhancedCuttingStockOptimizer
-        
+from odoo.addons.cutlist.models.paste5 import (
+    Panel, StockSheet, OptimizerOptions, OptimizerStats, EnhancedCuttingStockOptimizer, CuttingPattern,
+)
+from odoo.addons.cutlist.models.bounds import continuous_bound
+from odoo.addons.cutlist.models.column_generation import ColumnGenerationOptimizer
+from odoo.addons.cutlist.models.guillotine import cut_sequence
+from odoo.addons.cutlist.models.pattern_renderer import render_pdf, render_svg
+from odoo.addons.cutlist.models.process_pool import process_pool
+from odoo.addons.cutlist.models.remnant import find_offcuts
+from odoo.addons.cutlist.models.stock_selection import choose_stock, place_on_remnants, stock_reference
+from odoo.addons.cutlist.models.warm_start import panel_key, plan_key, reoptimize
+
+_logger = logging.getLogger(__name__)
+
+# Job states in which the inputs of the optimization can no longer be edited
+LOCKED_STATES = {state: [('readonly', True)] for state in ('queued', 'running', 'done', 'cancelled')}
+
+# Job states from which a batch optimization can start
+BATCH_STATES = ('draft', 'ready', 'optimized')
+
+
+def optimize_job_data(panels, stock_sheet, options):
+    """
+    Optimize the prepared data of a job (see CuttingJob._prepare_optimization_data) without
+    touching the database, so that batches can run it in worker processes. Returns the
+    result keys of CuttingJob._run_maxrects_optimizer that are cached, plus the stats of
+    the run as OptimizerStats, the placement trace and time_limited, whether a time limit
+    stopped a search or solver (such results are not cached).
+    
+    When options['consider_material'] is set, the panels are split by material with
+    partition_by_material and every part is solved on its own stock, the parts side by side
+    when parallel workers are allowed. The results are merged back into one.
+    """
+    if not options['consider_material']:
+        return _optimize_partition(panels, stock_sheet, options)
+    partitions, orphans = partition_by_material(panels, stock_sheet)
+    if len(partitions) == 1 and not orphans:
+        return _optimize_partition(panels, partitions[0][0], options)
+    
+    start = time.perf_counter()
+    payloads = [([panels[index] for index in indexes], partition_stock, options)
+                for partition_stock, indexes in partitions]
+    outcomes = optimize_job_batch(payloads, min(int(options['parallel_workers']), len(payloads)),
+                                  _optimize_partition)
+    elapsed = time.perf_counter() - start
+    
+    parts = []
+    for (_partition_stock, indexes), (partition, error) in zip(partitions, outcomes):
+        if error is not None:
+            raise error
+        parts.append((indexes, partition))
+    result = _merge_results(parts, sum(int(panels[index]['quantity']) for index in orphans))
+    result['stats'].add('material partitions', elapsed, len(partitions))
+    return result
+
+
+def _merge_results(parts, unplaced_panels=0):
+    """
+    Merge the results of optimize_job_data for parts of the panels of a job ([(job panel
+    indexes, result)]) into one, with unplaced_panels more panels left unplaced.
+    """
+    stats = OptimizerStats()
+    result = {
+        'waste_area': 0.0,
+        'total_panels': 0,
+        'sheet_count': 0,
+        'unplaced_panels': unplaced_panels,
+        'placements': [],
+        'sheet_sizes': [],
+        'sheet_costs': [],
+        'sheet_stock': [],
+        'stats': stats,
+        'trace': None,
+        'time_limited': False,
+    }
+    sheet_area = 0.0
+    for indexes, part in parts:
+        for key in ('waste_area', 'total_panels', 'sheet_count', 'unplaced_panels'):
+            result[key] += part[key]
+        # Panel indexes of the part back to those of the job
+        result['placements'] += [[[indexes[placement[0]]] + list(placement[1:]) for placement in sheet]
+                                 for sheet in part['placements']]
+        for key in ('sheet_sizes', 'sheet_costs', 'sheet_stock'):
+            result[key] += part[key]
+        sheet_area += sum(length * width for length, width, _label in part['sheet_sizes'])
+        stats.merge(part['stats'])
+        if part['trace'] is not None:
+            result['trace'] = (result['trace'] or []) + part['trace']
+        result['time_limited'] = result['time_limited'] or part.get('time_limited', False)
+    result['usage_ratio'] = (sheet_area - result['waste_area']) / sheet_area if sheet_area else 0.0
+    return result
+
+
+def partition_by_material(panels, stock_sheet):
+    """
+    Split the prepared panels of a job by the stock they can be cut from. Panels without a
+    material or of the material of the job's stock sheet go on that sheet, the others on
+    the sheet found for their material in stock_sheet['material_stock'] (see
+    CuttingJob._material_stock). A material without stock sheet falls back on the job's
+    sheet when it has no material itself. Returns the [(stock sheet, panel indexes)] parts
+    in order of first panel, and the indexes of the panels no stock can hold.
+    """
+    material_stock = stock_sheet.get('material_stock') or {}
+    own_material = str(stock_sheet['material'])
+    parts = {}
+    orphans = []
+    for index, panel in enumerate(panels):
+        material = str(panel['material'])
+        if material in ('default', own_material):
+            key = None
+        elif material in material_stock:
+            key = material
+        elif own_material == 'default':
+            key = None
+        else:
+            orphans.append(index)
+            continue
+        if key not in parts:
+            parts[key] = (stock_sheet if key is None else material_stock[key], [])
+        parts[key][1].append(index)
+    return list(parts.values()), orphans
+
+
+def panel_materials(panels, stock_sheet, options):
+    """
+    Material (str) of the stock every prepared panel is cut from, see partition_by_material,
+    None for the panels no stock can hold.
+    """
+    if not options['consider_material']:
+        return [str(stock_sheet['material'])] * len(panels)
+    materials = [None] * len(panels)
+    partitions, _orphans = partition_by_material(panels, stock_sheet)
+    for partition_stock, indexes in partitions:
+        for index in indexes:
+            materials[index] = str(partition_stock['material'])
+    return materials
+
+
+def sheet_lower_bound(panels, stock_sheet, options):
+    """
+    Lower bound on the sheets of any plan of the prepared data, see bounds.py: the sum over
+    the material partitions of the bound on the sizes each may be cut from, its stock sheet
+    or the alternatives of the cheapest stock mix, and its remnants.
+    """
+    kerf = float(options['kerf_thickness'])
+    if options['consider_material']:
+        partitions, _orphans = partition_by_material(panels, stock_sheet)
+    else:
+        partitions = [(stock_sheet, range(len(panels)))]
+    bound = 0
+    for partition_stock, indexes in partitions:
+        sheets = [partition_stock]
+        if options['stock_selection'] == 'cost' and len(partition_stock.get('alternatives') or []) > 1:
+            sheets = partition_stock['alternatives']
+        sizes = sorted({(float(sheet['length']), float(sheet['width']))
+                        for sheet in sheets + (partition_stock.get('remnants') or []) if int(sheet['quantity']) > 0})
+        if not sizes:
+            continue
+        items = [(float(panels[index]['length']) + kerf, float(panels[index]['width']) + kerf,
+                  int(panels[index]['quantity']),
+                  not options['consider_grain'] or (panels[index]['grain_direction'] or 'none') == 'none')
+                 for index in indexes]
+        bound += continuous_bound(items, sizes)
+    return bound
+
+
+def optimality_gap(sheet_count, sheet_bound, unplaced_panels):
+    """Percentage of the sheets of a plan above the lower bound, 0 when it cannot be told."""
+    if not sheet_bound or not sheet_count or unplaced_panels:
+        return 0.0
+    return max(sheet_count - sheet_bound, 0) / sheet_count * 100
+
+
+def _optimize_partition(panels, stock_sheet, options):
+    """
+    Optimize panels that are all cut from the stock of stock_sheet, see optimize_job_data:
+    first from the remnants in stock_sheet['remnants'], then from the stock sheets.
+    """
+    remnants = stock_sheet.get('remnants') or []
+    if not remnants or options['use_single_sheet']:
+        return _optimize_stock(panels, stock_sheet, options)
+    
+    # Remnants are filled without the randomized search, as many as there are
+    screening = dict(options, search_time_limit=0.0, search_max_iterations=0)
+    remnant_result, left = place_on_remnants(panels, remnants, partial(_optimize_sheet, options=screening),
+                                             float(options['kerf_thickness']), bool(options['consider_grain']))
+    if not remnant_result['sheet_count']:
+        return _optimize_stock(panels, stock_sheet, options)
+    parts = [(range(len(panels)), remnant_result)]
+    if left:
+        indexes = sorted(left)
+        parts.append((indexes, _optimize_stock([dict(panels[index], quantity=left[index]) for index in indexes],
+                                               stock_sheet, options)))
+    return _merge_results(parts)
+
+
+def _optimize_stock(panels, stock_sheet, options):
+    """
+    Optimize panels on the stock sheet, or on the cheapest mix of the sheets in
+    stock_sheet['alternatives'] when options['stock_selection'] asks for it.
+    """
+    alternatives = stock_sheet.get('alternatives') or []
+    if options['stock_selection'] != 'cost' or options['use_single_sheet'] or len(alternatives) < 2:
+        return _optimize_sheet(panels, stock_sheet, options)
+    
+    # Sizes are compared without the randomized search, which then only refines the chosen ones
+    screening = dict(options, search_time_limit=0.0, search_max_iterations=0)
+    polish = None
+    if options['search_time_limit'] > 0 or options['search_max_iterations'] > 0:
+        polish = partial(_optimize_sheet, options=options)
+    return choose_stock(panels, alternatives, partial(_optimize_sheet, options=screening), polish,
+                        float(options['kerf_thickness']), bool(options['consider_grain']))
+
+
+def _optimize_sheet(panels, stock_sheet, options):
+    """Optimize panels on sheets of the size of stock_sheet, see optimize_job_data."""
+    stats = OptimizerStats()
+    total_panel_count = sum(p['quantity'] for p in panels)
+    
+    start = time.perf_counter()
+    # Convert input data to the optimizer's expected format
+    optimizer_panels = []
+    
+    # First approach: Create one panel object per instance
+    for panel_data in panels:
+        panel_obj = Panel(
+            length=float(panel_data['length']),  # Ensure these are floats
+            width=float(panel_data['width']),
+            quantity=int(panel_data['quantity']),  # Pass actual quantity
+            label=panel_data['label'],
+            material=panel_data['material'],
+            grain_direction=panel_data['grain_direction']
+        )
+        optimizer_panels.append(panel_obj)
+    
+    optimizer_stock_sheet = StockSheet(
+        length=float(stock_sheet['length']),  # Ensure these are floats
+        width=float(stock_sheet['width']),
+        quantity=int(stock_sheet['quantity']),
+        material=stock_sheet['material'],
+        label=stock_sheet['label'],
+        grain_direction=stock_sheet['grain_direction']
+    )
+    
+    optimizer_options = OptimizerOptions(
+        kerf_thickness=float(options['kerf_thickness']),  # Ensure this is a float
+        labels_on_panels=bool(options['labels_on_panels']),
+        use_single_sheet=bool(options['use_single_sheet']),
+        consider_material=bool(options['consider_material']),
+        edge_banding=bool(options['edge_banding']),
+        consider_grain=bool(options['consider_grain']),
+        vectorized=bool(options['vectorized_scoring']),
+        parallel_workers=int(options['parallel_workers']),
+        search_time_limit=float(options['search_time_limit']),
+        search_max_iterations=int(options['search_max_iterations']),
+        search_seed=int(options['search_seed']),
+        trace=bool(options['debug_trace']),
+        optimization_mode=options['optimization_mode'],
+        solver_time_limit=float(options['solver_time_limit']),
+        solver_mip_gap=float(options['solver_mip_gap']),
+        placement_heuristic=options['placement_heuristic'],
+        packing_engine=options['packing_engine'],
+        guillotine_split=options['guillotine_split'],
+        block_packing=bool(options['block_packing'])
+    )
+    
+    # Create and run the enhanced optimizer, or the exact one which improves on its result
+    if optimizer_options.optimization_mode == 'exact':
+        optimizer_class = ColumnGenerationOptimizer
+    else:
+        optimizer_class = EnhancedCuttingStockOptimizer
+    optimizer = optimizer_class(optimizer_panels, optimizer_stock_sheet, optimizer_options)
+    stats.add('data conversion', time.perf_counter() - start)
+    
+    start = time.perf_counter()
+    if optimizer_options.use_single_sheet:
+        patterns = [optimizer.optimize()]
+        unplaced_panels = total_panel_count - len(patterns[0])
+    else:
+        # Open as many sheets as needed, up to the available quantity
+        patterns = optimizer.optimize_multi()
+        unplaced_panels = sum(count for _panel_type, count in optimizer.unplaced_panels)
+    stats.add('optimization', time.perf_counter() - start)
+    stats.merge(optimizer.stats)
+    placed_panels = sum(len(pattern) for pattern in patterns)
+    
+    sheet_area = sum(pattern.stock_sheet.area() for pattern in patterns)
+    waste_area = sum(pattern.waste_area for pattern in patterns)
+    used_area = sheet_area - waste_area
+    usage_ratio = used_area / sheet_area if sheet_area else 0.0
+    
+    _logger.debug("Sheet area %.2f, used area %.2f, waste area %.2f, usage ratio %.4f",
+                  sheet_area, used_area, waste_area, usage_ratio)
+    
+    # Panel indexes refer to the order of the panels argument. Patterns share the optimizer's
+    # panel list and need no mapping; the others are mapped by identity, so that two equal job
+    # lines are still two panel types
+    panel_index = optimizer.panel_index
+    placements = []
+    for pattern in patterns:
+        panel_types = pattern.panel_types
+        if pattern.panels is not optimizer_panels:
+            type_map = [panel_index[id(panel)] for panel in pattern.panels]
+            panel_types = [type_map[panel_type] for panel_type in panel_types]
+        placements.append([[panel_type, x, y, bool(rotated)] for panel_type, x, y, rotated
+                           in zip(panel_types, pattern.xs, pattern.ys, pattern.rotated)])
+    
+    # Return clean, precise results
+    return {
+        'usage_ratio': usage_ratio,  # This is a proportion (0-1), not a percentage
+        'waste_area': float(waste_area),
+        'total_panels': placed_panels,
+        'sheet_count': len(patterns),
+        'unplaced_panels': unplaced_panels,
+        'placements': placements,
+        'sheet_sizes': [[optimizer_stock_sheet.length, optimizer_stock_sheet.width, optimizer_stock_sheet.label]
+                        for _pattern in patterns],
+        'sheet_costs': [float(stock_sheet.get('cost') or 0.0)] * len(patterns),
+        'sheet_stock': [stock_reference(stock_sheet) for _pattern in patterns],
+        'stats': stats,
+        'trace': optimizer.trace,
+        'time_limited': optimizer.time_limited,
+    }
+
+
+def optimize_job_batch(payloads, workers, optimize=optimize_job_data):
+    """
+    Run optimize (optimize_job_data by default) on every (panels, stock_sheet, options)
+    payload, in a process pool when more than one worker is allowed. Returns one (result,
+    exception) pair per payload in order, so that a failing job does not stop the others.
+    """
+    if workers > 1:
+        try:
+            # Not forked, see process_pool.py: the payloads and results are plain data
+            with process_pool(workers) as executor:
+                # Payloads already run side by side, their strategies do not need pools of their own
+                futures = [executor.submit(optimize, panels, stock_sheet, dict(options, parallel_workers=0))
+                           for panels, stock_sheet, options in payloads]
+                outcomes = []
+                for future in futures:
+                    try:
+                        outcomes.append((future.result(), None))
+                    except BrokenProcessPool:
+                        raise
+                    except Exception as e:
+                        outcomes.append((None, e))
+                return outcomes
+        except (OSError, BrokenProcessPool) as e:
+            _logger.warning("Process pool unavailable (%s), optimizing the batch sequentially", e)
+    
+    outcomes = []
+    for panels, stock_sheet, options in payloads:
+        try:
+            outcomes.append((optimize(panels, stock_sheet, options), None))
+        except Exception as e:
+            outcomes.append((None, e))
+    return outcomes
+
 
 class CuttingJob(models.Model):
     _name = 'cutting.job'
@@ -28,25 +386,64 @@ class CuttingJob(models.Model):
     state = fields.Selection([
         ('draft', 'Draft'),
         ('ready', 'Ready'),
+        ('queued', 'Queued'),
+        ('running', 'Running'),
         ('optimized', 'Optimized'),
         ('done', 'Done'),
         ('cancelled', 'Cancelled'),
     ], string='Status', default='draft', tracking=True)
     
     stock_sheet_id = fields.Many2one('cutting.stock.sheet', string='Stock Sheet', required=True, 
-                                    tracking=True, states={'done': [('readonly', True)], 'cancelled': [('readonly', True)]})
+                                    tracking=True, states=LOCKED_STATES)
     options_id = fields.Many2one('cutting.optimizer.options', string='Optimization Options', required=True, 
-                               tracking=True, states={'done': [('readonly', True)], 'cancelled': [('readonly', True)]})
+                               tracking=True, states=LOCKED_STATES)
     
     line_ids = fields.One2many('cutting.job.line', 'cutting_job_id', string='Panels', 
-                             states={'done': [('readonly', True)], 'cancelled': [('readonly', True)]})
+                             states=LOCKED_STATES)
+    
+    # Background execution
+    queued_date = fields.Datetime('Queued On', readonly=True, copy=False)
+    optimization_start = fields.Datetime('Optimization Started', readonly=True, copy=False)
     
     # Results
     optimization_date = fields.Datetime('Optimization Date', readonly=True, copy=False)
     sheet_usage_ratio = fields.Float('Sheet Usage Ratio', readonly=True, help="Percentage of stock sheet area used by panels", copy=False)
     waste_area = fields.Float('Waste Area', readonly=True, help="Area wasted in the cutting pattern", copy=False)
     total_panels = fields.Integer('Total Panels Placed', readonly=True, copy=False)
+    sheet_count = fields.Integer('Sheets Used', readonly=True, copy=False)
+    from_cache = fields.Boolean('Reused Cached Result', readonly=True, copy=False,
+                                help="The result was taken from an earlier optimization with identical inputs")
+    sheet_lower_bound = fields.Integer('Sheets Lower Bound', readonly=True, copy=False,
+                                       help="No cutting plan can cut all the panels from fewer sheets")
+    optimality_gap = fields.Float('Optimality Gap (%)', readonly=True, copy=False,
+                                  help="Share of the sheets of the plan above the lower bound, the most that "
+                                       "a better plan could save. 0 means no plan uses fewer sheets; a large "
+                                       "gap means a longer search may pay off. Only when every panel is placed "
+                                       "on several sheets")
+    warm_start = fields.Boolean('Started From Previous Plan', readonly=True, copy=False,
+                                help="The result was built from the previous cutting plan of the job, changed "
+                                     "only where the panels changed")
+    unplaced_panels = fields.Integer('Panels Not Placed', readonly=True, copy=False,
+                                     help="Panels that did not fit on the available stock sheets")
+    stock_cost = fields.Float('Stock Cost', readonly=True, copy=False,
+                              help="Total cost of the stock sheets the cutting plan uses")
     optimization_time = fields.Float('Optimization Time (s)', readonly=True, help="Time taken to run the optimization in seconds", copy=False)
+    stats_ids = fields.One2many('cutting.job.stats', 'cutting_job_id', string='Timings', readonly=True, copy=False)
+    
+    nesting_id = fields.Many2one('cutting.nesting', string='Nested With', readonly=True, copy=False, index=True,
+                                 help="The last optimization packed this job together with other jobs, "
+                                      "sharing their sheets")
+    remnant_ids = fields.One2many('cutting.remnant', 'reserved_job_id', string='Remnants Used', readonly=True,
+                                  copy=False, help="Remnants of earlier jobs the cutting plan cuts panels from")
+    
+    # Layout of the last optimization, the PDF is rendered from it on demand
+    placement_data = fields.Text('Placements', readonly=True, copy=False,
+                                 help="JSON encoded panels, stock sheet and placements of the cutting plan")
+    result_fingerprint = fields.Char('Result Fingerprint', readonly=True, copy=False)
+    
+    pattern_preview = fields.Html('Cutting Pattern', compute='_compute_pattern_preview', sanitize=False)
+    cut_sequence = fields.Html('Cut Sequence', compute='_compute_cut_sequence', sanitize=False,
+                               help="Saw cuts of each sheet in the order to make them")
     
     # PDF Report
     pattern_pdf = fields.Binary('Cutting Pattern PDF', readonly=True, attachment=True, copy=False)
@@ -61,6 +458,49 @@ class CuttingJob(models.Model):
                 vals['name'] = self.env['ir.sequence'].next_by_code('cutting.job') or _('New Cutting Job')
         return super(CuttingJob, self).create(vals_list)
     
+    @api.depends('placement_data')
+    def _compute_pattern_preview(self):
+        for job in self:
+            if not job.placement_data:
+                job.pattern_preview = False
+                continue
+            patterns, options, _renderer = job._layout_patterns()
+            job.pattern_preview = ''.join(
+                f'<div class="mb-3">{render_svg(pattern, options, sheet_number, len(patterns))}</div>'
+                for sheet_number, pattern in enumerate(patterns, start=1))
+    
+    @api.depends('placement_data')
+    def _compute_cut_sequence(self):
+        for job in self:
+            if not job.placement_data:
+                job.cut_sequence = False
+                continue
+            patterns, options, _renderer = job._layout_patterns()
+            directions = {'horizontal': _("Horizontal at y"), 'vertical': _("Vertical at x")}
+            header = ''.join(f'<th>{title}</th>' for title in ('#', _("Stage"), _("Cut"), _("From"), _("To")))
+            html = []
+            for sheet_number, pattern in enumerate(patterns, start=1):
+                html.append(f'<h5>{_("Sheet %s of %s", sheet_number, len(patterns))}</h5>')
+                cuts = cut_sequence(pattern, options.kerf_thickness)
+                if cuts is None:
+                    message = _("This layout cannot be cut with edge-to-edge cuts only, "
+                                "use the guillotine packing engine to get a cut sequence.")
+                    html.append(f'<p class="text-muted">{message}</p>')
+                    continue
+                rows = ''.join(
+                    f'<tr><td>{step}</td><td>{stage}</td><td>{directions[direction]} = {position:g}</td>'
+                    f'<td>{start:g}</td><td>{end:g}</td></tr>'
+                    for step, (direction, position, start, end, stage) in enumerate(cuts, start=1))
+                html.append(f'<table class="table table-sm mb-3"><thead><tr>{header}</tr></thead>'
+                            f'<tbody>{rows}</tbody></table>')
+            job.cut_sequence = ''.join(html)
+    
+    def write(self, vals):
+        # A PDF rendered from previous placements is stale once they change
+        if 'placement_data' in vals and 'pattern_pdf' not in vals:
+            vals = dict(vals, pattern_pdf=False)
+        return super(CuttingJob, self).write(vals)
+    
     def action_ready(self):
         for job in self:
             if not job.line_ids:
@@ -69,16 +509,69 @@ class CuttingJob(models.Model):
         return True
     
     def action_cancel(self):
+        if any(job.state == 'running' for job in self):
+            raise UserError(_("A running optimization cannot be cancelled, wait for it to finish."))
         self.write({'state': 'cancelled'})
+        self._release_remnants()
         return True
     
     def action_reset_to_draft(self):
+        if any(job.state == 'running' for job in self):
+            raise UserError(_("A running optimization cannot be reset, wait for it to finish."))
         self.write({'state': 'draft'})
+        self._release_remnants()
         return True
     
     def action_done(self):
         self.write({'state': 'done'})
+        self._consume_remnants()
         return True
+    
+    def _release_remnants(self):
+        """Give the remnants the jobs planned to cut and did not cut back to the other jobs."""
+        self.remnant_ids.filtered(lambda remnant: remnant.state == 'available').write({'reserved_job_id': False})
+    
+    def _consume_remnants(self):
+        """
+        Mark the remnants the plans of the jobs cut from as used, and record the offcuts of
+        their sheets as new remnants when the options of the job keep them.
+        """
+        for job in self:
+            job.remnant_ids.filtered(lambda remnant: remnant.state == 'available').write({
+                'state': 'used',
+                'consumed_job_id': job.id,
+            })
+        values = []
+        for job in self:
+            # The sheets of a nesting are shared, no job can tell which of their offcuts are left
+            if job.options_id.keep_remnants and job.placement_data and not job.nesting_id:
+                values += job._offcut_values()
+        if values:
+            self.env['cutting.remnant'].create(values)
+    
+    def _offcut_values(self):
+        """Values of the remnants for the offcuts of the job's sheets, see find_offcuts."""
+        self.ensure_one()
+        layout = json.loads(self.placement_data)
+        kerf = layout['kerf_thickness']
+        sheet_sizes = layout.get('sheet_sizes') or [layout['stock_sheet']] * len(layout['sheets'])
+        own_stock = [self.stock_sheet_id.material_id.id or 'default', self.stock_sheet_id.grain_direction, False]
+        sheet_stock = layout.get('sheet_stock') or [own_stock] * len(layout['sheets'])
+        
+        Remnant = self.env['cutting.remnant']
+        values = []
+        for number, (placements, (length, width, _label), (material, grain_direction, _remnant_id)) in enumerate(
+                zip(layout['sheets'], sheet_sizes, sheet_stock), start=1):
+            used = []
+            for panel_index, x, y, rotated in placements:
+                panel_length, panel_width, _panel_label = layout['panels'][panel_index]
+                if rotated:
+                    panel_length, panel_width = panel_width, panel_length
+                used.append((x, y, panel_length + kerf, panel_width + kerf))
+            for offcut in find_offcuts(length, width, used, self.options_id.remnant_min_length,
+                                       self.options_id.remnant_min_width):
+                values.append(Remnant._offcut_values(self, material, grain_direction, offcut, number))
+        return values
         
     def _run_maxrects_optimizer(self, panels, stock_sheet, options):
         """
@@ -88,89 +581,107 @@ class CuttingJob(models.Model):
         - usage_ratio: ratio of used area to total area
         - waste_area: area wasted
         - total_panels: number of panels placed
-        - pdf_data: base64-encoded PDF data
+        - sheet_count: number of stock sheets used
+        - unplaced_panels: number of panels that could not be placed
+        - placements: per sheet, [panel index, x, y, rotated] for each placed panel
+        - fingerprint: cache key of the inputs
+        - from_cache: whether the result was reused from an identical earlier run
+        - warm_start: whether the result was built from the job's previous plan
+        - pdf_data: base64-encoded PDF data, only when a cached PDF was found
+        - stats: (phase, calls, seconds) rows for the time spent in each phase
+        - trace: placement events of every strategy, only when options['debug_trace'] is set
+        
+        The PDF is not rendered here, see _render_pattern_pdf.
         """
-       
-        # Debug the input data
-        print(f"Input data: Sheet {stock_sheet['length']}x{stock_sheet['width']}")
         total_panel_count = sum(p['quantity'] for p in panels)
-        print(f"Panels to place: {total_panel_count}")
-        
-        # Convert input data to the optimizer's expected format
-        optimizer_panels = []
-        
-        # First approach: Create one panel object per instance
-        for panel_data in panels:
-            panel_obj = Panel(
-                length=float(panel_data['length']),  # Ensure these are floats
-                width=float(panel_data['width']),
-                quantity=int(panel_data['quantity']),  # Pass actual quantity
-                label=panel_data['label'],
-                material=panel_data['material'],
-                grain_direction=panel_data['grain_direction']
-            )
-            optimizer_panels.append(panel_obj)
-        
-        optimizer_stock_sheet = StockSheet(
-            length=float(stock_sheet['length']),  # Ensure these are floats
-            width=float(stock_sheet['width']),
-            quantity=int(stock_sheet['quantity']),
-            material=stock_sheet['material'],
-            label=stock_sheet['label'],
-            grain_direction=stock_sheet['grain_direction']
-        )
-        
-        optimizer_options = OptimizerOptions(
-            kerf_thickness=float(options['kerf_thickness']),  # Ensure this is a float
-            labels_on_panels=bool(options['labels_on_panels']),
-            use_single_sheet=bool(options['use_single_sheet']),
-            consider_material=bool(options['consider_material']),
-            edge_banding=bool(options['edge_banding']),
-            consider_grain=bool(options['consider_grain'])
-        )
-        
-        # Create and run the enhanced optimizer
-        print("Creating optimizer with converted data...")
-        optimizer = EnhancedCuttingStockOptimizer(optimizer_panels, optimizer_stock_sheet, optimizer_options)
-        
-        print("Running optimization...")
-        best_pattern = optimizer.optimize()
+        _logger.debug("Placing %d panels on %sx%s sheets", total_panel_count,
+                      stock_sheet['length'], stock_sheet['width'])
         
-        # Debug the results
-        sheet_area = optimizer_stock_sheet.area()
-        waste_area = best_pattern.waste_area
-        used_area = sheet_area - waste_area
-        usage_ratio = used_area / sheet_area
-        
-        print(f"Optimization results:")
-        print(f"Sheet area: {sheet_area:.2f}")
-        print(f"Used area: {used_area:.2f}")
-        print(f"Waste area: {waste_area:.2f}")
-        print(f"Usage ratio: {usage_ratio:.4f} ({usage_ratio * 100:.2f}%)")
-        print(f"Panels placed: {len(best_pattern.placed_panels)}")
-        
-        # Generate the PDF visualization
-        pdf_data = self._generate_cutting_pattern_pdf_enhanced(best_pattern, optimizer_stock_sheet, optimizer_options)
-        
-        # Return clean, precise results
-        return {
-            'usage_ratio': usage_ratio,  # This is a proportion (0-1), not a percentage
-            'waste_area': float(waste_area),
-            'total_panels': len(best_pattern.placed_panels),
-            'pdf_data': pdf_data,
-        }
-
-    def action_run_optimization(self):
-        """Modified optimization action with better error handling and debugging."""
+        stats = OptimizerStats()
+        fingerprint, order, cached = self._lookup_result(panels, stock_sheet, options, stats)
+        if cached is not None:
+            return cached
+        warm = self._warm_start_result(panels, stock_sheet, options, stats)
+        if warm is not None:
+            return warm
+        return self._store_result(fingerprint, order, optimize_job_data(panels, stock_sheet, options), stats)
+    
+    def _warm_start_result(self, panels, stock_sheet, options, stats):
+        """
+        The result of _run_maxrects_optimizer optimized from the job's previous plan (see
+        reoptimize), stats holding the phases timed before, or None when there is no such plan
+        or it is of no use.
+        """
+        previous = self._previous_plan(options)
+        if previous is None:
+            return None
+        result = reoptimize(panels, stock_sheet, options, previous, panel_materials(panels, stock_sheet, options),
+                            optimize_job_data)
+        if result is None:
+            return None
+        # The result depends on the previous plan, not only on the inputs, so it is not cached
+        stats.merge(result.pop('stats'))
+        return dict(result, fingerprint=False, from_cache=False, warm_start=True, stats=stats.as_rows())
+    
+    def _previous_plan(self, options):
+        """
+        The plan of the job's last optimization, as reoptimize takes it, when the job can be
+        optimized again from it: a single job whose last plan is its own (not a nesting),
+        made with the same shaping options, on several sheets and not in exact mode.
+        """
+        if len(self) != 1 or not options.get('warm_start') or not self.placement_data or self.nesting_id:
+            return None
+        if options['use_single_sheet'] or options['optimization_mode'] == 'exact':
+            return None
+        layout = json.loads(self.placement_data)
+        if layout.get('plan_key') != plan_key(options):
+            return None
+        return {key: layout[key] for key in ('panel_keys', 'sheets', 'sheet_sizes', 'sheet_costs', 'sheet_stock')}
+    
+    @api.model
+    def _lookup_result(self, panels, stock_sheet, options, stats):
+        """
+        Look the inputs up in the result cache, timing it in stats. Returns the fingerprint,
+        the panel order and, on a hit, the finished result of _run_maxrects_optimizer.
+        """
+        # Identical inputs give identical results, so reuse a previous run when there is one.
+        # A profiled or traced run has to optimize for real.
+        start = time.perf_counter()
+        cache = self.env['cutting.optimization.cache']
+        fingerprint, order = cache._fingerprint(panels, stock_sheet, options)
+        if options.get('profile_optimization') or options.get('debug_trace'):
+            cached = None
+        else:
+            cached = cache._lookup(fingerprint, order)
+        stats.add('cache lookup', time.perf_counter() - start)
+        if cached is None:
+            return fingerprint, order, None
+        _logger.debug("Reusing cached result %s", fingerprint[:12])
+        return fingerprint, order, dict(cached, fingerprint=fingerprint, from_cache=True, stats=stats.as_rows())
+    
+    @api.model
+    def _store_result(self, fingerprint, order, result, stats):
+        """
+        Cache a result of optimize_job_data and complete it with the keys of
+        _run_maxrects_optimizer, stats holding the phases timed before the optimization.
+        Results cut short by a time limit depend on the machine and its load, not only on the
+        inputs: they are not cached.
+        """
+        stats.merge(result.pop('stats'))
+        trace = result.pop('trace')
+        if result.pop('time_limited', False):
+            _logger.debug("Not caching result %s, a time limit stopped the search", fingerprint[:12])
+            fingerprint = False
+        else:
+            self.env['cutting.optimization.cache']._store(fingerprint, order, result)
+        return dict(result, fingerprint=fingerprint, from_cache=False, stats=stats.as_rows(), trace=trace)
+    
+    def _prepare_optimization_data(self, excluded_remnant_ids=None):
+        """
+        Convert the job's panels, stock sheet and options to the format needed by the optimizer.
+        excluded_remnant_ids, see _add_remnants.
+        """
         self.ensure_one()
-        
-        if not self.line_ids:
-            raise UserError(_("You must add at least one panel to the cutting job."))
-        
-        # Run optimization
-        start_time = datetime.now()
-        
-        # Convert panels and stock sheet to the format needed by the optimizer
         panels = []
         for line in self.line_ids:
             panels.append({
@@ -183,14 +694,13 @@ class CuttingJob(models.Model):
                 'grain_direction': line.panel_id.grain_direction,
             })
         
-        stock_sheet = {
-            'length': self.stock_sheet_id.length,
-            'width': self.stock_sheet_id.width,
-            'quantity': self.stock_sheet_id.available_quantity,
-            'material': self.stock_sheet_id.material_id.id if self.stock_sheet_id.material_id else 'default',
-            'label': self.stock_sheet_id.name,
-            'grain_direction': self.stock_sheet_id.grain_direction,
-        }
+        stock_sheet = self._stock_sheet_data(self.stock_sheet_id)
+        if self.options_id.consider_material:
+            stock_sheet['material_stock'] = self._material_stock(panels, stock_sheet)
+        if self.options_id.stock_selection == 'cost':
+            self._add_stock_alternatives([stock_sheet] + list(stock_sheet.get('material_stock', {}).values()))
+        if self.options_id.use_remnants:
+            self._add_remnants(panels, stock_sheet, excluded_remnant_ids)
         
         options = {
             'kerf_thickness': self.options_id.kerf_thickness,
@@ -199,143 +709,703 @@ class CuttingJob(models.Model):
             'consider_material': self.options_id.consider_material,
             'edge_banding': self.options_id.edge_banding,
             'consider_grain': self.options_id.consider_grain,
+            'vectorized_scoring': self.options_id.vectorized_scoring,
+            'parallel_workers': self.options_id.parallel_workers,
+            'search_time_limit': self.options_id.search_time_limit,
+            'search_max_iterations': self.options_id.search_max_iterations,
+            'search_seed': self.options_id.search_seed,
+            'optimization_mode': self.options_id.optimization_mode,
+            'solver_time_limit': self.options_id.solver_time_limit,
+            'solver_mip_gap': self.options_id.solver_mip_gap,
+            'placement_heuristic': self.options_id.placement_heuristic,
+            'packing_engine': self.options_id.packing_engine,
+            'guillotine_split': self.options_id.guillotine_split,
+            'block_packing': self.options_id.block_packing,
+            'stock_selection': self.options_id.stock_selection,
+            'renderer': self.options_id.renderer,
+            'profile_optimization': self.options_id.profile_optimization,
+            'debug_trace': self.options_id.debug_trace,
+            'warm_start': self.options_id.warm_start,
+        }
+        return panels, stock_sheet, options
+    
+    @api.model
+    def _stock_sheet_data(self, sheet):
+        """Convert a stock sheet to the format needed by the optimizer."""
+        return {
+            'length': sheet.length,
+            'width': sheet.width,
+            'quantity': sheet.available_quantity,
+            'material': sheet.material_id.id if sheet.material_id else 'default',
+            'label': sheet.name,
+            'grain_direction': sheet.grain_direction,
+            'cost': sheet.cost,
+        }
+    
+    @api.model
+    def _material_stock(self, panels, stock_sheet):
+        """
+        Stock sheets for the panel materials other than that of the job's stock sheet, as
+        {material id (str): stock sheet data}: the first active sheet of each material in
+        stock, see partition_by_material.
+        """
+        material_ids = {panel['material'] for panel in panels} - {'default', stock_sheet['material']}
+        if not material_ids:
+            return {}
+        material_stock = {}
+        sheets = self.env['cutting.stock.sheet'].search([
+            ('material_id', 'in', list(material_ids)),
+            ('available_quantity', '>', 0),
+        ])
+        for sheet in sheets:
+            material = str(sheet.material_id.id)
+            if material not in material_stock:
+                material_stock[material] = self._stock_sheet_data(sheet)
+        return material_stock
+    
+    @api.model
+    def _add_stock_alternatives(self, stock_sheets):
+        """
+        Give every prepared stock sheet the 'alternatives' it can be swapped for: all the
+        active stock sheets of its material with sheets available, itself included, among
+        which choose_stock picks the cheapest mix.
+        """
+        by_material = {}
+        for sheet in self.env['cutting.stock.sheet'].search([('available_quantity', '>', 0)]):
+            material = sheet.material_id.id if sheet.material_id else 'default'
+            by_material.setdefault(str(material), []).append(self._stock_sheet_data(sheet))
+        for stock_sheet in stock_sheets:
+            stock_sheet['alternatives'] = by_material.get(str(stock_sheet['material']), [])
+    
+    def _add_remnants(self, panels, stock_sheet, excluded_remnant_ids=None):
+        """
+        Give every prepared stock sheet of the job the 'remnants' of its material that may host
+        the panels cut from it (see cutting.remnant._candidates). excluded_remnant_ids, a set,
+        holds the remnants already offered to other jobs of a batch and gets the ones offered here.
+        """
+        self.ensure_one()
+        if 'material_stock' in stock_sheet:
+            partitions, _orphans = partition_by_material(panels, stock_sheet)
+        else:
+            partitions = [(stock_sheet, range(len(panels)))]
+        Remnant = self.env['cutting.remnant']
+        for partition_stock, indexes in partitions:
+            remnants = Remnant._candidates(partition_stock['material'], [panels[index] for index in indexes], self,
+                                           excluded_remnant_ids or (), self.options_id.kerf_thickness)
+            partition_stock['remnants'] = [remnant._stock_sheet_data() for remnant in remnants]
+            if excluded_remnant_ids is not None:
+                excluded_remnant_ids.update(remnants.ids)
+    
+    def _optimize(self):
+        """
+        Run the optimization for this job and return the values to write on it.
+        Errors are raised to the caller, which decides how to report them.
+        """
+        self.ensure_one()
+        
+        # Run optimization
+        start_time = datetime.now()
+        
+        # Convert panels and stock sheet to the format needed by the optimizer
+        start = time.perf_counter()
+        panels, stock_sheet, options = self._prepare_optimization_data()
+        preparation_time = time.perf_counter() - start
+        
+        if _logger.isEnabledFor(logging.DEBUG):
+            _logger.debug("Optimizing job %s, panels: %s", self.name, panels)
+        
+        # Call optimizer function with enhanced algorithm
+        if options['profile_optimization']:
+            profiler = cProfile.Profile()
+            result = profiler.runcall(self._run_maxrects_optimizer, panels, stock_sheet, options)
+            self._attach_profile(profiler)
+        else:
+            result = self._run_maxrects_optimizer(panels, stock_sheet, options)
+        
+        end_time = datetime.now()
+        optimization_time = (end_time - start_time).total_seconds()
+        return self._optimization_values(result, panels, stock_sheet, options, preparation_time, optimization_time)
+    
+    def _optimization_values(self, result, panels, stock_sheet, options, preparation_time, optimization_time):
+        """Log a result of _run_maxrects_optimizer, attach its trace and return the values to write on the job."""
+        self.ensure_one()
+        stats = [('data preparation', 1, preparation_time)] + result['stats'] + [('total', 1, optimization_time)]
+        if 'sheet_bound' in result:
+            sheet_bound = result['sheet_bound']
+        elif options['use_single_sheet']:
+            sheet_bound = 0
+        else:
+            start = time.perf_counter()
+            sheet_bound = sheet_lower_bound(panels, stock_sheet, options)
+            stats.insert(-1, ('sheet lower bound', 1, time.perf_counter() - start))
+        
+        _logger.info("Optimized job %s: %d panels on %d sheet(s), %d not placed, %.2f%% usage in %.2fs%s",
+                     self.name, result['total_panels'], result['sheet_count'], result['unplaced_panels'],
+                     result['usage_ratio'] * 100, optimization_time,
+                     " (cached)" if result['from_cache'] else " (warm start)" if result.get('warm_start') else "")
+        if _logger.isEnabledFor(logging.DEBUG):
+            # Placements and the trace can be megabytes, the rest is enough to diagnose a run
+            _logger.debug("Optimization result of job %s: %s", self.name, {
+                key: value for key, value in result.items() if key not in ('placements', 'trace', 'pdf_data')})
+        if result.get('trace') is not None:
+            self._attach_trace(result['trace'])
+        
+        # Job values from the results - ensure all values are of correct type
+        return {
+            'state': 'optimized',
+            'optimization_date': fields.Datetime.now(),
+            'nesting_id': False,
+            'sheet_usage_ratio': float(result.get('usage_ratio', 0) * 100),  # Convert to percentage
+            'waste_area': float(result.get('waste_area', 0)),
+            'total_panels': int(result.get('total_panels', 0)),
+            'sheet_count': int(result.get('sheet_count', 0)),
+            'unplaced_panels': int(result.get('unplaced_panels', 0)),
+            'from_cache': bool(result.get('from_cache')),
+            'sheet_lower_bound': sheet_bound,
+            'optimality_gap': optimality_gap(result['sheet_count'], sheet_bound, result['unplaced_panels']),
+            'warm_start': bool(result.get('warm_start')),
+            'optimization_time': float(optimization_time),
+            'stats_ids': [Command.clear()] + [
+                Command.create({'sequence': sequence, 'phase': phase, 'calls': calls, 'seconds': seconds})
+                for sequence, (phase, calls, seconds) in enumerate(stats)
+            ],
+            'stock_cost': float(sum(result.get('sheet_costs') or [])),
+            'remnant_ids': [Command.set(sorted({remnant_id for _material, _grain, remnant_id
+                                                in result.get('sheet_stock') or [] if remnant_id}))],
+            'placement_data': self._placement_layout(panels, stock_sheet, options, result['placements'],
+                                                     result.get('sheet_sizes'), result.get('sheet_stock'),
+                                                     result.get('sheet_costs')),
+            'result_fingerprint': result['fingerprint'],
+            'pattern_pdf': result.get('pdf_data') or False,
+            'pattern_pdf_filename': f"cutting_pattern_{self.name.replace(' ', '_')}.pdf",
         }
+    
+    def action_run_optimization(self):
+        """Run the optimization, or queue it when the options ask for background execution."""
+        self.ensure_one()
         
-        # For debugging
-        print(f"Optimization job started for sheet {stock_sheet['length']}x{stock_sheet['width']}")
-        print(f"Panels to optimize: {panels}")
+        if not self.line_ids:
+            raise UserError(_("You must add at least one panel to the cutting job."))
+        
+        if self.options_id.run_in_background:
+            return self._enqueue_optimization()
         
         try:
-            # Call optimizer function with enhanced algorithm
-            result = self._run_maxrects_optimizer(panels, stock_sheet, options)
-            
-            end_time = datetime.now()
-            optimization_time = (end_time - start_time).total_seconds()
-            
-            # Debug the result before writing
-            print(f"Raw optimization result: {result}")
-            print(f"Usage ratio: {result.get('usage_ratio', 0)}")
-            print(f"Usage percentage: {result.get('usage_ratio', 0) * 100:.2f}%")
-            
-            # Update job with results - ensure all values are of correct type
-            self.write({
-                'state': 'optimized',
-                'optimization_date': fields.Datetime.now(),
-                'sheet_usage_ratio': float(result.get('usage_ratio', 0) * 100),  # Convert to percentage
-                'waste_area': float(result.get('waste_area', 0)),
-                'total_panels': int(result.get('total_panels', 0)),
-                'optimization_time': float(optimization_time),
-                'pattern_pdf': result.get('pdf_data'),
-                'pattern_pdf_filename': f"cutting_pattern_{self.name.replace(' ', '_')}.pdf",
-            })
-            
-            # Verify values after write
-            self.env.cr.commit()  # Commit the transaction to avoid losing debug output
-            print(f"Values after write: ratio={self.sheet_usage_ratio}%, waste={self.waste_area}, panels={self.total_panels}")
-            
+            # Update job with results
+            self.write(self._optimize())
             return True
             
         except Exception as e:
-            # Log the error but don't raise it to avoid transaction rollback
-            import traceback
-            print(f"Error in optimization: {e}")
-            print(traceback.format_exc())
+            # Log the error before turning it into a user-facing message
+            _logger.exception("Optimization of job %s failed", self.name)
             raise UserError(_(f"Optimization failed: {e}"))
-            
-    def _generate_cutting_pattern_pdf_enhanced(self, pattern, stock_sheet, options):
-        """Generate a PDF visualization of the cutting pattern using the enhanced optimizer's output."""
-        # Create a temporary file
-        fd, temp_path = tempfile.mkstemp(suffix='.pdf')
-        os.close(fd)
+    
+    def _enqueue_optimization(self):
+        """Hand the jobs over to the background runner instead of optimizing in the request."""
+        self.write({'state': 'queued', 'queued_date': fields.Datetime.now()})
+        self.env.ref('cutlist.ir_cron_cutting_job_queue')._trigger()
+        return True
+    
+    @api.model
+    def _cron_process_optimization_queue(self):
+        """
+        Cron entry point for queued optimizations. Claims queued jobs up to the
+        cutlist.max_concurrent_jobs limit and optimizes them together with
+        _optimize_batch, side by side in worker processes. A job that fails goes
+        back to Ready without affecting the others.
+        """
+        params = self.env['ir.config_parameter'].sudo()
+        max_jobs = int(params.get_param('cutlist.max_concurrent_jobs', 2))
+        timeout = int(params.get_param('cutlist.job_timeout_minutes', 60))
+        
+        # Requeue jobs whose runner died (server restart, killed worker)
+        stale_jobs = self.search([
+            ('state', '=', 'running'),
+            ('optimization_start', '<', fields.Datetime.now() - timedelta(minutes=timeout)),
+        ])
+        if stale_jobs:
+            stale_jobs.write({'state': 'queued'})
+        
+        slots = max_jobs - self.search_count([('state', '=', 'running')])
+        if slots <= 0:
+            return
+        
+        # Claim jobs without blocking on ones another runner is claiming
+        self.env.cr.execute("""
+            SELECT id FROM cutting_job
+             WHERE state = 'queued'
+             ORDER BY queued_date, id
+             LIMIT %s
+               FOR UPDATE SKIP LOCKED
+        """, (slots,))
+        job_ids = [row[0] for row in self.env.cr.fetchall()]
+        if not job_ids:
+            return
+        self.browse(job_ids).write({'state': 'running', 'optimization_start': fields.Datetime.now()})
+        # Make the claim visible before the long computation starts
+        self.env.cr.commit()
         
+        jobs = self.browse(job_ids)
+        errors = jobs._optimize_batch(states=('running',))
+        failed = self.browse([job_id for job_id, error in errors.items() if error])
+        if failed:
+            failed.write({'state': 'ready'})
+        for job in jobs - failed:
+            # Nobody is waiting on the request, so render the PDF right away
+            try:
+                with self.env.cr.savepoint():
+                    job._render_pattern_pdf()
+            except Exception:
+                _logger.exception("Rendering the cutting pattern of job %s failed", job.name)
+        
+        if self.search_count([('state', '=', 'queued')]):
+            self.env.ref('cutlist.ir_cron_cutting_job_queue')._trigger()
+    
+    def action_optimize_batch(self):
+        """
+        Optimize the selected jobs together, see _optimize_batch. Jobs whose options ask for
+        background execution are queued instead. Returns a notification with the outcome.
+        """
+        background = self.filtered(lambda job: job.options_id.run_in_background and job.line_ids
+                                   and job.state in BATCH_STATES)
+        if background:
+            background._enqueue_optimization()
+        errors = (self - background)._optimize_batch()
+        failed = self.browse([job_id for job_id, error in errors.items() if error])
+        message = _("%s job(s) optimized, %s queued, %s failed.",
+                    len(errors) - len(failed), len(background), len(failed))
+        return self._batch_notification(_("Batch Optimization"), message, failed)
+    
+    def action_nest_jobs(self):
+        """
+        Nest the selected jobs: the ones with the same stock sheet and optimizer options are
+        packed together over a shared pool of sheets, see cutting.nesting. A job alone in its
+        group is optimized on its own. Returns a notification with the outcome.
+        """
+        self._prefetch_optimization_data()
+        Nesting = self.env['cutting.nesting']
+        groups = {}
+        alone = self.browse()
+        for job in self:
+            if job.state in BATCH_STATES and job.line_ids:
+                key = (job.stock_sheet_id.id, job.options_id.id)
+                groups[key] = groups.get(key, self.browse()) | job
+            else:
+                # _optimize_batch reports why it cannot be optimized
+                alone |= job
+        
+        nestings = Nesting
+        failed = self.browse()
+        for group in groups.values():
+            if len(group) == 1:
+                alone |= group
+                continue
+            try:
+                with self.env.cr.savepoint():
+                    nestings |= Nesting._nest(group)
+            except Exception as e:
+                _logger.exception("Nesting of jobs %s failed", ', '.join(group.mapped('name')))
+                failed |= group
+                for job in group:
+                    job.message_post(body=_("Nesting failed: %s", e))
+        
+        errors = alone._optimize_batch()
+        failed |= self.browse([job_id for job_id, error in errors.items() if error])
+        message = _("%s job(s) nested in %s nesting(s), %s optimized alone, %s failed.",
+                    len(nestings.job_ids), len(nestings), len(errors) - len(failed & alone), len(failed))
+        return self._batch_notification(_("Nesting"), message, failed)
+    
+    def _batch_notification(self, title, message, failed):
+        """Client notification summing up a batch action, naming the jobs that failed."""
+        if failed:
+            message += ' ' + _("Failed: %s", ', '.join(failed.mapped('name')))
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': title,
+                'message': message,
+                'type': 'warning' if failed else 'success',
+                'sticky': bool(failed),
+                'next': {'type': 'ir.actions.client', 'tag': 'soft_reload'},
+            },
+        }
+    
+    @api.model
+    def _cron_optimize_ready_jobs(self):
+        """
+        Cron entry point of the batch optimization: optimizes the jobs waiting in Ready, oldest
+        first and at most cutlist.batch_size per run. Jobs that fail go back to Draft so the
+        next run does not try them again.
+        """
+        batch_size = int(self.env['ir.config_parameter'].sudo().get_param('cutlist.batch_size', 50))
+        jobs = self.search([('state', '=', 'ready')], order='create_date, id', limit=batch_size)
+        if not jobs:
+            return
+        errors = jobs._optimize_batch()
+        failed = self.browse([job_id for job_id, error in errors.items() if error])
+        if failed:
+            failed.write({'state': 'draft'})
+        _logger.info("Batch optimization: %d job(s) optimized, %d failed", len(jobs) - len(failed), len(failed))
+    
+    def _optimize_batch(self, states=BATCH_STATES):
+        """
+        Optimize several jobs at once and write their results. The job data is read in bulk,
+        the jobs missing from the result cache and not optimized from their previous plan are
+        optimized in worker processes (up to cutlist.max_concurrent_jobs at a time) and the
+        results are written with batched writes. Only jobs in states are optimized. A job that
+        fails is left as it was and gets the error in its chatter, without affecting the others.
+        Returns {job id: error message, False when optimized} for every job.
+        """
+        self._prefetch_optimization_data()
+        state_labels = dict(self._fields['state'].selection)
+        errors = {}
+        values = {}
+        # (job, panels, stock sheet, options, fingerprint, order, stats, seconds so far) of the cache misses
+        pending = []
+        # Every remnant is offered to one job of the batch only
+        offered_remnant_ids = set()
+        for job in self:
+            if job.state not in states:
+                errors[job.id] = _("A job in state %s cannot be optimized.", state_labels[job.state])
+                continue
+            if not job.line_ids:
+                errors[job.id] = _("You must add at least one panel to the cutting job.")
+                continue
+            start = time.perf_counter()
+            try:
+                with self.env.cr.savepoint():
+                    if job.options_id.profile_optimization:
+                        # The profiler has to run in this process
+                        values[job] = job._optimize()
+                        continue
+                    panels, stock_sheet, options = job._prepare_optimization_data(offered_remnant_ids)
+                    preparation_time = time.perf_counter() - start
+                    stats = OptimizerStats()
+                    fingerprint, order, result = job._lookup_result(panels, stock_sheet, options, stats)
+                    if result is None:
+                        # Starting from the previous plan is bounded by the edit, it runs here
+                        result = job._warm_start_result(panels, stock_sheet, options, stats)
+                    if result is not None:
+                        values[job] = job._optimization_values(result, panels, stock_sheet, options, preparation_time,
+                                                               time.perf_counter() - start)
+                        continue
+            except Exception as e:
+                _logger.exception("Batch optimization of job %s failed", job.name)
+                errors[job.id] = str(e)
+                continue
+            pending.append((job, panels, stock_sheet, options, fingerprint, order, stats, preparation_time,
+                            time.perf_counter() - start))
+        
+        if pending:
+            max_jobs = int(self.env['ir.config_parameter'].sudo().get_param('cutlist.max_concurrent_jobs', 2))
+            outcomes = optimize_job_batch([(panels, stock_sheet, options)
+                                           for _job, panels, stock_sheet, options, *_rest in pending],
+                                          min(max_jobs, len(pending)))
+            for (job, panels, stock_sheet, options, fingerprint, order, stats, preparation_time, elapsed), \
+                    (result, error) in zip(pending, outcomes):
+                if error is not None:
+                    _logger.error("Batch optimization of job %s failed", job.name, exc_info=error)
+                    errors[job.id] = str(error)
+                    continue
+                try:
+                    # Runs without a packing, such as those where no panel has stock, lack these phases
+                    run_seconds = result['stats'].seconds
+                    elapsed += run_seconds.get('data conversion', 0.0) + run_seconds.get('optimization', 0.0)
+                    with self.env.cr.savepoint():
+                        result = job._store_result(fingerprint, order, result, stats)
+                        values[job] = job._optimization_values(result, panels, stock_sheet, options,
+                                                               preparation_time, elapsed)
+                except Exception as e:
+                    _logger.exception("Batch optimization of job %s failed", job.name)
+                    errors[job.id] = str(e)
+        
+        errors.update(self._write_optimization_values(values))
+        for job in self:
+            errors.setdefault(job.id, False)
+            if errors[job.id]:
+                job.message_post(body=_("Batch optimization failed: %s", errors[job.id]))
+        return errors
+    
+    def _prefetch_optimization_data(self):
+        """Read what _prepare_optimization_data needs for all the jobs at once, a few queries in total."""
+        self.fetch(['name', 'state', 'line_ids', 'stock_sheet_id', 'options_id'])
+        self.line_ids.fetch(['panel_id', 'quantity'])
+        self.line_ids.panel_id.fetch(['name', 'length', 'width', 'material_id', 'grain_direction'])
+        self.stock_sheet_id.fetch(['name', 'length', 'width', 'available_quantity', 'material_id', 'grain_direction',
+                                   'cost'])
+        self.options_id.fetch()
+    
+    def _write_optimization_values(self, values):
+        """
+        Write the values of _optimize for several jobs ({job: values}): the fields with the same
+        value on every job in one write, the timing rows in one create. If that fails, every job
+        is written on its own. Returns {job id: error message} of the jobs that could not be written.
+        """
+        if not values:
+            return {}
+        jobs = self.browse([job.id for job in values])
         try:
-            with PdfPages(temp_path) as pdf:
-                fig, ax = plt.subplots(figsize=(12, 12))
-                
-                # Draw the stock sheet
-                sheet_rect = patches.Rectangle(
-                    (0, 0), stock_sheet.length, stock_sheet.width,
-                    linewidth=2, edgecolor='black', facecolor='white'
-                )
-                ax.add_patch(sheet_rect)
-                
-                # Draw each placed panel
-                colors = plt.cm.tab20.colors
-                for i, placed_panel in enumerate(pattern.placed_panels):
-                    panel = placed_panel.panel
-                    x, y = placed_panel.x, placed_panel.y
-                    
-                    # Panel dimensions (considering rotation)
-                    if placed_panel.rotated:
-                        length, width = panel.width, panel.length
-                        rotation_text = " (rotated)"
-                    else:
-                        length, width = panel.length, panel.width
-                        rotation_text = ""
-                    
-                    # Draw the panel
-                    color_idx = i % len(colors)
-                    panel_rect = patches.Rectangle(
-                        (x, y), length, width,
-                        linewidth=1, edgecolor='black', facecolor=colors[color_idx], alpha=0.7
-                    )
-                    ax.add_patch(panel_rect)
-                    
-                    # Add label if requested
-                    if options.labels_on_panels:
-                        label_text = f"{panel.label}{rotation_text}\n{length:.1f} x {width:.1f}"
-                        ax.text(
-                            x + length/2, y + width/2, label_text,
-                            horizontalalignment='center', verticalalignment='center',
-                            fontsize=8, fontweight='bold'
-                        )
-                
-                # Set axis limits and labels
-                ax.set_xlim(-5, stock_sheet.length + 5)
-                ax.set_ylim(-5, stock_sheet.width + 5)
-                ax.set_xlabel('Length')
-                ax.set_ylabel('Width')
-                ax.set_title(f'Cutting Pattern - {stock_sheet.label}')
-                
-                # Add gridlines
-                ax.grid(True, linestyle='--', alpha=0.7)
-                
-                # Add stats
-                used_area = stock_sheet.area() - pattern.waste_area
-                usage_percentage = used_area / stock_sheet.area() * 100
-                waste_percentage = 100 - usage_percentage
-                
-                stats_text = (
-                    f"Stock Sheet: {stock_sheet.length} x {stock_sheet.width}\n"
-                    f"Used Area: {used_area:.2f} ({usage_percentage:.1f}%)\n"
-                    f"Waste Area: {pattern.waste_area:.2f} ({waste_percentage:.1f}%)\n"
-                    f"Panels Placed: {len(pattern.placed_panels)}\n"
-                    f"Kerf Width: {options.kerf_thickness}"
-                )
-                
-                plt.figtext(0.02, 0.02, stats_text, fontsize=10, wrap=True)
-                
-                # Adjust layout and save to PDF
-                plt.tight_layout()
-                pdf.savefig(fig)
-                plt.close()
-            
-            # Read the temporary file and encode it as base64
-            with open(temp_path, 'rb') as pdf_file:
-                pdf_data = base64.b64encode(pdf_file.read())
+            with self.env.cr.savepoint():
+                per_job = {job: dict(job_values) for job, job_values in values.items()}
+                stats_rows = []
+                for job, job_values in per_job.items():
+                    # [Command.clear(), Command.create(row), ...], see _optimization_values
+                    stats_rows += [dict(command[2], cutting_job_id=job.id)
+                                   for command in job_values.pop('stats_ids') if command[0] == Command.CREATE]
+                first = next(iter(per_job.values()))
+                common = {key: value for key, value in first.items()
+                          if all(key in job_values and job_values[key] == value for job_values in per_job.values())}
+                jobs.stats_ids.unlink()
+                jobs.write(common)
+                for job, job_values in per_job.items():
+                    job.write({key: value for key, value in job_values.items() if key not in common})
+                self.env['cutting.job.stats'].create(stats_rows)
+            return {}
+        except Exception:
+            _logger.exception("Batched write of %d optimized jobs failed, writing them one by one", len(jobs))
+        
+        errors = {}
+        for job, job_values in values.items():
+            try:
+                with self.env.cr.savepoint():
+                    job.write(job_values)
+            except Exception as e:
+                _logger.exception("Writing the optimization result of job %s failed", job.name)
+                errors[job.id] = str(e)
+        return errors
+    
+    @api.model
+    def _placement_layout(self, panels, stock_sheet, options, placements, sheet_sizes=None, sheet_stock=None,
+                          sheet_costs=None):
+        """
+        Serialize what is needed to draw the cutting plan, independently of later
+        changes to the job's lines, stock sheet or options. sheet_sizes gives the
+        [length, width, label] of every sheet when they are not all the stock sheet,
+        sheet_stock the [material, grain, remnant id] they are cut from (see
+        stock_selection.stock_reference), which the offcuts of the job are recorded with.
+        With sheet_costs, the panel keys and the plan key of the options are stored as
+        well, for the next optimization to start from this plan (see _previous_plan).
+        """
+        layout = {
+            'panels': [[float(panel['length']), float(panel['width']), panel['label']] for panel in panels],
+            'stock_sheet': [float(stock_sheet['length']), float(stock_sheet['width']), stock_sheet['label']],
+            'kerf_thickness': float(options['kerf_thickness']),
+            'labels_on_panels': bool(options['labels_on_panels']),
+            'renderer': options['renderer'],
+            'sheets': placements,
+        }
+        if sheet_sizes:
+            layout['sheet_sizes'] = [[float(length), float(width), label] for length, width, label in sheet_sizes]
+        if sheet_stock:
+            layout['sheet_stock'] = sheet_stock
+        if sheet_sizes and sheet_stock and sheet_costs is not None:
+            layout['sheet_costs'] = [float(cost) for cost in sheet_costs]
+            layout['panel_keys'] = [panel_key(panel) for panel in panels]
+            layout['plan_key'] = plan_key(options)
+        return json.dumps(layout, separators=(',', ':'))
+    
+    def _layout_patterns(self):
+        """Rebuild the cutting patterns, drawing options and renderer from the stored placements."""
+        self.ensure_one()
+        return self._patterns_from_layout(self.placement_data)
+    
+    @api.model
+    def _patterns_from_layout(self, placement_data):
+        """Rebuild the cutting patterns, drawing options and renderer from a _placement_layout string."""
+        layout = json.loads(placement_data)
+        
+        panels = [Panel(length=length, width=width, quantity=1, label=label)
+                  for length, width, label in layout['panels']]
+        # One stock sheet per distinct size, plans by material cut several
+        sheet_sizes = layout.get('sheet_sizes') or [layout['stock_sheet']] * len(layout['sheets'])
+        sheet_sizes = [tuple(size) for size in sheet_sizes]
+        stock_sheets = {(length, width, label): StockSheet(length=length, width=width, label=label,
+                                                           quantity=sheet_sizes.count((length, width, label)))
+                        for length, width, label in set(sheet_sizes)}
+        options = OptimizerOptions(kerf_thickness=layout['kerf_thickness'],
+                                   labels_on_panels=layout['labels_on_panels'])
+        
+        patterns = []
+        for size, placements in zip(sheet_sizes, layout['sheets']):
+            pattern = CuttingPattern(stock_sheets[size], panels)
+            for panel_index, x, y, rotated in placements:
+                pattern.add_placement(panel_index, x, y, rotated, panel_index)
+            patterns.append(pattern)
+        return patterns, options, layout.get('renderer', 'vector')
+    
+    def _render_pattern_pdf(self):
+        """Render the PDF from the stored placements and keep it until the placements change."""
+        self.ensure_one()
+        start = time.perf_counter()
+        patterns, options, renderer = self._layout_patterns()
+        pdf_data = self._generate_cutting_pattern_pdf_enhanced(patterns, options, renderer)
+        elapsed = time.perf_counter() - start
+        
+        previous = self.stats_ids.filtered(lambda stat: stat.phase == 'PDF rendering')
+        self.write({
+            'pattern_pdf': pdf_data,
+            'stats_ids': [Command.unlink(stat.id) for stat in previous] + [Command.create({
+                'sequence': 1000, 'phase': 'PDF rendering', 'calls': len(patterns), 'seconds': elapsed,
+            })],
+        })
+        if self.result_fingerprint:
+            self.env['cutting.optimization.cache']._attach_pdf(self.result_fingerprint, pdf_data)
+        return pdf_data
+    
+    def _attach_profile(self, profiler):
+        """Attach the cProfile capture of an optimization as a readable report and a .prof file."""
+        self.ensure_one()
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats('cumulative').print_stats(80)
+        profiler.create_stats()
+        timestamp = fields.Datetime.now().strftime('%Y%m%d_%H%M%S')
+        basename = f"profile_{self.name.replace(' ', '_')}_{timestamp}"
+        self.message_post(
+            body=_("Optimization profile captured. Open the .prof file with pstats or snakeviz."),
+            attachments=[
+                (f"{basename}.txt", report.getvalue().encode('utf-8')),
+                (f"{basename}.prof", marshal.dumps(profiler.stats)),
+            ],
+        )
+    
+    def _attach_trace(self, trace):
+        """Attach the placement trace of an optimization to the job as a text file, one event per line."""
+        self.ensure_one()
+        lines = []
+        for event in trace:
+            kind = event[0]
+            if kind == 'strategy':
+                lines.append(f"strategy {event[1]}")
+            elif kind == 'place':
+                _kind, panel_id, x, y, rotated, free = event
+                lines.append(f"  place panel type {panel_id} at ({x:g}, {y:g}){' rotated' if rotated else ''}, "
+                             f"{free} free rectangles")
+            elif kind == 'layout':
+                _kind, panel_id, placed, blocks, free = event
+                lines.append(f"  place {placed} panels of type {panel_id} in {blocks} blocks, {free} free rectangles")
+            elif kind == 'reject':
+                lines.append(f"  panel type {event[1]} does not fit, {event[2]} free rectangles")
+            elif kind == 'search':
+                lines.append(f"search ran {event[1]} iterations, improved: {'yes' if event[2] else 'no'}")
+            elif kind == 'solver':
+                lines.append(f"column generation: {event[1]} patterns after {event[2]} pricing rounds, "
+                             f"{event[3]}, improved: {'yes' if event[4] else 'no'}")
+        timestamp = fields.Datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.message_post(
+            body=_("Placement trace captured for %s placement attempts.",
+                   sum(1 for event in trace if event[0] in ('place', 'reject'))),
+            attachments=[(f"trace_{self.name.replace(' ', '_')}_{timestamp}.log",
+                          ('\n'.join(lines) + '\n').encode('utf-8'))],
+        )
+    
+    def _generate_cutting_pattern_pdf_enhanced(self, patterns, options, renderer='vector'):
+        """Generate a PDF visualization of the cutting patterns, one page per stock sheet."""
+        if renderer == 'matplotlib':
+            try:
+                import matplotlib
+            except ImportError:
+                _logger.warning("Matplotlib is not installed, using the built-in renderer")
+            else:
+                return self._generate_cutting_pattern_pdf_matplotlib(patterns, options)
+        return base64.b64encode(render_pdf(patterns, options))
+    
+    def _generate_cutting_pattern_pdf_matplotlib(self, patterns, options):
+        """Draw the cutting patterns with matplotlib, imported only when this renderer is selected."""
+        import matplotlib
+        matplotlib.use('Agg')  # Use Agg backend to avoid GUI
+        from matplotlib.backends.backend_pdf import PdfPages
+        
+        # Render into memory, the PDF is stored base64 encoded anyway
+        buffer = io.BytesIO()
+        with PdfPages(buffer) as pdf:
+            for sheet_number, pattern in enumerate(patterns, start=1):
+                self._draw_cutting_pattern_page(pdf, pattern, options, sheet_number, len(patterns))
+        return base64.b64encode(buffer.getvalue())
             
-            return pdf_data
+    def _draw_cutting_pattern_page(self, pdf, pattern, options, sheet_number, sheet_total):
+        """Draw one stock sheet of the cutting plan as a page of the PDF."""
+        import matplotlib.pyplot as plt
+        import matplotlib.patches as patches
+        
+        stock_sheet = pattern.stock_sheet
+        fig, ax = plt.subplots(figsize=(12, 12))
+        
+        # Draw the stock sheet
+        sheet_rect = patches.Rectangle(
+            (0, 0), stock_sheet.length, stock_sheet.width,
+            linewidth=2, edgecolor='black', facecolor='white'
+        )
+        ax.add_patch(sheet_rect)
         
-        finally:
-            # Clean up the temporary file
-            if os.path.exists(temp_path):
-                os.unlink(temp_path)
+        # Draw each placed panel
+        colors = plt.cm.tab20.colors
+        for i, (panel, x, y, rotated, _panel_id) in enumerate(pattern.placements()):
+            # Panel dimensions (considering rotation)
+            if rotated:
+                length, width = panel.width, panel.length
+                rotation_text = " (rotated)"
+            else:
+                length, width = panel.length, panel.width
+                rotation_text = ""
             
+            # Draw the panel
+            color_idx = i % len(colors)
+            panel_rect = patches.Rectangle(
+                (x, y), length, width,
+                linewidth=1, edgecolor='black', facecolor=colors[color_idx], alpha=0.7
+            )
+            ax.add_patch(panel_rect)
+            
+            # Add label if requested
+            if options.labels_on_panels:
+                label_text = f"{panel.label}{rotation_text}\n{length:.1f} x {width:.1f}"
+                ax.text(
+                    x + length/2, y + width/2, label_text,
+                    horizontalalignment='center', verticalalignment='center',
+                    fontsize=8, fontweight='bold'
+                )
+        
+        # Set axis limits and labels
+        ax.set_xlim(-5, stock_sheet.length + 5)
+        ax.set_ylim(-5, stock_sheet.width + 5)
+        ax.set_xlabel('Length')
+        ax.set_ylabel('Width')
+        if sheet_total > 1:
+            ax.set_title(f'Cutting Pattern - {stock_sheet.label} (sheet {sheet_number} of {sheet_total})')
+        else:
+            ax.set_title(f'Cutting Pattern - {stock_sheet.label}')
+        
+        # Add gridlines
+        ax.grid(True, linestyle='--', alpha=0.7)
+        
+        # Add stats
+        used_area = stock_sheet.area() - pattern.waste_area
+        usage_percentage = used_area / stock_sheet.area() * 100
+        waste_percentage = 100 - usage_percentage
+        
+        stats_text = (
+            f"Stock Sheet: {stock_sheet.length} x {stock_sheet.width}\n"
+            f"Used Area: {used_area:.2f} ({usage_percentage:.1f}%)\n"
+            f"Waste Area: {pattern.waste_area:.2f} ({waste_percentage:.1f}%)\n"
+            f"Panels Placed: {len(pattern)}\n"
+            f"Kerf Width: {options.kerf_thickness}"
+        )
+        
+        plt.figtext(0.02, 0.02, stats_text, fontsize=10, wrap=True)
+        
+        # Adjust layout and save to PDF
+        plt.tight_layout()
+        pdf.savefig(fig)
+        plt.close()
+    
     def action_open_report(self):
         """Open the cutting pattern report in a new window."""
         self.ensure_one()
         if not self.pattern_pdf:
-            raise UserError(_("No cutting pattern PDF is available for this job."))
+            if not self.placement_data:
+                raise UserError(_("No cutting pattern PDF is available for this job."))
+            self._render_pattern_pdf()
         
         return {
             'type': 'ir.actions.act_url',
@@ -367,4 +1437,22 @@ class CuttingJobLine(models.Model):
     def _check_quantity(self):
         for line in self:
             if line.quantity <= 0:
-                raise models.ValidationError(_("Quantity must be greater than zero."))
\ No newline at end of file
+                raise models.ValidationError(_("Quantity must be greater than zero."))
+
+class CuttingJobStats(models.Model):
+    _name = 'cutting.job.stats'
+    _description = 'Cutting Job Optimization Timing'
+    _order = 'sequence, id'
+    _rec_name = 'phase'
+    
+    cutting_job_id = fields.Many2one('cutting.job', string='Cutting Job', required=True, ondelete='cascade', index=True)
+    sequence = fields.Integer('Sequence', default=10)
+    phase = fields.Char('Phase', required=True)
+    calls = fields.Integer('Calls', default=1)
+    seconds = fields.Float('Time (s)', digits=(16, 4))
+    average_ms = fields.Float('Average (ms)', compute='_compute_average_ms', digits=(16, 4))
+    
+    @api.depends('calls', 'seconds')
+    def _compute_average_ms(self):
+        for stat in self:
+            stat.average_ms = stat.seconds * 1000.0 / stat.calls if stat.calls else 0.0
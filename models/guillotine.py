@@ -0,0 +1,230 @@
+"""
+Guillotine packing engine and cut sequences.
+
+GuillotineOptimizer packs panels so that every sheet can be cut with
+edge-to-edge cuts only, as panel saws do. It keeps disjoint free rectangles:
+a panel goes into the free rectangle that it fills best, at its bottom left
+corner, and the rest of the rectangle is divided by one more cut whose
+direction is chosen by the split rule.
+
+cut_sequence works on any cutting pattern. It finds the cuts of a guillotine
+layout (the first stage cuts across the whole sheet, the next stage across
+each piece, and so on) and returns them in saw order, or None when the layout
+cannot be cut edge to edge.
+"""
+import time
+from bisect import bisect_right
+from typing import Dict, List, Optional, Tuple
+
+from .paste5 import CuttingPattern, OptimizerStats, Panel, PlacementTraceMixin, Rectangle, StockSheet
+
+# Rules for the direction of the cut that divides the free space left next to a placed panel.
+# The first cut is horizontal (across the whole free rectangle) when the rule holds.
+SPLIT_RULES = {
+    'shorter_leftover': lambda rect, width, height: rect.width - width <= rect.height - height,
+    'longer_leftover': lambda rect, width, height: rect.width - width > rect.height - height,
+    'shorter_axis': lambda rect, width, height: rect.width <= rect.height,
+    'longer_axis': lambda rect, width, height: rect.width > rect.height,
+    'min_area': lambda rect, width, height: width * (rect.height - height) > (rect.width - width) * height,
+    'max_area': lambda rect, width, height: width * (rect.height - height) <= (rect.width - width) * height,
+}
+
+# Free rectangles and cut positions closer than this are treated as touching
+EPSILON = 1e-6
+
+
+class GuillotineOptimizer:
+    """
+    Guillotine packer with the same interface as MaxRectsOptimizer, so the strategies
+    of EnhancedCuttingStockOptimizer can use either.
+    """
+    
+    def __init__(self, stock_sheet: StockSheet, kerf_thickness: float, consider_grain: bool,
+                 split_rule: str = 'shorter_leftover', panels: Optional[List[Panel]] = None,
+                 panel_index: Optional[Dict[int, int]] = None, stats: Optional[OptimizerStats] = None):
+        self.stock_sheet = stock_sheet
+        self.kerf_thickness = kerf_thickness
+        self.consider_grain = consider_grain
+        self.split_horizontally = SPLIT_RULES[split_rule]
+        self.stats = stats
+        # Disjoint free rectangles, each one a piece the saw can cut out
+        self.free_rectangles: List[Rectangle] = [Rectangle(0, 0, stock_sheet.length, stock_sheet.width)]
+        self.pattern = CuttingPattern(stock_sheet, panels, panel_index)
+        self.used_area = 0.0  # area covered by placed panels including kerf
+    
+    def find_position_for_panel(self, panel: Panel, panel_id: int, rotation: Optional[bool] = None) -> bool:
+        """
+        Place the panel at the best position if there is one, see _place_panel.
+        Calls and time are recorded when the packer has stats.
+        """
+        if self.stats is None:
+            return self._place_panel(panel, panel_id, rotation)
+        start = time.perf_counter()
+        placed = self._place_panel(panel, panel_id, rotation)
+        self.stats.add('find_position_for_panel', time.perf_counter() - start)
+        return placed
+    
+    def _place_panel(self, panel: Panel, panel_id: int, rotation: Optional[bool] = None) -> bool:
+        """
+        Place the panel in the free rectangle with the least area left over (best area fit,
+        then best short side fit). rotation forces the orientation of a rotatable panel
+        (False: as given, True: rotated); None tries both. Returns True if the panel was placed.
+        """
+        kerf = self.kerf_thickness
+        can_rotate = panel.can_rotate(self.consider_grain)
+        sizes = []
+        if not (rotation and can_rotate):
+            sizes.append((panel.length + kerf, panel.width + kerf, False))
+        if can_rotate and rotation is not False:
+            sizes.append((panel.width + kerf, panel.length + kerf, True))
+        
+        best = None
+        best_score = None
+        for position, rect in enumerate(self.free_rectangles):
+            rect_width, rect_height = rect.width, rect.height
+            for width, height, rotated in sizes:
+                if width <= rect_width and height <= rect_height:
+                    leftover_width, leftover_height = rect_width - width, rect_height - height
+                    score = (rect_width * rect_height - width * height, min(leftover_width, leftover_height))
+                    if best_score is None or score < best_score:
+                        best, best_score = (position, width, height, rotated), score
+        if best is None:
+            return False
+        
+        position, width, height, rotated = best
+        rect = self.free_rectangles.pop(position)
+        self.pattern.add_panel(panel, rect.x, rect.y, rotated, panel_id)
+        self.used_area += width * height
+        self.split_rectangle(rect, width, height)
+        return True
+    
+    def split_rectangle(self, rect: Rectangle, width: float, height: float) -> None:
+        """
+        Divide what is left of the rectangle next to a panel placed in its bottom left
+        corner into two free rectangles, by a horizontal or vertical cut per the split rule.
+        """
+        if self.split_horizontally(rect, width, height):
+            top = Rectangle(rect.x, rect.y + height, rect.width, rect.height - height)
+            right = Rectangle(rect.x + width, rect.y, rect.width - width, height)
+        else:
+            top = Rectangle(rect.x, rect.y + height, width, rect.height - height)
+            right = Rectangle(rect.x + width, rect.y, rect.width - width, rect.height)
+        for free in (top, right):
+            if free.width > EPSILON and free.height > EPSILON:
+                self.free_rectangles.append(free)
+    
+    def place_run(self, panel: Panel, panel_id: int, count: int, rotation: Optional[bool] = None) -> int:
+        """Place up to count copies of the panel, stopping at the first one that does not fit."""
+        placed = 0
+        while placed < count and self.find_position_for_panel(panel, panel_id, rotation):
+            placed += 1
+        return placed
+    
+    def place_layout(self, panel: Panel, layout, panel_id: int, count: int) -> int:
+        """
+        Place up to count copies of the panel along a block layout (see blocks.py) on this
+        still empty sheet. The free rectangles become the space the layout leaves, which it
+        divides along its own cuts. Returns the number of panels placed.
+        """
+        if len(self.pattern):
+            raise ValueError("A block layout can only be placed on an empty sheet.")
+        start = time.perf_counter() if self.stats is not None else None
+        count = min(count, layout.count)
+        for x, y, rotated in layout.placements(count):
+            self.pattern.add_panel(panel, x, y, rotated, panel_id)
+        self.free_rectangles = layout.free_space(count)
+        self.used_area += count * layout.panel_length * layout.panel_width
+        if start is not None:
+            self.stats.add('place_layout', time.perf_counter() - start)
+        return count
+    
+    def get_pattern(self) -> CuttingPattern:
+        """
+        Return the CuttingPattern holding the current placement. It is not copied,
+        so the packer must not place further panels once the pattern is handed out.
+        """
+        return self.pattern
+
+
+class TracingGuillotineOptimizer(PlacementTraceMixin, GuillotineOptimizer):
+    """Guillotine packer that records every placement attempt, used only when tracing is enabled."""
+
+
+def cut_sequence(pattern: CuttingPattern, kerf_thickness: float) -> Optional[List[Tuple[str, float, float, float, int]]]:
+    """
+    Cuts that separate every panel of the pattern, in saw order, as (direction, position,
+    start, end, stage) tuples. A 'horizontal' cut runs along the sheet length at
+    y = position from x = start to x = end, a 'vertical' one across it at x = position.
+    The kerf lies just after the position. Returns None if the layout needs a cut
+    that does not run from edge to edge.
+    """
+    boxes = []
+    for panel, x, y, rotated, _panel_id in pattern.placements():
+        length, width = (panel.width, panel.length) if rotated else (panel.length, panel.width)
+        boxes.append((x, y, x + length, y + width))
+    cuts = []
+    region = (0.0, 0.0, pattern.stock_sheet.length, pattern.stock_sheet.width)
+    if not _cut_region(boxes, region, kerf_thickness, 1, cuts):
+        return None
+    return cuts
+
+
+def _cut_positions(boxes, low: int, high: int, start: float, end: float, kerf: float) -> List[float]:
+    """
+    Positions along one axis (box coordinates low and high) where a cut crosses no box:
+    after every group of overlapping boxes, and before a group when there is waste in front of it.
+    """
+    positions = []
+    previous_end = start
+    group_end = None
+    for box_low, box_high in sorted((box[low], box[high]) for box in boxes):
+        if group_end is not None and box_low < group_end - EPSILON:
+            group_end = max(group_end, box_high)
+            continue
+        if group_end is not None:
+            positions.append(group_end)
+            previous_end = group_end + kerf
+        if box_low - kerf > previous_end + EPSILON:
+            positions.append(box_low - kerf)
+        group_end = box_high
+    if group_end is not None and group_end < end - EPSILON:
+        positions.append(group_end)
+    return positions
+
+
+def _cut_region(boxes, region, kerf: float, stage: int, cuts: list) -> bool:
+    """
+    Cut the region so every box ends up on its own, appending the cuts of this stage and
+    then those of each piece in order. Returns False if the region is not guillotine cuttable.
+    """
+    if not boxes:
+        return True
+    x0, y0, x1, y1 = region
+    horizontal = _cut_positions(boxes, 1, 3, y0, y1, kerf)
+    vertical = _cut_positions(boxes, 0, 2, x0, x1, kerf)
+    if not horizontal and not vertical:
+        # A single panel filling the region needs no more cuts
+        return len(boxes) == 1
+    
+    # Make as many cuts as possible in one stage, along the longer side on a tie
+    if len(horizontal) > len(vertical) or (len(horizontal) == len(vertical) and x1 - x0 >= y1 - y0):
+        low, high, positions, start = 1, 3, horizontal, y0
+        cuts.extend(('horizontal', position, x0, x1, stage) for position in positions)
+    else:
+        low, high, positions, start = 0, 2, vertical, x0
+        cuts.extend(('vertical', position, y0, y1, stage) for position in positions)
+    
+    # No box crosses a cut, so the cuts before its start tell which piece it is in
+    pieces = [[] for _ in range(len(positions) + 1)]
+    for box in boxes:
+        pieces[bisect_right(positions, box[low] + EPSILON)].append(box)
+    bounds = [start] + [position + kerf for position in positions]
+    ends = positions + [y1 if low == 1 else x1]
+    for inside, piece_start, piece_end in zip(pieces, bounds, ends):
+        if low == 1:
+            piece = (x0, piece_start, x1, piece_end)
+        else:
+            piece = (piece_start, y0, piece_end, y1)
+        if not _cut_region(inside, piece, kerf, stage + 1, cuts):
+            return False
+    return True
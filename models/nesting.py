@@ -0,0 +1,234 @@
+"""
+Cross-job nesting.
+
+The panels of several jobs cut from the same stock sheet with the same options are
+packed together over one shared pool of sheets, so the partly used last sheets of small
+jobs are filled with the panels of others. Identical panels of different jobs become a
+single panel type for the optimizer, which therefore works on as many types as there are
+distinct panels, whatever the number of jobs. The plan is then split back: every
+placement is assigned to the job line it cuts, and every job gets the sheets holding its
+panels.
+"""
+import logging
+import time
+
+from odoo import models, fields, api, _
+
+from odoo.addons.cutlist.models.cutting_job import optimality_gap, sheet_lower_bound
+from odoo.addons.cutlist.models.pattern_renderer import render_svg
+
+_logger = logging.getLogger(__name__)
+
+
+def merge_job_panels(job_panels):
+    """
+    Merge the prepared panels of several jobs ([(job id, panels)], see
+    CuttingJob._prepare_optimization_data) into one entry per distinct panel. Returns the
+    merged panels and, for each of them, the (job id, panel index, quantity) demands it
+    stands for, in job order.
+    """
+    merged = []
+    demands = []
+    positions = {}
+    for job_id, panels in job_panels:
+        for index, panel in enumerate(panels):
+            key = (float(panel['length']), float(panel['width']), panel['grain_direction'] or 'none',
+                   str(panel['material']))
+            if key not in positions:
+                positions[key] = len(merged)
+                merged.append(dict(panel, id=False, quantity=0))
+                demands.append([])
+            position = positions[key]
+            merged[position]['quantity'] += int(panel['quantity'])
+            demands[position].append((job_id, index, int(panel['quantity'])))
+    return merged, demands
+
+
+def split_nested_placements(placements, demands):
+    """
+    Assign the placements of a nested plan ([[merged index, x, y, rotated], ...] per sheet)
+    to the job panels they cut. The copies of a merged panel go to its demands in job order,
+    sheet by sheet, so that each job's panels gather on as few sheets as possible. Returns
+    the sheets as [[job id, panel index, x, y, rotated], ...] and {(job id, panel index):
+    quantity} of the panels left unplaced.
+    """
+    remaining = [[quantity for _job_id, _index, quantity in demand] for demand in demands]
+    cursors = [0] * len(demands)
+    sheets = []
+    for sheet in placements:
+        rows = []
+        for merged_index, x, y, rotated in sheet:
+            cursor = cursors[merged_index]
+            while not remaining[merged_index][cursor]:
+                cursor += 1
+            cursors[merged_index] = cursor
+            remaining[merged_index][cursor] -= 1
+            job_id, index, _quantity = demands[merged_index][cursor]
+            rows.append([job_id, index, x, y, rotated])
+        sheets.append(rows)
+    unplaced = {}
+    for demand, left in zip(demands, remaining):
+        for (job_id, index, _quantity), quantity in zip(demand, left):
+            if quantity:
+                unplaced[(job_id, index)] = quantity
+    return sheets, unplaced
+
+
+class CuttingNesting(models.Model):
+    _name = 'cutting.nesting'
+    _description = 'Cutting Jobs Nested Together'
+    _order = 'create_date desc, id desc'
+    
+    name = fields.Char('Name', required=True, readonly=True)
+    job_ids = fields.One2many('cutting.job', 'nesting_id', string='Jobs', readonly=True)
+    stock_sheet_id = fields.Many2one('cutting.stock.sheet', string='Stock Sheet', required=True, readonly=True)
+    options_id = fields.Many2one('cutting.optimizer.options', string='Optimization Options', required=True,
+                                 readonly=True)
+    
+    sheet_usage_ratio = fields.Float('Sheet Usage Ratio', readonly=True,
+                                     help="Percentage of the area of the shared sheets used by panels")
+    waste_area = fields.Float('Waste Area', readonly=True)
+    total_panels = fields.Integer('Total Panels Placed', readonly=True)
+    sheet_count = fields.Integer('Sheets Used', readonly=True)
+    unplaced_panels = fields.Integer('Panels Not Placed', readonly=True)
+    stock_cost = fields.Float('Stock Cost', readonly=True, help="Total cost of the shared sheets")
+    sheet_lower_bound = fields.Integer('Sheets Lower Bound', readonly=True,
+                                       help="No plan can cut the panels of all the jobs from fewer sheets")
+    optimality_gap = fields.Float('Optimality Gap (%)', readonly=True,
+                                  help="Share of the shared sheets above the lower bound, the most that a better "
+                                       "plan could save")
+    optimization_time = fields.Float('Optimization Time (s)', readonly=True)
+    
+    # Every sheet of the plan, panels labelled with their job
+    placement_data = fields.Text('Placements', readonly=True,
+                                 help="JSON encoded panels, stock sheet and placements of the nested plan")
+    pattern_preview = fields.Html('Cutting Pattern', compute='_compute_pattern_preview', sanitize=False)
+    
+    @api.depends('placement_data')
+    def _compute_pattern_preview(self):
+        for nesting in self:
+            if not nesting.placement_data:
+                nesting.pattern_preview = False
+                continue
+            patterns, options, _renderer = self.env['cutting.job']._patterns_from_layout(nesting.placement_data)
+            nesting.pattern_preview = ''.join(
+                f'<div class="mb-3">{render_svg(pattern, options, sheet_number, len(patterns))}</div>'
+                for sheet_number, pattern in enumerate(patterns, start=1))
+    
+    @api.model
+    def _nest(self, jobs):
+        """
+        Optimize the jobs (same stock sheet and options) together and write the plan back on
+        every job: its placed and unplaced panels, and the shared sheets holding its panels,
+        drawn with the panels of the other jobs labelled by job. Returns the nesting record.
+        Errors are raised to the caller.
+        """
+        start = time.perf_counter()
+        Job = self.env['cutting.job']
+        jobs._prefetch_optimization_data()
+        job_panels = []
+        material_stock = {}
+        for job in jobs:
+            panels, stock_sheet, options = job._prepare_optimization_data()
+            job_panels.append((job.id, panels))
+            material_stock.update(stock_sheet.get('material_stock') or {})
+        if options['consider_material']:
+            # Stock for the materials of every job, not only of the last one
+            stock_sheet = dict(stock_sheet, material_stock=material_stock)
+        merged, demands = merge_job_panels(job_panels)
+        preparation_time = time.perf_counter() - start
+        _logger.info("Nesting %d jobs: %d panels of %d distinct sizes", len(jobs),
+                     sum(panel['quantity'] for panel in merged), len(merged))
+        
+        result = Job._run_maxrects_optimizer(merged, stock_sheet, options)
+        sheets, unplaced = split_nested_placements(result['placements'], demands)
+        
+        # One drawing entry per job line, labelled with the job for traceability
+        names = dict(zip(jobs.ids, jobs.mapped('name')))
+        entries = {}
+        drawing_panels = []
+        for job_id, panels in job_panels:
+            for index, panel in enumerate(panels):
+                entries[(job_id, index)] = len(drawing_panels)
+                drawing_panels.append(dict(panel, label=f"{names[job_id]}: {panel['label']}"))
+        drawn_sheets = [[[entries[(job_id, index)], x, y, rotated] for job_id, index, x, y, rotated in sheet]
+                        for sheet in sheets]
+        sheet_sizes = result.get('sheet_sizes') or [
+            [stock_sheet['length'], stock_sheet['width'], stock_sheet['label']]] * len(sheets)
+        sheet_areas = [float(length) * float(width) for length, width, _label in sheet_sizes]
+        sheet_costs = result.get('sheet_costs') or [float(stock_sheet.get('cost') or 0.0)] * len(sheets)
+        sheet_stock = result.get('sheet_stock') or []
+        panel_areas = [float(panel['length']) * float(panel['width']) for panel in drawing_panels]
+        used_areas = [sum(panel_areas[entry] for entry, _x, _y, _rotated in sheet) for sheet in drawn_sheets]
+        sheet_bound = result.get('sheet_bound')
+        if sheet_bound is None:
+            sheet_bound = 0 if options['use_single_sheet'] else sheet_lower_bound(merged, stock_sheet, options)
+        elapsed = time.perf_counter() - start
+        
+        nesting = self.create({
+            'name': self._nesting_name(jobs),
+            'stock_sheet_id': jobs[0].stock_sheet_id.id,
+            'options_id': jobs[0].options_id.id,
+            'sheet_usage_ratio': float(result['usage_ratio'] * 100),
+            'waste_area': float(result['waste_area']),
+            'total_panels': int(result['total_panels']),
+            'sheet_count': int(result['sheet_count']),
+            'unplaced_panels': int(result['unplaced_panels']),
+            'stock_cost': float(sum(result.get('sheet_costs') or [])),
+            'sheet_lower_bound': sheet_bound,
+            'optimality_gap': optimality_gap(result['sheet_count'], sheet_bound, result['unplaced_panels']),
+            'optimization_time': elapsed,
+            'placement_data': Job._placement_layout(drawing_panels, stock_sheet, options, drawn_sheets, sheet_sizes,
+                                                    sheet_stock),
+        })
+        
+        # Sheets and placed panels per job, in one pass over the plan
+        job_sheet_numbers = {job_id: {} for job_id, _panels in job_panels}
+        for number, sheet in enumerate(sheets):
+            for job_id, *_placement in sheet:
+                job_sheet_numbers[job_id][number] = job_sheet_numbers[job_id].get(number, 0) + 1
+        job_unplaced = dict.fromkeys(job_sheet_numbers, 0)
+        for (job_id, _index), quantity in unplaced.items():
+            job_unplaced[job_id] += quantity
+        
+        values = {}
+        for position, (job_id, _panels) in enumerate(job_panels):
+            job = Job.browse(job_id)
+            job_sheets = sorted(job_sheet_numbers[job_id])
+            job_area = sum(sheet_areas[number] for number in job_sheets)
+            job_used = sum(used_areas[number] for number in job_sheets)
+            job_result = {
+                'usage_ratio': job_used / job_area if job_area else 0.0,
+                'waste_area': job_area - job_used,
+                'total_panels': sum(job_sheet_numbers[job_id].values()),
+                'sheet_count': len(job_sheets),
+                'unplaced_panels': job_unplaced[job_id],
+                'placements': [drawn_sheets[number] for number in job_sheets],
+                'sheet_sizes': [sheet_sizes[number] for number in job_sheets],
+                'sheet_costs': [sheet_costs[number] for number in job_sheets],
+                'sheet_stock': [sheet_stock[number] for number in job_sheets] if sheet_stock else [],
+                # The cached result and its PDF are those of the whole nest
+                'fingerprint': False,
+                'from_cache': result['from_cache'],
+                # The bound covers the whole nest, see the nesting
+                'sheet_bound': 0,
+                'stats': result['stats'],
+                # The trace covers the whole nest, it is attached to the first job only
+                'trace': result.get('trace') if not position else None,
+            }
+            job_values = job._optimization_values(job_result, drawing_panels, stock_sheet, options,
+                                                  preparation_time, elapsed)
+            values[job] = dict(job_values, nesting_id=nesting.id)
+        errors = jobs._write_optimization_values(values)
+        if errors:
+            raise ValueError(_("The results of jobs %s could not be written.",
+                               ', '.join(names[job_id] for job_id in errors)))
+        return nesting
+    
+    @api.model
+    def _nesting_name(self, jobs):
+        """Name of a nesting after its jobs."""
+        names = jobs.mapped('name')
+        if len(names) <= 3:
+            return ' + '.join(names)
+        return _("%s + %s other jobs", names[0], len(names) - 1)
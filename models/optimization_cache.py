@@ -0,0 +1,227 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+
+from psycopg2 import IntegrityError
+
+from odoo import models, fields, api
+
+_logger = logging.getLogger(__name__)
+
+# Bump when the optimizer changes in a way that makes stored results stale
+CACHE_FORMAT_VERSION = 6
+
+# Options that only change how fast a result is found, not the result itself
+RESULT_NEUTRAL_OPTIONS = {
+    'vectorized_scoring', 'parallel_workers', 'run_in_background', 'profile_optimization', 'debug_trace',
+    'warm_start',
+}
+
+# Seconds between two writes of the hit and miss counts of a process, see _flush_counters
+COUNTER_FLUSH_INTERVAL = 60
+
+# Counts not written yet, per database: {dbname: ({config parameter key: count}, {cache entry id: hits})}
+_pending_counts = {}
+_pending_lock = threading.Lock()
+# Held by the one thread of the process writing the counts
+_flush_lock = threading.Lock()
+# Time of the last write of the counts, per database
+_last_flush = {}
+
+
+class OptimizationCache(models.Model):
+    _name = 'cutting.optimization.cache'
+    _description = 'Cached Cutting Stock Optimization Result'
+    _rec_name = 'fingerprint'
+    _order = 'last_used desc, id desc'
+    
+    fingerprint = fields.Char('Fingerprint', required=True, index=True, readonly=True)
+    result = fields.Text('Result', readonly=True, help="JSON encoded optimization result and placements")
+    pattern_pdf = fields.Binary('Cutting Pattern PDF', readonly=True, attachment=True)
+    size = fields.Integer('Size (bytes)', readonly=True)
+    hit_count = fields.Integer('Hits', readonly=True, default=0)
+    last_used = fields.Datetime('Last Used', readonly=True, index=True, default=fields.Datetime.now)
+    
+    _sql_constraints = [
+        ('fingerprint_unique', 'unique(fingerprint)', 'A cached result already exists for this fingerprint.'),
+    ]
+    
+    @api.model
+    def _fingerprint(self, panels, stock_sheet, options):
+        """
+        Canonical hash of the optimization inputs. Panels are sorted so the line
+        order does not matter. Returns (fingerprint, order) where order[i] is the
+        index in panels of the i-th panel in canonical order.
+        """
+        labels = bool(options.get('labels_on_panels'))
+        
+        def panel_key(panel):
+            return (
+                round(float(panel['length']), 6),
+                round(float(panel['width']), 6),
+                int(panel['quantity']),
+                panel['grain_direction'] or 'none',
+                str(panel['material']),
+                # Labels are drawn on the PDF, so they only matter when shown
+                (panel['label'] or '') if labels else '',
+            )
+        
+        keys = [panel_key(panel) for panel in panels]
+        order = sorted(range(len(panels)), key=lambda i: keys[i])
+        payload = {
+            'version': CACHE_FORMAT_VERSION,
+            'panels': [keys[i] for i in order],
+            'sheet': [
+                round(float(stock_sheet['length']), 6),
+                round(float(stock_sheet['width']), 6),
+                int(stock_sheet['quantity']),
+                str(stock_sheet['material']),
+                stock_sheet['grain_direction'] or 'none',
+                stock_sheet['label'] or '',
+                float(stock_sheet.get('cost') or 0.0),
+            ],
+            # Sheets the optimizer may choose from instead, see CuttingJob._add_stock_alternatives
+            'alternatives': stock_sheet.get('alternatives') or [],
+            # Remnants cut first, see CuttingJob._add_remnants
+            'remnants': stock_sheet.get('remnants') or [],
+            # Stock of the other materials, when the job is split by material
+            'material_stock': stock_sheet.get('material_stock') or {},
+            'options': {key: value for key, value in options.items() if key not in RESULT_NEUTRAL_OPTIONS},
+        }
+        encoded = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest(), order
+    
+    @api.model
+    def _lookup(self, fingerprint, order):
+        """Return the cached result for the fingerprint (panel indexes mapped back through order), or None."""
+        entry = self.sudo().search([('fingerprint', '=', fingerprint)], limit=1)
+        if not entry:
+            self._count('cutlist.cache_misses')
+            return None
+        
+        result = json.loads(entry.result)
+        result['placements'] = [
+            [[order[placement[0]]] + placement[1:] for placement in sheet]
+            for sheet in result.get('placements', [])
+        ]
+        result['pdf_data'] = entry.pattern_pdf
+        
+        self._count('cutlist.cache_hits', entry.id)
+        return result
+    
+    @api.model
+    def _store(self, fingerprint, order, result):
+        """Cache a fresh result, then evict the least recently used entries over the limits."""
+        canonical_index = {panel_index: i for i, panel_index in enumerate(order)}
+        stored = {key: value for key, value in result.items() if key != 'pdf_data'}
+        stored['placements'] = [
+            [[canonical_index[placement[0]]] + list(placement[1:]) for placement in sheet]
+            for sheet in result.get('placements', [])
+        ]
+        encoded = json.dumps(stored, separators=(',', ':'))
+        pdf_data = result.get('pdf_data') or False
+        
+        try:
+            # Another job may have cached the same inputs concurrently
+            with self.env.cr.savepoint():
+                self.sudo().create({
+                    'fingerprint': fingerprint,
+                    'result': encoded,
+                    'pattern_pdf': pdf_data,
+                    'size': len(encoded) + (len(pdf_data) if pdf_data else 0),
+                })
+        except IntegrityError:
+            return
+        self._evict()
+    
+    @api.model
+    def _attach_pdf(self, fingerprint, pdf_data):
+        """Keep a PDF rendered later from a cached result, so the next hit does not render it again."""
+        entry = self.sudo().search([('fingerprint', '=', fingerprint), ('pattern_pdf', '=', False)], limit=1)
+        if entry:
+            entry.write({'pattern_pdf': pdf_data, 'size': len(entry.result or '') + len(pdf_data)})
+    
+    @api.model
+    def _evict(self):
+        """Drop least recently used entries beyond cutlist.cache_max_entries or cutlist.cache_max_size_mb."""
+        params = self.env['ir.config_parameter'].sudo()
+        max_entries = int(params.get_param('cutlist.cache_max_entries', 200))
+        max_bytes = int(params.get_param('cutlist.cache_max_size_mb', 100)) * 1024 * 1024
+        
+        self.env.cr.execute("SELECT id, size FROM cutting_optimization_cache ORDER BY last_used DESC, id DESC")
+        total = 0
+        evict_ids = []
+        for position, (entry_id, size) in enumerate(self.env.cr.fetchall()):
+            total += size or 0
+            if position >= max_entries or total > max_bytes:
+                evict_ids.append(entry_id)
+        if evict_ids:
+            self.sudo().browse(evict_ids).unlink()
+    
+    @api.model
+    def _count(self, key, entry_id=None):
+        """
+        Count a hit or a miss (the key of its counter) and a hit of the entry, in memory.
+        The counts are written by _flush_counters once COUNTER_FLUSH_INTERVAL has passed.
+        """
+        dbname = self.env.cr.dbname
+        with _pending_lock:
+            counters, hits = _pending_counts.setdefault(dbname, ({}, {}))
+            counters[key] = counters.get(key, 0) + 1
+            if entry_id:
+                hits[entry_id] = hits.get(entry_id, 0) + 1
+            due = time.monotonic() - _last_flush.setdefault(dbname, time.monotonic()) >= COUNTER_FLUSH_INTERVAL
+        if due:
+            self._flush_counters()
+    
+    @api.model
+    def _flush_counters(self):
+        """
+        Write the counts of this process: the hit and miss counters, and the hit count and last
+        use of the entries. This runs in a short transaction of its own, so that concurrent jobs
+        do not lock the counter rows for the length of their optimizations. It runs in one thread
+        of the process at a time, the others skip it, so lookups never open extra cursors of
+        their own. Counts of a process that stops before writing them are lost.
+        """
+        if not _flush_lock.acquire(blocking=False):
+            return
+        try:
+            dbname = self.env.cr.dbname
+            with _pending_lock:
+                counters, hits = _pending_counts.pop(dbname, ({}, {}))
+                _last_flush[dbname] = time.monotonic()
+            if not counters and not hits:
+                return
+            try:
+                with self.env.registry.cursor() as cr:
+                    for key, count in sorted(counters.items()):
+                        cr.execute(
+                            "UPDATE ir_config_parameter "
+                            "SET value = (COALESCE(NULLIF(value, ''), '0')::bigint + %s)::varchar WHERE key = %s",
+                            (count, key))
+                    for entry_id, count in sorted(hits.items()):
+                        cr.execute(
+                            "UPDATE cutting_optimization_cache SET hit_count = hit_count + %s, "
+                            "last_used = (now() at time zone 'UTC') WHERE id = %s", (count, entry_id))
+            except Exception:
+                _logger.warning("Could not write the optimization cache counters", exc_info=True)
+        finally:
+            _flush_lock.release()
+    
+    @api.model
+    def get_cache_statistics(self):
+        """Hit and miss counters plus the current size of the cache."""
+        self._flush_counters()
+        params = self.env['ir.config_parameter'].sudo().search_read(
+            [('key', 'in', ('cutlist.cache_hits', 'cutlist.cache_misses'))], ['key', 'value'])
+        counters = {param['key']: int(param['value'] or 0) for param in params}
+        self.env.cr.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cutting_optimization_cache")
+        entries, size = self.env.cr.fetchone()
+        return {
+            'hits': counters.get('cutlist.cache_hits', 0),
+            'misses': counters.get('cutlist.cache_misses', 0),
+            'entries': entries,
+            'size': size,
+        }
@@ -12,19 +12,126 @@ class OptimizerOptions(models.Model):
     labels_on_panels = fields.Boolean('Show Labels on Panels', default=True, 
                                      help="Show panel labels in the cutting pattern visualization")
     use_single_sheet = fields.Boolean('Use Single Sheet', default=True, 
-                                    help="Optimize for a single stock sheet")
+                                    help="Optimize for a single stock sheet. When disabled, additional sheets are "
+                                         "opened until every panel is placed or the available quantity runs out")
+    stock_selection = fields.Selection([
+        ('job', "Job's Stock Sheet"),
+        ('cost', 'Cheapest Stock Mix'),
+    ], string='Stock Selection', default='job', required=True,
+        help="Cut every job from its own stock sheet, or choose among all the active stock sheets of its "
+             "material the sizes and quantities that cost the least. Sheets without a cost are compared "
+             "by area. Only with several sheets per job")
+    use_remnants = fields.Boolean('Cut From Remnants First', default=False,
+                                  help="Place panels on the available remnants of earlier jobs before opening "
+                                       "new stock sheets")
+    keep_remnants = fields.Boolean('Record Remnants', default=False,
+                                   help="When a job is done, record the offcuts of its sheets that reach the "
+                                        "minimum remnant size as remnants for later jobs")
+    remnant_min_length = fields.Float('Minimum Remnant Length', default=300.0,
+                                      help="Shortest longer side of an offcut kept as a remnant")
+    remnant_min_width = fields.Float('Minimum Remnant Width', default=100.0,
+                                     help="Shortest shorter side of an offcut kept as a remnant")
     consider_material = fields.Boolean('Consider Material Compatibility', default=True, 
-                                     help="Only place panels on compatible stock sheet materials")
+                                     help="Split the job by panel material and cut each material from a stock "
+                                          "sheet of that material")
     edge_banding = fields.Boolean('Consider Edge Banding', default=False, 
                                 help="Take edge banding requirements into account")
     consider_grain = fields.Boolean('Consider Grain Direction', default=False, 
                                    help="Respect grain direction constraints")
+    vectorized_scoring = fields.Boolean('Vectorized Fit Scoring', default=False,
+                                        help="Score free rectangles with NumPy arrays instead of the sorted index")
+    parallel_workers = fields.Integer('Parallel Workers', default=0,
+                                      help="Evaluate the optimization strategies in a pool of this many processes. "
+                                           "0 or 1 runs them one after another. Every process starts a fresh "
+                                           "interpreter, which only pays off for jobs taking seconds")
+    search_time_limit = fields.Float('Search Time Limit (s)', default=0.0,
+                                     help="Wall-clock seconds spent on randomized search for a better layout "
+                                          "after the fixed strategies. 0 disables the search")
+    search_max_iterations = fields.Integer('Search Iteration Limit', default=0,
+                                           help="Stop the search after this many layouts, 0 for no limit. "
+                                                "Set it together with the seed to get reproducible results")
+    search_seed = fields.Integer('Search Seed', default=0,
+                                 help="Random seed for the search, the same seed explores the same layouts")
+    optimization_mode = fields.Selection([
+        ('heuristic', 'Heuristic (MaxRects)'),
+        ('exact', 'Exact (Column Generation)'),
+    ], string='Optimization Mode', default='heuristic', required=True,
+        help="Exact mode improves on the heuristic result with column generation over guillotine patterns "
+             "and an integer program minimizing the sheets used. Slower, for expensive sheet materials")
+    solver_time_limit = fields.Float('Solver Time Limit (s)', default=60.0,
+                                     help="Wall-clock seconds for the exact mode. When it runs out, the best "
+                                          "plan found so far is used, at worst the heuristic one")
+    solver_mip_gap = fields.Float('Relative MIP Gap', default=0.01, digits=(16, 4),
+                                  help="The integer program stops once its solution is proven within this "
+                                       "fraction of the optimum, 0.01 meaning 1%")
+    placement_heuristic = fields.Selection([
+        ('bssf', 'Best Short Side Fit'),
+        ('blsf', 'Best Long Side Fit'),
+        ('baf', 'Best Area Fit'),
+        ('bl', 'Bottom Left'),
+        ('contact_point', 'Contact Point'),
+    ], string='Placement Heuristic', default='bssf', required=True,
+        help="Where the MaxRects packer puts each panel: in the free space whose shorter or longer "
+             "leftover side is smallest, with the least leftover area, as low as possible, or where "
+             "it touches the sheet edges and other panels the most. Contact Point is the slowest")
+    packing_engine = fields.Selection([
+        ('maxrects', 'MaxRects'),
+        ('guillotine', 'Guillotine'),
+        ('both', 'Both'),
+    ], string='Packing Engine', default='maxrects', required=True,
+        help="Guillotine only makes layouts a panel saw can cut with edge-to-edge cuts, and comes with "
+             "a cut sequence. Both tries every strategy with each packer and keeps the best layout")
+    guillotine_split = fields.Selection([
+        ('shorter_leftover', 'Shorter Leftover Axis'),
+        ('longer_leftover', 'Longer Leftover Axis'),
+        ('shorter_axis', 'Shorter Axis'),
+        ('longer_axis', 'Longer Axis'),
+        ('min_area', 'Minimize Area'),
+        ('max_area', 'Maximize Area'),
+    ], string='Guillotine Split Rule', default='shorter_leftover', required=True,
+        help="How the guillotine packer cuts the free space next to a placed panel: along the axis with "
+             "the shorter or longer leftover, the shorter or longer side of the free space, or so that "
+             "the smaller offcut is as small or as large as possible")
+    block_packing = fields.Boolean('Block Packing', default=True,
+                                   help="Cut whole sheets of panel types with enough identical panels to fill "
+                                        "a sheet as a few homogeneous blocks, computed once per type. Makes "
+                                        "jobs with thousands of identical panels fast")
+    renderer = fields.Selection([
+        ('vector', 'Built-in Vector Renderer'),
+        ('matplotlib', 'Matplotlib'),
+    ], string='Pattern Renderer', default='vector', required=True,
+        help="How the cutting pattern PDF is drawn. Matplotlib is slower and must be installed, "
+             "the built-in renderer is used when it is not")
+    profile_optimization = fields.Boolean('Capture Profile', default=False,
+                                          help="Run optimizations under cProfile and attach the report to the "
+                                               "cutting job. Slows the optimization down, and bypasses the result cache")
+    debug_trace = fields.Boolean('Capture Placement Trace', default=False,
+                                 help="Record every placement attempt of every strategy and attach the trace "
+                                      "to the cutting job as a log file. Bypasses the result cache")
+    warm_start = fields.Boolean('Reuse Previous Plan', default=True,
+                                help="Optimize a job again from its previous cutting plan: panels removed free "
+                                     "their space, panels added go into the free space or on new sheets, and "
+                                     "only the sheets touched are packed again. Not in exact mode")
+    run_in_background = fields.Boolean('Run in Background', default=False,
+                                       help="Queue optimizations for the background runner instead of "
+                                            "running them while the user waits")
     notes = fields.Text('Notes')
     active = fields.Boolean('Active', default=True)
     
     # Used in cutting jobs
     cutting_job_ids = fields.One2many('cutting.job', 'options_id', string='Cutting Jobs')
     
+    @api.constrains('parallel_workers', 'search_time_limit', 'search_max_iterations',
+                    'solver_time_limit', 'solver_mip_gap')
+    def _check_limits(self):
+        for options in self:
+            if options.parallel_workers < 0:
+                raise models.ValidationError("Parallel workers cannot be negative.")
+            if options.search_time_limit < 0 or options.search_max_iterations < 0:
+                raise models.ValidationError("Search limits cannot be negative.")
+            if options.solver_time_limit < 0 or options.solver_mip_gap < 0:
+                raise models.ValidationError("Solver limits cannot be negative.")
+    
     def copy(self, default=None):
         default = dict(default or {})
         default.update({
@@ -1,23 +1,47 @@
 import numpy as np
-import pulp
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-from matplotlib.backends.backend_pdf import PdfPages
-from dataclasses import dataclass
+from array import array
+from dataclasses import asdict, dataclass
 from typing import List, Dict, Tuple, Optional, Set
+from bisect import bisect_left, bisect_right
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+import logging
 import random
 import time
-import copy
 
-@dataclass
+from .bounds import sheet_bound
+from .process_pool import process_pool
+
+_logger = logging.getLogger(__name__)
+
+# (panel type, count) runs of identical panels, the demand the strategies pack in order
+PanelRuns = List[Tuple[int, int]]
+
+class NoValidPatternError(ValueError):
+    """No strategy placed any panel on the stock sheet."""
+
 class Panel:
     """Represents a panel to be cut from the stock sheet."""
-    length: float
-    width: float
-    quantity: int
-    label: str = ""
-    material: str = "default"
-    grain_direction: str = "none"  # "horizontal", "vertical", "none"
+    # Slots by hand, dataclass(slots=True) needs Python 3.10
+    __slots__ = ('length', 'width', 'quantity', 'label', 'material', 'grain_direction')
+    
+    def __init__(self, length: float, width: float, quantity: int, label: str = "", material: str = "default",
+                 grain_direction: str = "none"):
+        self.length = length
+        self.width = width
+        self.quantity = quantity
+        self.label = label
+        self.material = material
+        self.grain_direction = grain_direction  # "horizontal", "vertical", "none"
+    
+    def __repr__(self):
+        return (f"Panel(length={self.length!r}, width={self.width!r}, quantity={self.quantity!r}, "
+                f"label={self.label!r}, material={self.material!r}, grain_direction={self.grain_direction!r})")
+    
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
     
     def area(self) -> float:
         """Calculate the area of the panel."""
@@ -29,15 +53,27 @@ class Panel:
             return True
         return False
 
-@dataclass
 class StockSheet:
     """Represents a stock sheet from which panels will be cut."""
-    length: float
-    width: float
-    quantity: int = 1
-    material: str = "default"
-    label: str = "Stock"
-    grain_direction: str = "none"
+    __slots__ = ('length', 'width', 'quantity', 'material', 'label', 'grain_direction')
+    
+    def __init__(self, length: float, width: float, quantity: int = 1, material: str = "default",
+                 label: str = "Stock", grain_direction: str = "none"):
+        self.length = length
+        self.width = width
+        self.quantity = quantity
+        self.material = material
+        self.label = label
+        self.grain_direction = grain_direction
+    
+    def __repr__(self):
+        return (f"StockSheet(length={self.length!r}, width={self.width!r}, quantity={self.quantity!r}, "
+                f"material={self.material!r}, label={self.label!r}, grain_direction={self.grain_direction!r})")
+    
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
     
     def area(self) -> float:
         """Calculate the area of the stock sheet."""
@@ -52,18 +88,54 @@ class OptimizerOptions:
     consider_material: bool = True
     edge_banding: bool = False
     consider_grain: bool = False
+    vectorized: bool = False  # score free rectangles with NumPy instead of the sorted index
+    parallel_workers: int = 0  # evaluate strategies in a process pool when greater than 1
+    search_time_limit: float = 0.0  # seconds of randomized search after the fixed strategies
+    search_max_iterations: int = 0  # cap on search iterations, 0 for no cap
+    search_seed: int = 0
+    trace: bool = False  # record every placement attempt in EnhancedCuttingStockOptimizer.trace
+    optimization_mode: str = "heuristic"  # "heuristic" or "exact", see column_generation.py
+    solver_time_limit: float = 60.0  # seconds for column generation and the integer master
+    solver_mip_gap: float = 0.01  # relative gap at which the integer master stops
+    packing_engine: str = "maxrects"  # "maxrects", "guillotine" (edge-to-edge cuts only) or "both"
+    guillotine_split: str = "shorter_leftover"  # split rule of the guillotine packer, see guillotine.py
+    placement_heuristic: str = "bssf"  # MaxRects placement rule, one of PLACEMENT_HEURISTICS
+    block_packing: bool = True  # cut whole sheets of large identical panel groups as blocks, see blocks.py
 
 @dataclass
 class PlacedPanel:
-    """Represents a panel placed on the stock sheet."""
+    """A panel placed on the stock sheet, built on demand from a CuttingPattern's arrays."""
+    __slots__ = ('panel', 'x', 'y', 'rotated', 'panel_id')
     panel: Panel
     x: float
     y: float
     rotated: bool
     panel_id: int
 
+class OptimizerStats:
+    """Call counts and cumulative wall time per instrumented phase of an optimization run."""
+    __slots__ = ('calls', 'seconds')
+    
+    def __init__(self):
+        self.calls: Dict[str, int] = {}
+        self.seconds: Dict[str, float] = {}
+    
+    def add(self, phase: str, seconds: float, calls: int = 1) -> None:
+        self.calls[phase] = self.calls.get(phase, 0) + calls
+        self.seconds[phase] = self.seconds.get(phase, 0.0) + seconds
+    
+    def merge(self, other: 'OptimizerStats') -> None:
+        for phase, calls in other.calls.items():
+            self.add(phase, other.seconds[phase], calls)
+    
+    def as_rows(self) -> List[Tuple[str, int, float]]:
+        """(phase, calls, seconds) in the order the phases were first recorded."""
+        return [(phase, calls, self.seconds[phase]) for phase, calls in self.calls.items()]
+
 class Rectangle:
     """Represents a rectangle in the maximal rectangles algorithm."""
+    __slots__ = ('x', 'y', 'width', 'height')
+    
     def __init__(self, x, y, width, height):
         self.x = x
         self.y = y
@@ -89,26 +161,402 @@ class Rectangle:
             return None
             
         return Rectangle(x1, y1, x2 - x1, y2 - y1)
+    
+    def difference(self, used: 'Rectangle') -> List['Rectangle']:
+        """
+        Maximal rectangles of this rectangle outside the overlapping used one: the
+        full height strips left and right of it and the full width strips below and above.
+        """
+        pieces = []
+        right, top = self.x + self.width, self.y + self.height
+        used_right, used_top = used.x + used.width, used.y + used.height
+        if used.x > self.x:
+            pieces.append(Rectangle(self.x, self.y, used.x - self.x, self.height))
+        if used_right < right:
+            pieces.append(Rectangle(used_right, self.y, right - used_right, self.height))
+        if used.y > self.y:
+            pieces.append(Rectangle(self.x, self.y, self.width, used.y - self.y))
+        if used_top < top:
+            pieces.append(Rectangle(self.x, used_top, self.width, top - used_top))
+        return pieces
+
+# Placement heuristics scoring a width x height panel in the bottom left corner of a free
+# rectangle, the lowest (primary, secondary) score wins. Best short side fit has its own
+# indexed search, contact point is scored by MaxRectsOptimizer against the placed panels.
+PLACEMENT_HEURISTICS = ('bssf', 'blsf', 'baf', 'bl', 'contact_point')
+FIT_SCORES = {
+    'blsf': lambda rect, width, height: (max(rect.width - width, rect.height - height),
+                                         min(rect.width - width, rect.height - height)),
+    'baf': lambda rect, width, height: (rect.width * rect.height - width * height,
+                                        min(rect.width - width, rect.height - height)),
+    'bl': lambda rect, width, height: (rect.y + height, rect.x),
+}
+
+class FreeRectangleIndex:
+    """
+    Store of free rectangles for the maximal rectangles algorithm.
+    Rectangles are kept sorted by width and by height so that fit queries and
+    containment pruning only visit the candidates that can possibly match.
+    Iteration yields the rectangles in insertion order.
+    """
+    def __init__(self, rectangles=None):
+        self._next_key = 0
+        self._rects: Dict[int, Rectangle] = {}
+        self._keys: Dict[int, int] = {}
+        self._by_width: List[Tuple[float, int]] = []
+        self._by_height: List[Tuple[float, int]] = []
+        for rect in rectangles or []:
+            self.insert(rect)
+    
+    def __len__(self):
+        return len(self._rects)
+    
+    def __iter__(self):
+        return iter(list(self._rects.values()))
+    
+    def insert(self, rect: Rectangle) -> None:
+        """Add a rectangle without any containment check."""
+        key = self._next_key
+        self._next_key += 1
+        self._rects[key] = rect
+        self._keys[id(rect)] = key
+        self._by_width.insert(bisect_left(self._by_width, (rect.width, key)), (rect.width, key))
+        self._by_height.insert(bisect_left(self._by_height, (rect.height, key)), (rect.height, key))
+    
+    def remove(self, rect: Rectangle) -> None:
+        key = self._keys.pop(id(rect))
+        del self._rects[key]
+        del self._by_width[bisect_left(self._by_width, (rect.width, key))]
+        del self._by_height[bisect_left(self._by_height, (rect.height, key))]
+    
+    def add(self, rect: Rectangle, prune_contained: bool = True) -> bool:
+        """
+        Add a rectangle while keeping the store free of contained rectangles.
+        Returns False if the rectangle is already covered by a stored one. Without
+        prune_contained the caller guarantees that it covers no stored rectangle.
+        """
+        # Only rectangles at least as large in both dimensions can contain it
+        lo_w = bisect_left(self._by_width, (rect.width, -1))
+        lo_h = bisect_left(self._by_height, (rect.height, -1))
+        if len(self._by_width) - lo_w <= len(self._by_height) - lo_h:
+            candidates, start = self._by_width, lo_w
+        else:
+            candidates, start = self._by_height, lo_h
+        rects = self._rects
+        x, y = rect.x, rect.y
+        right, top = x + rect.width, y + rect.height
+        for i in range(start, len(candidates)):
+            other = rects[candidates[i][1]]
+            if (other.x <= x and other.y <= y and right <= other.x + other.width
+                    and top <= other.y + other.height):
+                return False
+        if not prune_contained:
+            self.insert(rect)
+            return True
+        
+        # Only rectangles at most as large in both dimensions can be contained
+        hi_w = bisect_right(self._by_width, (rect.width, self._next_key))
+        hi_h = bisect_right(self._by_height, (rect.height, self._next_key))
+        if hi_w <= hi_h:
+            candidates = self._by_width[:hi_w]
+        else:
+            candidates = self._by_height[:hi_h]
+        for _, key in candidates:
+            other = self._rects[key]
+            if self._contains(rect, other):
+                self.remove(other)
+        
+        self.insert(rect)
+        return True
+    
+    def best_short_side_fit(self, width: float, height: float) -> Optional[Tuple[float, int]]:
+        """
+        Find the rectangle with the smallest short leftover side for a width x height
+        panel. Returns (score, key) or None if nothing fits; ties go to the oldest
+        rectangle, exactly like a linear scan in insertion order.
+        """
+        rects = self._rects
+        
+        # Narrowest rectangle that is wide and tall enough gives the smallest width leftover
+        by_width = self._by_width
+        start_w = bisect_left(by_width, (width, -1))
+        best_w = None
+        for i in range(start_w, len(by_width)):
+            if rects[by_width[i][1]].height >= height:
+                start_w = i
+                best_w = by_width[i][0] - width
+                break
+        if best_w is None:
+            return None
+        
+        # Lowest rectangle that is wide and tall enough gives the smallest height leftover
+        by_height = self._by_height
+        start_h = bisect_left(by_height, (height, -1))
+        best_h = None
+        for i in range(start_h, len(by_height)):
+            if rects[by_height[i][1]].width >= width:
+                start_h = i
+                best_h = by_height[i][0] - height
+                break
+        
+        score = min(best_w, best_h)
+        best_key = None
+        if best_w == score:
+            for i in range(start_w, len(by_width)):
+                w, key = by_width[i]
+                if w - width != score:
+                    break
+                if rects[key].height >= height and (best_key is None or key < best_key):
+                    best_key = key
+        if best_h == score:
+            for i in range(start_h, len(by_height)):
+                h, key = by_height[i]
+                if h - height != score:
+                    break
+                if rects[key].width >= width and (best_key is None or key < best_key):
+                    best_key = key
+        return score, best_key
+    
+    def subtract(self, used: Rectangle) -> List[Rectangle]:
+        """
+        Remove every rectangle overlapping the used area and return their pieces outside
+        of it, to be added back (and pruned) by the caller.
+        """
+        used_right, used_top = used.x + used.width, used.y + used.height
+        overlapping = [rect for rect in self._rects.values()
+                       if rect.x < used_right and used.x < rect.x + rect.width
+                       and rect.y < used_top and used.y < rect.y + rect.height]
+        pieces = []
+        for rect in overlapping:
+            self.remove(rect)
+            pieces.extend(rect.difference(used))
+        return pieces
+    
+    def find_best_fit(self, sizes: List[Tuple[float, float]],
+                      heuristic: str = 'bssf') -> Optional[Tuple[Rectangle, int]]:
+        """
+        Find the best fit by the placement heuristic over all candidate sizes (one per
+        orientation). Returns (rectangle, index into sizes) or None if nothing fits.
+        """
+        if heuristic != 'bssf':
+            # Scan in insertion order, ties go to the oldest rectangle, then to the earlier orientation
+            score = FIT_SCORES[heuristic]
+            best = None
+            best_score = None
+            for rect in self._rects.values():
+                for orientation, (width, height) in enumerate(sizes):
+                    if width <= rect.width and height <= rect.height:
+                        fit = score(rect, width, height)
+                        if best_score is None or fit < best_score:
+                            best, best_score = (rect, orientation), fit
+            return best
+        
+        best = None
+        for orientation, (width, height) in enumerate(sizes):
+            fit = self.best_short_side_fit(width, height)
+            # Ties go to the oldest rectangle, then to the earlier orientation
+            if fit is not None and (best is None or fit < best[:2]):
+                best = (fit[0], fit[1], orientation)
+        if best is None:
+            return None
+        return self._rects[best[1]], best[2]
+    
+    @staticmethod
+    def _contains(outer: Rectangle, inner: Rectangle) -> bool:
+        return (inner.x >= outer.x and 
+                inner.y >= outer.y and 
+                inner.x + inner.width <= outer.x + outer.width and 
+                inner.y + inner.height <= outer.y + outer.height)
+
+class ArrayFreeRectangles:
+    """
+    Array-backed store of free rectangles for the maximal rectangles algorithm.
+    The rectangles live in one contiguous (n, 4) NumPy array of x, y, width, height
+    in insertion order, so fit scoring and containment pruning are single vectorized passes.
+    """
+    def __init__(self, rectangles=None, capacity: int = 64):
+        self._data = np.empty((capacity, 4), dtype=np.float64)
+        self._rects: List[Rectangle] = []
+        for rect in rectangles or []:
+            self.insert(rect)
+    
+    def __len__(self):
+        return len(self._rects)
+    
+    def __iter__(self):
+        return iter(list(self._rects))
+    
+    def insert(self, rect: Rectangle) -> None:
+        """Add a rectangle without any containment check."""
+        n = len(self._rects)
+        if n == len(self._data):
+            data = np.empty((2 * n, 4), dtype=np.float64)
+            data[:n] = self._data
+            self._data = data
+        self._data[n] = (rect.x, rect.y, rect.width, rect.height)
+        self._rects.append(rect)
+    
+    def remove(self, rect: Rectangle) -> None:
+        n = len(self._rects)
+        pos = self._rects.index(rect)
+        self._data[pos:n - 1] = self._data[pos + 1:n]
+        del self._rects[pos]
+    
+    def add(self, rect: Rectangle, prune_contained: bool = True) -> bool:
+        """
+        Add a rectangle while keeping the store free of contained rectangles.
+        Returns False if the rectangle is already covered by a stored one. Without
+        prune_contained the caller guarantees that it covers no stored rectangle.
+        """
+        n = len(self._rects)
+        if n:
+            data = self._data[:n]
+            x, y = data[:, 0], data[:, 1]
+            right, top = x + data[:, 2], y + data[:, 3]
+            rect_right, rect_top = rect.x + rect.width, rect.y + rect.height
+            
+            if np.any((x <= rect.x) & (y <= rect.y) & (right >= rect_right) & (top >= rect_top)):
+                return False
+            
+            if not prune_contained:
+                self.insert(rect)
+                return True
+            contained = (x >= rect.x) & (y >= rect.y) & (right <= rect_right) & (top <= rect_top)
+            if contained.any():
+                keep = ~contained
+                kept = data[keep]
+                self._data[:len(kept)] = kept
+                self._rects = [r for r, k in zip(self._rects, keep) if k]
+        
+        self.insert(rect)
+        return True
+    
+    def subtract(self, used: Rectangle) -> List[Rectangle]:
+        """
+        Remove every rectangle overlapping the used area and return their pieces outside
+        of it, to be added back (and pruned) by the caller.
+        """
+        n = len(self._rects)
+        data = self._data[:n]
+        x, y = data[:, 0], data[:, 1]
+        overlapping = ((x < used.x + used.width) & (used.x < x + data[:, 2])
+                       & (y < used.y + used.height) & (used.y < y + data[:, 3]))
+        if not overlapping.any():
+            return []
+        pieces = []
+        for rect, overlaps in zip(self._rects, overlapping):
+            if overlaps:
+                pieces.extend(rect.difference(used))
+        keep = ~overlapping
+        kept = data[keep]
+        self._data[:len(kept)] = kept
+        self._rects = [rect for rect, k in zip(self._rects, keep) if k]
+        return pieces
+    
+    def find_best_fit(self, sizes: List[Tuple[float, float]],
+                      heuristic: str = 'bssf') -> Optional[Tuple[Rectangle, int]]:
+        """
+        Find the best fit by the placement heuristic over all rectangles and candidate
+        sizes in one pass. Returns (rectangle, index into sizes) or None if nothing fits.
+        """
+        n = len(self._rects)
+        if not n:
+            return None
+        data = self._data[:n]
+        sizes = np.asarray(sizes, dtype=np.float64)
+        
+        # Leftovers for every (rectangle, orientation) pair, shape (n, len(sizes))
+        leftover_width = data[:, 2:3] - sizes[:, 0]
+        leftover_height = data[:, 3:4] - sizes[:, 1]
+        short_side = np.minimum(leftover_width, leftover_height)
+        if heuristic == 'bssf':
+            scores, secondary = short_side, None
+        elif heuristic == 'blsf':
+            scores, secondary = np.maximum(leftover_width, leftover_height), short_side
+        elif heuristic == 'baf':
+            scores, secondary = (data[:, 2:3] * data[:, 3:4]) - sizes[:, 0] * sizes[:, 1], short_side
+        else:
+            scores, secondary = data[:, 1:2] + sizes[:, 1], np.broadcast_to(data[:, 0:1], short_side.shape)
+        fits = (leftover_width >= 0) & (leftover_height >= 0)
+        scores = np.where(fits, scores, np.inf)
+        if secondary is not None:
+            # Break ties on the primary score by the secondary one
+            secondary = np.where(fits & (scores == scores.min()), secondary, np.inf)
+            scores = secondary
+        
+        # Row-major argmin keeps the tie-breaking of the scalar scan: oldest rectangle, then orientation
+        best = int(np.argmin(scores))
+        if scores.flat[best] == np.inf:
+            return None
+        rect_pos, orientation = divmod(best, len(sizes))
+        return self._rects[rect_pos], orientation
 
 class CuttingPattern:
-    """Represents a cutting pattern with placed panels."""
-    def __init__(self, stock_sheet: StockSheet):
+    """
+    Represents a cutting pattern with placed panels.
+    
+    Placements are stored as parallel arrays (struct of arrays): the index of the
+    panel type in self.panels, the position, the rotation flag and the panel id.
+    The panel type list (and its id -> index map) is shared with the optimizer that
+    built the pattern and only copied if a panel outside of it is added.
+    """
+    __slots__ = ('stock_sheet', 'panels', 'panel_types', 'xs', 'ys', 'rotated', 'panel_ids',
+                 'waste_area', '_type_index', '_shared_panels')
+    
+    def __init__(self, stock_sheet: StockSheet, panels: Optional[List[Panel]] = None,
+                 type_index: Optional[Dict[int, int]] = None):
         self.stock_sheet = stock_sheet
-        self.placed_panels: List[PlacedPanel] = []
+        self.panels: List[Panel] = panels if panels is not None else []
+        self.panel_types = array('i')
+        self.xs = array('d')
+        self.ys = array('d')
+        self.rotated = array('b')
+        self.panel_ids = array('q')
         self.waste_area: float = stock_sheet.area()
-        
+        if type_index is None:
+            type_index = {id(panel): i for i, panel in enumerate(self.panels)}
+        self._type_index = type_index
+        self._shared_panels = panels is not None
+    
+    def __len__(self) -> int:
+        return len(self.panel_types)
+    
     def add_panel(self, panel: Panel, x: float, y: float, rotated: bool, panel_id: int) -> None:
         """Add a panel to the cutting pattern."""
-        placed_panel = PlacedPanel(panel, x, y, rotated, panel_id)
-        self.placed_panels.append(placed_panel)
+        panel_type = self._type_index.get(id(panel))
+        if panel_type is None:
+            if self._shared_panels:
+                self.panels = list(self.panels)
+                self._type_index = dict(self._type_index)
+                self._shared_panels = False
+            panel_type = len(self.panels)
+            self.panels.append(panel)
+            self._type_index[id(panel)] = panel_type
+        self.add_placement(panel_type, x, y, rotated, panel_id)
+    
+    def add_placement(self, panel_type: int, x: float, y: float, rotated: bool, panel_id: int) -> None:
+        """Add a placement of the panel type with the given index in self.panels."""
+        self.panel_types.append(panel_type)
+        self.xs.append(x)
+        self.ys.append(y)
+        self.rotated.append(rotated)
+        self.panel_ids.append(panel_id)
         
         # Update waste area
-        if rotated:
-            panel_area = panel.width * panel.length
-        else:
-            panel_area = panel.length * panel.width
-        self.waste_area -= panel_area
-        
+        panel = self.panels[panel_type]
+        self.waste_area -= panel.length * panel.width
+    
+    def placements(self):
+        """Iterate over the placements as (panel, x, y, rotated, panel_id) tuples."""
+        panels = self.panels
+        for panel_type, x, y, rotated, panel_id in zip(self.panel_types, self.xs, self.ys, self.rotated, self.panel_ids):
+            yield panels[panel_type], x, y, bool(rotated), panel_id
+    
+    @property
+    def placed_panels(self) -> List[PlacedPanel]:
+        """Placements as PlacedPanel objects, built on each access."""
+        return [PlacedPanel(*placement) for placement in self.placements()]
+    
     def get_usage_ratio(self) -> float:
         """Calculate the usage ratio of the stock sheet."""
         used_area = self.stock_sheet.area() - self.waste_area
@@ -121,44 +569,68 @@ class MaxRectsOptimizer:
     This is a highly efficient algorithm for rectangular packing problems.
     """
     
-    def __init__(self, stock_sheet: StockSheet, kerf_thickness: float, consider_grain: bool):
+    def __init__(self, stock_sheet: StockSheet, kerf_thickness: float, consider_grain: bool,
+                 vectorized: bool = False, panels: Optional[List[Panel]] = None,
+                 panel_index: Optional[Dict[int, int]] = None, stats: Optional[OptimizerStats] = None,
+                 heuristic: str = 'bssf'):
+        if heuristic not in PLACEMENT_HEURISTICS:
+            raise ValueError(f"Unknown placement heuristic {heuristic!r}")
         self.stock_sheet = stock_sheet
         self.kerf_thickness = kerf_thickness
         self.consider_grain = consider_grain
-        self.free_rectangles = [Rectangle(0, 0, stock_sheet.length, stock_sheet.width)]
-        self.placed_panels = []
+        self.stats = stats
+        self.heuristic = heuristic
+        # Areas taken by placed panels including kerf, by the coordinate of each of their edges
+        # ('left', x), ('right', x), ('bottom', y) and ('top', y). Only needed to score contact.
+        self.used_edges: Optional[Dict[Tuple[str, float], List[Rectangle]]] = (
+            {} if heuristic == 'contact_point' else None)
+        sheet_rect = Rectangle(0, 0, stock_sheet.length, stock_sheet.width)
+        if vectorized:
+            self.free_rectangles = ArrayFreeRectangles([sheet_rect])
+        else:
+            self.free_rectangles = FreeRectangleIndex([sheet_rect])
+        # Placements go straight into the pattern handed out by get_pattern
+        self.pattern = CuttingPattern(stock_sheet, panels, panel_index)
+        self.used_area = 0.0  # area covered by placed panels including kerf
         
-    def find_position_for_panel(self, panel: Panel, panel_id: int) -> bool:
+    def find_position_for_panel(self, panel: Panel, panel_id: int, rotation: Optional[bool] = None) -> bool:
         """
-        Find the best position for the panel using the bottom-left rule with best short side fit.
-        Returns True if the panel was placed, False otherwise.
+        Place the panel at the best position if there is one, see _place_panel.
+        Calls and time are recorded when the packer has stats.
+        """
+        if self.stats is None:
+            return self._place_panel(panel, panel_id, rotation)
+        start = time.perf_counter()
+        placed = self._place_panel(panel, panel_id, rotation)
+        self.stats.add('find_position_for_panel', time.perf_counter() - start)
+        return placed
+    
+    def _place_panel(self, panel: Panel, panel_id: int, rotation: Optional[bool] = None) -> bool:
+        """
+        Find the best position for the panel, in the bottom left corner of a free rectangle
+        chosen by the placement heuristic (best short side fit by default). rotation forces the orientation of a rotatable panel (False: as given, True: rotated);
+        None tries both. Returns True if the panel was placed, False otherwise.
         """
-        best_score = float('inf')
-        best_rect = None
-        best_rotated = False
-        
         # Try both orientations if allowed
-        orientations = [(panel.length, panel.width, False)]
-        if panel.can_rotate(self.consider_grain):
+        can_rotate = panel.can_rotate(self.consider_grain)
+        orientations = []
+        if not (rotation and can_rotate):
+            orientations.append((panel.length, panel.width, False))
+        if can_rotate and rotation is not False:
             orientations.append((panel.width, panel.length, True))
         
-        # Try each free rectangle and each orientation
-        for rect in self.free_rectangles:
-            for width, height, rotated in orientations:
-                # Add kerf thickness to panel dimensions
-                total_width = width + self.kerf_thickness
-                total_height = height + self.kerf_thickness
-                
-                if rect.can_fit(total_width, total_height):
-                    # Compute the score (shorter leftover side)
-                    leftover_width = rect.width - total_width
-                    leftover_height = rect.height - total_height
-                    score = min(leftover_width, leftover_height)
-                    
-                    if score < best_score:
-                        best_score = score
-                        best_rect = rect
-                        best_rotated = rotated
+        # Add kerf thickness to panel dimensions
+        sizes = [(width + self.kerf_thickness, height + self.kerf_thickness)
+                 for width, height, _ in orientations]
+        
+        if self.used_edges is not None:
+            fit = self._best_contact_fit(sizes)
+        else:
+            fit = self.free_rectangles.find_best_fit(sizes, self.heuristic)
+        best_rect = None
+        if fit is not None:
+            best_rect, orientation = fit
+            best_rotated = orientations[orientation][2]
         
         # If we found a position, place the panel
         if best_rect:
@@ -173,7 +645,8 @@ class MaxRectsOptimizer:
             total_height = panel_height + self.kerf_thickness
             
             # Place the panel
-            self.placed_panels.append(PlacedPanel(panel, best_rect.x, best_rect.y, best_rotated, panel_id))
+            self.pattern.add_panel(panel, best_rect.x, best_rect.y, best_rotated, panel_id)
+            self.used_area += total_width * total_height
             
             # Update free rectangles
             self.split_rectangle(best_rect, total_width, total_height)
@@ -182,106 +655,316 @@ class MaxRectsOptimizer:
         
         return False
     
+    def _best_contact_fit(self, sizes: List[Tuple[float, float]]) -> Optional[Tuple[Rectangle, int]]:
+        """
+        Contact point heuristic: the position whose edges touch the sheet border and the
+        placed panels the most. Ties go to the oldest rectangle, then to the earlier orientation.
+        """
+        best = None
+        best_contact = -1.0
+        for rect in self.free_rectangles:
+            for orientation, (width, height) in enumerate(sizes):
+                if width <= rect.width and height <= rect.height:
+                    contact = self._contact_length(rect.x, rect.y, width, height)
+                    if contact > best_contact:
+                        best, best_contact = (rect, orientation), contact
+        return best
+    
+    def _contact_length(self, x: float, y: float, width: float, height: float) -> float:
+        """Length of the edges of the given area lying on the sheet border or on a placed panel."""
+        right, top = x + width, y + height
+        contact = 0.0
+        if x == 0 or right == self.stock_sheet.length:
+            contact += height
+        if y == 0 or top == self.stock_sheet.width:
+            contact += width
+        edges = self.used_edges
+        for used in edges.get(('right', x), []) + edges.get(('left', right), []):
+            contact += max(0.0, min(top, used.y + used.height) - max(y, used.y))
+        for used in edges.get(('top', y), []) + edges.get(('bottom', top), []):
+            contact += max(0.0, min(right, used.x + used.width) - max(x, used.x))
+        return contact
+    
     def split_rectangle(self, rect: Rectangle, width: float, height: float) -> None:
         """
-        Split the rectangle after placing a panel and update the list of free rectangles.
-        """
-        # Remove the original rectangle
-        self.free_rectangles.remove(rect)
-        
-        # Create new rectangles (right and top)
-        if rect.width > width:
-            right_rect = Rectangle(rect.x + width, rect.y, rect.width - width, rect.height)
-            self.free_rectangles.append(right_rect)
-        
-        if rect.height > height:
-            top_rect = Rectangle(rect.x, rect.y + height, rect.width, rect.height - height)
-            self.free_rectangles.append(top_rect)
-        
-        # Clean up redundant rectangles
-        self.cleanup_rectangles()
-    
-    def cleanup_rectangles(self) -> None:
-        """
-        Remove redundant rectangles and merge when possible to reduce fragmentation.
-        """
-        # First, remove any rectangle completely contained in another
-        i = 0
-        while i < len(self.free_rectangles):
-            j = i + 1
-            while j < len(self.free_rectangles):
-                rect1 = self.free_rectangles[i]
-                rect2 = self.free_rectangles[j]
-                
-                # Check if rect2 is contained in rect1
-                if (rect2.x >= rect1.x and 
-                    rect2.y >= rect1.y and 
-                    rect2.x + rect2.width <= rect1.x + rect1.width and 
-                    rect2.y + rect2.height <= rect1.y + rect1.height):
-                    del self.free_rectangles[j]
-                    continue
-                
-                # Check if rect1 is contained in rect2
-                if (rect1.x >= rect2.x and 
-                    rect1.y >= rect2.y and 
-                    rect1.x + rect1.width <= rect2.x + rect2.width and 
-                    rect1.y + rect1.height <= rect2.y + rect2.height):
-                    del self.free_rectangles[i]
-                    i -= 1
-                    break
-                
-                j += 1
-            i += 1
+        Update the free rectangles after placing a width x height panel in the bottom left
+        corner of rect: every free rectangle overlapping the panel, not only rect, is split
+        into its maximal pieces around it.
+        """
+        used = Rectangle(rect.x, rect.y, width, height)
+        if self.used_edges is not None:
+            for edge in (('left', used.x), ('right', used.x + width), ('bottom', used.y), ('top', used.y + height)):
+                self.used_edges.setdefault(edge, []).append(used)
+        self.cleanup_rectangles(self.free_rectangles.subtract(used))
+    
+    def cleanup_rectangles(self, new_rectangles: List[Rectangle]) -> None:
+        """
+        Add the new rectangles while removing any rectangle completely contained in another.
+        Only the new ones need checking: the existing free rectangles never contain each other,
+        and a new piece cannot contain one either, as it lies inside a free rectangle that did not.
+        Larger pieces go first, so no new piece can contain one stored before it.
+        """
+        start = time.perf_counter() if self.stats is not None else None
+        for rect in sorted(new_rectangles, key=Rectangle.area, reverse=True):
+            self.free_rectangles.add(rect, prune_contained=False)
+        if start is not None:
+            self.stats.add('cleanup_rectangles', time.perf_counter() - start)
+    
+    def place_run(self, panel: Panel, panel_id: int, count: int, rotation: Optional[bool] = None) -> int:
+        """
+        Place up to count copies of the panel, stopping at the first one that does not fit:
+        free space only shrinks, so the next copies would not fit either. Returns the number
+        of copies placed.
+        """
+        placed = 0
+        while placed < count and self.find_position_for_panel(panel, panel_id, rotation):
+            placed += 1
+        return placed
+    
+    def place_layout(self, panel: Panel, layout, panel_id: int, count: int) -> int:
+        """
+        Place up to count copies of the panel along a block layout (see blocks.py) on this
+        still empty sheet. Every block is subtracted from the free rectangles once, instead
+        of once per panel. Returns the number of panels placed.
+        """
+        if len(self.pattern):
+            raise ValueError("A block layout can only be placed on an empty sheet.")
+        start = time.perf_counter() if self.stats is not None else None
+        count = min(count, layout.count)
+        for x, y, rotated in layout.placements(count):
+            self.pattern.add_panel(panel, x, y, rotated, panel_id)
+        for x, y, columns, rows, rotated in layout.fill(count):
+            width, height = layout.block_size(rotated)
+            self.split_rectangle(Rectangle(x, y, columns * width, rows * height), columns * width, rows * height)
+        self.used_area += count * layout.panel_length * layout.panel_width
+        if start is not None:
+            self.stats.add('place_layout', time.perf_counter() - start)
+        return count
     
     def get_pattern(self) -> CuttingPattern:
         """
-        Convert the current placement to a CuttingPattern.
+        Return the CuttingPattern holding the current placement. It is not copied,
+        so the packer must not place further panels once the pattern is handed out.
         """
-        pattern = CuttingPattern(self.stock_sheet)
-        
-        for placed_panel in self.placed_panels:
-            pattern.add_panel(
-                placed_panel.panel,
-                placed_panel.x,
-                placed_panel.y,
-                placed_panel.rotated,
-                placed_panel.panel_id
-            )
-        
-        return pattern
+        return self.pattern
+
+
+class PlacementTraceMixin:
+    """
+    Records every placement attempt of a packer in a trace list. Only the tracing
+    packer classes use it, so the regular packers pay nothing for it.
+    """
+    
+    def __init__(self, *args, trace: list, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.trace = trace
+    
+    def _place_panel(self, panel: Panel, panel_id: int, rotation: Optional[bool] = None) -> bool:
+        placed = super()._place_panel(panel, panel_id, rotation)
+        if placed:
+            pattern = self.pattern
+            self.trace.append(('place', panel_id, pattern.xs[-1], pattern.ys[-1], bool(pattern.rotated[-1]),
+                               len(self.free_rectangles)))
+        else:
+            self.trace.append(('reject', panel_id, len(self.free_rectangles)))
+        return placed
+    
+    def place_layout(self, panel: Panel, layout, panel_id: int, count: int) -> int:
+        placed = super().place_layout(panel, layout, panel_id, count)
+        if placed:
+            self.trace.append(('layout', panel_id, placed, len(layout.blocks), len(self.free_rectangles)))
+        return placed
+
+
+class TracingMaxRectsOptimizer(PlacementTraceMixin, MaxRectsOptimizer):
+    """MaxRects packer that records every placement attempt, used only when tracing is enabled."""
 
 
 class EnhancedCuttingStockOptimizer:
     """Enhanced cutting stock optimizer using the Maximal Rectangles algorithm."""
     
+    # Panel sort orders tried by the ordering strategies: (sort key, largest first)
+    PANEL_ORDERINGS = [
+        (lambda p: p.area(), True),                     # Sort by area (largest first)
+        (lambda p: 2*(p.length + p.width), True),       # Sort by perimeter (largest first)
+        (lambda p: max(p.length, p.width), True),       # Sort by longest side (largest first)
+        (lambda p: min(p.length, p.width), False),      # Sort by shortest side (smallest first)
+        (lambda p: abs(p.length/p.width - 1), False),   # Sort by aspect ratio (most square first)
+    ]
+    
+    # Length of the late acceptance history used by the randomized search
+    SEARCH_HISTORY_LENGTH = 20
+    
+    # Strategies tried when the job is a single panel type
+    UNIFORM_STRATEGIES = [
+        '_uniform_standard_pattern',
+        '_uniform_block_pattern',
+    ]
+    
     def __init__(self, panels: List[Panel], stock_sheet: StockSheet, options: OptimizerOptions):
         self.panels = panels
+        # id -> position of each panel type, shared by every pattern built from self.panels
+        self.panel_index: Dict[int, int] = {id(panel): i for i, panel in enumerate(panels)}
         self.stock_sheet = stock_sheet
         self.options = options
         self.patterns: List[CuttingPattern] = []
+        self.plans: List[List[CuttingPattern]] = []
+        # (panel type, count) of the panels left out by the selected multi-sheet plan
+        self.unplaced_panels: PanelRuns = []
+        self.uniform_job = False
+        # (panel type, block layout) of the types with enough panels to fill whole sheets, see _block_groups
+        self.block_groups = None
+        self.search_iterations = 0
+        # Whether a time limit stopped a search or solver early: another run may give another result
+        self.time_limited = False
+        # Lower bound on the sheets of a multi-sheet plan, see bounds.py
+        self.sheet_bound = 0
+        # Strategies not run because an earlier one could not be beaten
+        self.strategies_skipped = 0
+        self.stats = OptimizerStats()
+        # Placement events of every strategy when options.trace is set, see MaxRectsOptimizer._place_panel
+        self.trace: Optional[list] = [] if options.trace else None
         
     def optimize(self) -> CuttingPattern:
         """Run the optimization process."""
-        print("Starting optimization with MaxRects algorithm...")
+        _logger.debug("Starting single sheet optimization of %d panel types", len(self.panels))
         
         # Generate patterns
         self._generate_patterns()
         
         # Select the best pattern
         if not self.patterns:
-            raise ValueError("No valid patterns were generated. Try relaxing constraints.")
+            raise NoValidPatternError("No valid patterns were generated. Try relaxing constraints.")
+        
+        # Spend the search budget improving on the best ordering strategy, unless every panel is placed
+        if (self._search_enabled() and not self.uniform_job
+                and not any(self._is_optimal([pattern], [], multi_sheet=False) for pattern in self.patterns)):
+            orderings = [i for i, (strategy, _) in enumerate(self.strategy_tasks) if strategy == '_pack_single_sheet']
+            start = max(orderings, key=lambda i: self.patterns[i].get_usage_ratio())
+            found = self._search_orderings(*self.strategy_tasks[start][1], multi_sheet=False)
+            if found is not None:
+                self.patterns.extend(found[0])
             
         best_pattern = max(self.patterns, key=lambda p: p.get_usage_ratio())
-        print(f"Selected pattern with {best_pattern.get_usage_ratio()*100:.2f}% usage ratio")
+        _logger.debug("Selected pattern with %.2f%% usage ratio", best_pattern.get_usage_ratio() * 100)
         
         return best_pattern
     
+    def optimize_multi(self) -> List[CuttingPattern]:
+        """
+        Run the optimization over as many stock sheets as needed (up to the sheet quantity).
+        Returns one pattern per sheet used; panels that could not be placed
+        are left in self.unplaced_panels.
+        """
+        _logger.debug("Starting multi-sheet optimization of %d panel types", len(self.panels))
+        
+        best_plan = None
+        best_key = None
+        best_index = None
+        best_ordering_key = None
+        self.sheet_bound = self._compute_sheet_bound()
+        tasks = self._strategy_tasks(multi_sheet=True)
+        stop = partial(self._is_optimal, multi_sheet=True)
+        for index, (plan, unplaced) in enumerate(self._evaluate_strategies(tasks, stop)):
+            self.plans.append(plan)
+            
+            key = self._plan_key(plan)
+            if best_key is None or key > best_key:
+                best_plan, best_key = plan, key
+                self.unplaced_panels = unplaced
+            if tasks[index][0] == '_pack_multi_sheet' and (best_ordering_key is None or key > best_ordering_key):
+                best_index, best_ordering_key = index, key
+        
+        # Spend the search budget improving on the best ordering strategy, unless no plan can beat it
+        optimal = bool(best_plan) and self._is_optimal(best_plan, self.unplaced_panels, multi_sheet=True)
+        if best_plan and self._search_enabled() and not optimal:
+            found = self._search_orderings(*tasks[best_index][1], multi_sheet=True)
+            if found is not None:
+                best_plan, self.unplaced_panels = found
+                self.plans.append(best_plan)
+        
+        if not best_plan:
+            raise NoValidPatternError("No valid patterns were generated. Try relaxing constraints.")
+        
+        _logger.debug("Selected plan with %d sheets and %d unplaced panels", len(best_plan), len(self.unplaced_panels))
+        return best_plan
+    
+    @staticmethod
+    def _plan_key(plan: List[CuttingPattern]) -> Tuple[float, int, float]:
+        """
+        Ranking key for multi-sheet plans (higher is better): most panel area placed,
+        then fewest sheets, then the emptiest last sheet so the others are packed tighter.
+        """
+        if not plan:
+            return (0.0, 0, 0.0)
+        placed_area = sum(p.stock_sheet.area() - p.waste_area for p in plan)
+        return (placed_area, -len(plan), -plan[-1].get_usage_ratio())
+    
+    def _compute_sheet_bound(self) -> int:
+        """Lower bound on the sheets needed by the panels that fit on one, see bounds.sheet_bound."""
+        start = time.perf_counter()
+        kerf = self.options.kerf_thickness
+        items = [(panel.length + kerf, panel.width + kerf, panel.quantity, panel.can_rotate(self.options.consider_grain))
+                 for panel in self.panels]
+        bound = sheet_bound(items, self.stock_sheet.length, self.stock_sheet.width)
+        self.stats.add('lower bound', time.perf_counter() - start)
+        return bound
+    
+    def _is_optimal(self, patterns: List[CuttingPattern], unplaced: PanelRuns, multi_sheet: bool) -> bool:
+        """
+        Whether no other result can place more panels or use fewer sheets: a single sheet
+        holding every panel, or a plan placing every panel on as many sheets as the bound.
+        """
+        if not multi_sheet:
+            return bool(patterns) and len(patterns[0]) == sum(panel.quantity for panel in self.panels)
+        return not unplaced and len(patterns) <= self.sheet_bound
+    
+    def _create_optimizer(self, split_rule: Optional[str] = None) -> MaxRectsOptimizer:
+        """
+        Create a fresh packer for the stock sheet: MaxRects, or the guillotine packer with
+        the given split rule. A tracing one while a trace is recorded.
+        """
+        if split_rule is not None:
+            # Imported here, guillotine.py builds on this module
+            from .guillotine import GuillotineOptimizer, TracingGuillotineOptimizer
+            args = (self.stock_sheet, self.options.kerf_thickness, self.options.consider_grain,
+                    split_rule, self.panels, self.panel_index, self.stats)
+            if self.trace is not None:
+                return TracingGuillotineOptimizer(*args, trace=self.trace)
+            return GuillotineOptimizer(*args)
+        args = (self.stock_sheet, self.options.kerf_thickness, self.options.consider_grain,
+                self.options.vectorized, self.panels, self.panel_index, self.stats,
+                self.options.placement_heuristic)
+        if self.trace is not None:
+            return TracingMaxRectsOptimizer(*args, trace=self.trace)
+        return MaxRectsOptimizer(*args)
+    
     def _generate_patterns(self) -> None:
         """
-        Generate cutting patterns using various panel ordering strategies.
+        Generate cutting patterns using various panel ordering strategies, until one
+        places every panel.
         """
-        print("Generating patterns with multiple strategies...")
+        self.strategy_tasks = self._single_sheet_tasks()
+        stop = partial(self._is_optimal, multi_sheet=False)
+        if self.uniform_job and self.options.packing_engine == 'guillotine':
+            # Patterns are filtered afterwards, the one placing every panel may not survive
+            stop = None
+        for patterns, _ in self._evaluate_strategies(self.strategy_tasks, stop):
+            self.patterns.extend(patterns)
+        
+        if self.uniform_job and self.options.packing_engine == 'guillotine':
+            # The uniform strategies do not know about the saw, keep their layouts only if it can cut them
+            from .guillotine import cut_sequence
+            kerf = self.options.kerf_thickness
+            self.patterns = [pattern for pattern in self.patterns if cut_sequence(pattern, kerf) is not None]
         
+        _logger.debug("Generated %d cutting patterns", len(self.patterns))
+    
+    def _single_sheet_tasks(self) -> List[Tuple[str, tuple]]:
+        """
+        Return the strategies tried for a single sheet: the uniform strategies when the
+        job is one panel type, otherwise the panel ordering strategies.
+        """
         # First check if we have uniform panels (all panels are the same size)
         uniform_panels = True
         first_panel = self.panels[0]
@@ -292,232 +975,453 @@ class EnhancedCuttingStockOptimizer:
         
         # For uniform panels, use specialized packing strategies
         if uniform_panels and len(self.panels) == 1 and self.panels[0].quantity > 1:
-            print("Detected uniform panels - using specialized packing")
-            self._generate_uniform_panel_patterns()
-        else:
-            self._generate_mixed_panel_patterns()
+            _logger.debug("Detected uniform panels, using specialized packing")
+            self.uniform_job = True
+            tasks = [(strategy, ()) for strategy in self.UNIFORM_STRATEGIES]
+            if self.options.packing_engine == 'guillotine':
+                # Fallback for uniform layouts the saw cannot cut, see _generate_patterns
+                tasks += self._strategy_tasks(multi_sheet=False)
+            return tasks
+        return self._strategy_tasks(multi_sheet=False)
     
-    def _generate_uniform_panel_patterns(self) -> None:
+    def _strategy_tasks(self, multi_sheet: bool) -> List[Tuple[str, tuple]]:
         """
-        Generate patterns specifically optimized for uniform panels.
-        This uses multiple strategies to find the best arrangement.
+        Return the (method name, arguments) of every panel ordering strategy, for the
+        MaxRects packer, the guillotine packer or both depending on the packing engine.
         """
-        panel = self.panels[0]
-        sheet_length = self.stock_sheet.length
-        sheet_width = self.stock_sheet.width
-        kerf = self.options.kerf_thickness
+        method = '_pack_multi_sheet' if multi_sheet else '_pack_single_sheet'
+        orderings = range(len(self.PANEL_ORDERINGS))
+        tasks = []
+        if self.options.packing_engine in ('maxrects', 'both'):
+            tasks += [(method, (index,)) for index in orderings]
+        if self.options.packing_engine in ('guillotine', 'both'):
+            tasks += [(method, (index, self.options.guillotine_split)) for index in orderings]
+        
+        # A sheet filled with one panel type, for the groups large enough for it. Across
+        # sheets the ordering strategies already start from such sheets, see _block_sheets.
+        if not multi_sheet and self._block_groups():
+            if self.options.packing_engine in ('maxrects', 'both'):
+                tasks.append(('_pack_single_blocks', ()))
+            if self.options.packing_engine in ('guillotine', 'both'):
+                tasks.append(('_pack_single_blocks', (self.options.guillotine_split,)))
+        return tasks
+    
+    @staticmethod
+    def _strategy_label(strategy: str, args: tuple) -> str:
+        """Readable name of a strategy task, e.g. _pack_multi_sheet[2]."""
+        return f"{strategy}{list(args) if args else ''}"
+    
+    def _run_strategy(self, strategy: str, args: tuple) -> Tuple[List[CuttingPattern], PanelRuns]:
+        """Run one strategy and return its patterns and the panels it could not place."""
+        if self.trace is not None:
+            self.trace.append(('strategy', self._strategy_label(strategy, args)))
+        start = time.perf_counter()
+        result = getattr(self, strategy)(*args)
+        self.stats.add(f"strategy {self._strategy_label(strategy, args)}", time.perf_counter() - start)
+        if result is None:
+            return [], []
+        if isinstance(result, CuttingPattern):
+            return [result], []
+        return result
+    
+    def _evaluate_strategies(self, tasks: List[Tuple[str, tuple]],
+                             stop=None) -> List[Tuple[List[CuttingPattern], PanelRuns]]:
+        """
+        Run every strategy, in a process pool when parallel workers are configured.
+        Results are returned in task order either way. Run one after another, the
+        strategies stop at the first result for which stop(patterns, unplaced) is true.
+        """
+        workers = min(self.options.parallel_workers, len(tasks))
+        if workers > 1:
+            try:
+                return self._evaluate_strategies_in_pool(tasks, workers)
+            except (OSError, BrokenProcessPool) as e:
+                _logger.warning("Process pool unavailable (%s), evaluating strategies sequentially", e)
+        results = []
+        for strategy, args in tasks:
+            results.append(self._run_strategy(strategy, args))
+            if stop is not None and stop(*results[-1]) and len(results) < len(tasks):
+                self.strategies_skipped += len(tasks) - len(results)
+                self.stats.add('strategies skipped', 0.0, len(tasks) - len(results))
+                break
+        return results
+    
+    def _evaluate_strategies_in_pool(self, tasks, workers):
+        """
+        Evaluate strategies in worker processes, see process_pool.py. Workers receive the
+        compact job once at start-up and send back compact placements only.
+        """
+        strategies = [strategy for strategy, _ in tasks]
+        arguments = [args for _, args in tasks]
+        with process_pool(workers, _init_strategy_worker, (self._compact_inputs(),)) as executor:
+            task_results = list(executor.map(_evaluate_strategy_task, strategies, arguments))
+        for _compact, stats, trace in task_results:
+            self.stats.merge(stats)
+            if self.trace is not None:
+                self.trace.extend(trace)
+        return [self._expand_result(compact) for compact, _stats, _trace in task_results]
+    
+    def _compact_inputs(self):
+        """
+        Picklable job description as plain data, which a worker unpickles before it can
+        import this module: panel dimensions, the sheet and the options.
+        """
+        panels = tuple((p.length, p.width, p.quantity, p.grain_direction) for p in self.panels)
+        sheet = (self.stock_sheet.length, self.stock_sheet.width, self.stock_sheet.quantity)
+        return panels, sheet, asdict(self.options)
+    
+    @classmethod
+    def _from_compact_inputs(cls, inputs) -> 'EnhancedCuttingStockOptimizer':
+        panels, sheet, options = inputs
+        return cls([Panel(length, width, quantity, grain_direction=grain)
+                    for length, width, quantity, grain in panels],
+                   StockSheet(*sheet), OptimizerOptions(**options))
+    
+    def _compact_result(self, patterns, unplaced):
+        """Reduce strategy output to panel indexes and coordinates."""
+        indexes = self.panel_index
+        sheets = []
+        for pattern in patterns:
+            panel_types = pattern.panel_types
+            if pattern.panels is not self.panels:
+                type_map = [indexes[id(panel)] for panel in pattern.panels]
+                panel_types = array('i', (type_map[t] for t in panel_types))
+            # The arrays pickle as raw buffers
+            sheets.append((panel_types, pattern.panel_ids, pattern.xs, pattern.ys, pattern.rotated))
+        return sheets, unplaced
+    
+    def _expand_result(self, compact):
+        """Rebuild patterns from a compact strategy result using this optimizer's panels."""
+        sheets, unplaced = compact
+        patterns = []
+        for panel_types, panel_ids, xs, ys, rotated in sheets:
+            pattern = CuttingPattern(self.stock_sheet, self.panels, self.panel_index)
+            for placement in zip(panel_types, xs, ys, rotated, panel_ids):
+                pattern.add_placement(*placement)
+            patterns.append(pattern)
+        return patterns, unplaced
+    
+    def _panel_ordering(self, index: int, placed: Optional[Dict[int, int]] = None) -> PanelRuns:
+        """
+        Sort the panel types with the given ordering strategy into one run per type, so
+        the cost depends on the number of panel types rather than of panels. placed gives
+        the number of panels per panel type already placed, which are left out.
+        """
+        placed = placed or {}
+        key, reverse = self.PANEL_ORDERINGS[index]
+        order = sorted(range(len(self.panels)), key=lambda i: key(self.panels[i]), reverse=reverse)
+        runs = [(i, self.panels[i].quantity - placed.get(i, 0)) for i in order]
+        return [(i, count) for i, count in runs if count > 0]
+    
+    def _pack_single_sheet(self, index: int, split_rule: Optional[str] = None) -> CuttingPattern:
+        """
+        Pack one panel ordering onto a single sheet using the Maximal Rectangles algorithm,
+        or the guillotine packer when a split rule is given.
+        """
+        _logger.debug("Trying permutation %d/%d", index + 1, len(self.PANEL_ORDERINGS))
+        return self._pack_single_sequence(self._panel_ordering(index), split_rule=split_rule)
+    
+    def _pack_single_sequence(self, sequence: PanelRuns, rotations: Optional[Dict[int, bool]] = None,
+                              split_rule: Optional[str] = None) -> CuttingPattern:
+        """Pack runs of panels in the given order onto one sheet, optionally forcing orientations per panel type."""
+        rotations = rotations or {}
         
-        # Strategy 1: Grid-based packing with standard orientation
-        optimizer1 = MaxRectsOptimizer(self.stock_sheet, kerf, self.options.consider_grain)
+        # Create a new optimizer for each permutation
+        optimizer = self._create_optimizer(split_rule)
         
-        # Create expanded panel list
-        panel_list = []
-        for i in range(panel.quantity):
-            panel_list.append((i % panel.quantity, copy.deepcopy(panel)))
-            
-        # Place panels in original orientation
-        for i, (panel_id, p) in enumerate(panel_list):
-            if not optimizer1.find_position_for_panel(p, panel_id):
+        # Place each run
+        for panel_id, count in sequence:
+            placed = optimizer.place_run(self.panels[panel_id], panel_id, count, rotations.get(panel_id))
+            # If using a single sheet and a panel does not fit, this pattern is incomplete
+            if placed < count and self.options.use_single_sheet:
                 break
-                
-        self.patterns.append(optimizer1.get_pattern())
         
-        # Strategy 2: Grid-based packing with mixed orientation
-        if panel.can_rotate(self.options.consider_grain):
-            optimizer2 = MaxRectsOptimizer(self.stock_sheet, kerf, self.options.consider_grain)
-            
-            # First place a row of horizontal panels
-            horizontal_width = panel.length + kerf
-            horizontal_height = panel.width + kerf
-            horizontal_count = int(sheet_length / horizontal_width)
-            
-            for i in range(horizontal_count):
-                if i < len(panel_list):
-                    panel_id, p = panel_list[i]
-                    p_copy = copy.deepcopy(p)
-                    placed = optimizer2.find_position_for_panel(p_copy, panel_id)
+        return optimizer.get_pattern()
+    
+    def _pack_multi_sheet(self, index: int, split_rule: Optional[str] = None) -> Tuple[List[CuttingPattern], PanelRuns]:
+        """
+        Pack one panel ordering, first fit over the sheets opened so far.
+        A new sheet is only opened when no open sheet can take the panel, so each
+        sheet is filled incrementally in a single pass over the panels. A split rule
+        selects the guillotine packer.
+        """
+        _logger.debug("Packing permutation %d/%d across sheets", index + 1, len(self.PANEL_ORDERINGS))
+        return self._pack_multi_sequence(self._panel_ordering(index, self._block_placed()), split_rule=split_rule,
+                                         open_sheets=self._block_sheets(split_rule))
+    
+    def _pack_multi_sequence(self, sequence: PanelRuns, rotations: Optional[Dict[int, bool]] = None,
+                             split_rule: Optional[str] = None, open_sheets: Optional[List[MaxRectsOptimizer]] = None
+                             ) -> Tuple[List[CuttingPattern], PanelRuns]:
+        """
+        Pack runs of panels in the given order across sheets, optionally forcing orientations
+        per panel type. Sheets already packed can be passed in open_sheets, they are filled first.
+        A run fills each sheet as far as it goes before moving on: a sheet that rejects a panel
+        rejects its copies too, so this is the same as placing the panels first fit one by one.
+        """
+        rotations = rotations or {}
+        kerf = self.options.kerf_thickness
+        sheet_area = self.stock_sheet.area()
+        tolerance = sheet_area * 1e-9
+        open_sheets: List[MaxRectsOptimizer] = list(open_sheets or [])
+        unplaced = []
+        oversized = set()
+        
+        for panel_id, count in sequence:
+            if panel_id in oversized:
+                unplaced.append((panel_id, count))
+                continue
+            panel = self.panels[panel_id]
+            rotation = rotations.get(panel_id)
             
-            # Then try to place as many vertical panels as possible
-            for i in range(horizontal_count, len(panel_list)):
-                panel_id, p = panel_list[i]
-                p_copy = copy.deepcopy(p)
-                # Force rotation by making a special panel
-                if not optimizer2.find_position_for_panel(p_copy, panel_id):
+            # Skip sheets whose remaining area is already too small for the panel
+            footprint = (panel.length + kerf) * (panel.width + kerf)
+            for optimizer in open_sheets:
+                if not count:
                     break
-                    
-            self.patterns.append(optimizer2.get_pattern())
-        
-        # Strategy 3: Alternate orientation packing (like a brick wall)
-        if panel.can_rotate(self.options.consider_grain):
-            optimizer3 = MaxRectsOptimizer(self.stock_sheet, kerf, self.options.consider_grain)
+                if sheet_area - optimizer.used_area + tolerance < footprint:
+                    continue
+                count -= optimizer.place_run(panel, panel_id, count, rotation)
             
-            # Create alternating panels
-            for i, (panel_id, p) in enumerate(panel_list):
-                p_copy = copy.deepcopy(p)
-                placed = optimizer3.find_position_for_panel(p_copy, panel_id)
+            while count and len(open_sheets) < self.stock_sheet.quantity:
+                optimizer = self._create_optimizer(split_rule)
+                placed = optimizer.place_run(panel, panel_id, count, rotation)
                 if not placed:
+                    # Does not even fit on an empty sheet
+                    oversized.add(panel_id)
                     break
-                    
-            self.patterns.append(optimizer3.get_pattern())
-        
-        # Strategy 4: Try an optimal strategy for columns of rotated panels
-        # Based on our analysis, this approach works well for many sheet sizes
-        optimizer4 = MaxRectsOptimizer(self.stock_sheet, kerf, self.options.consider_grain)
-        
-        if panel.can_rotate(self.options.consider_grain):
-            # Calculate how many full columns of rotated panels we can fit
-            cols = int(sheet_length / panel.width)
-            rows = int(sheet_width / panel.length)
-            
-            # Check if there's enough space for a row of non-rotated panels at the bottom
-            remaining_height = sheet_width - (rows * panel.length)
-            
-            # Try to place the rotated panels first (columns)
-            panel_count = 0
-            for col in range(cols):
-                for row in range(rows):
-                    if panel_count < len(panel_list):
-                        panel_id, p = panel_list[panel_count]
-                        p_copy = copy.deepcopy(p)
-                        # Place a rotated panel
-                        if optimizer4.find_position_for_panel(p_copy, panel_id):
-                            panel_count += 1
-            
-            # If there's room for non-rotated panels at the bottom, add them
-            if remaining_height >= panel.width:
-                cols_bottom = int(sheet_length / panel.length)
-                for col in range(cols_bottom):
-                    if panel_count < len(panel_list):
-                        panel_id, p = panel_list[panel_count]
-                        p_copy = copy.deepcopy(p)
-                        # Manually create a special panel for bottom row
-                        y_pos = rows * panel.length
-                        x_pos = col * panel.length
-                        pattern = optimizer4.get_pattern()
-                        pattern.add_panel(p_copy, x_pos, y_pos, False, panel_id)
-                        panel_count += 1
-                
-            # Add the pattern
-            self.patterns.append(optimizer4.get_pattern())
-        
-        # Strategy 5: Generate a pattern that maximizes the number of panels
-        # using theoretical calculations for optimal layout
-        if panel.can_rotate(self.options.consider_grain):
-            pattern5 = CuttingPattern(self.stock_sheet)
-            
-            # Calculate exactly how many panels we can fit in different orientations
-            # Standard orientation
-            cols_std = int(sheet_length / panel.length)
-            rows_std = int(sheet_width / panel.width)
-            total_std = cols_std * rows_std
+                open_sheets.append(optimizer)
+                count -= placed
             
-            # Rotated orientation
-            cols_rot = int(sheet_length / panel.width)
-            rows_rot = int(sheet_width / panel.length)
-            total_rot = cols_rot * rows_rot
-            
-            # Mixed orientation - rotated panels in columns with standard panels at bottom
-            if cols_rot > 0 and rows_rot > 0:
-                rotated_height = rows_rot * panel.length
-                remaining_height = sheet_width - rotated_height
-                
-                total_mixed = cols_rot * rows_rot  # rotated panels
-                
-                if remaining_height >= panel.width:
-                    # Add standard panels at the bottom
-                    cols_bottom = int(sheet_length / panel.length)
-                    total_mixed += cols_bottom
-            else:
-                total_mixed = 0
-            
-            # Choose the best orientation
-            if total_std >= total_rot and total_std >= total_mixed:
-                # Use standard orientation
-                for row in range(rows_std):
-                    for col in range(cols_std):
-                        panel_id = row * cols_std + col
-                        if panel_id < panel.quantity:
-                            pattern5.add_panel(panel, col * panel.length, row * panel.width, False, panel_id)
-            elif total_rot >= total_mixed:
-                # Use rotated orientation
-                for row in range(rows_rot):
-                    for col in range(cols_rot):
-                        panel_id = row * cols_rot + col
-                        if panel_id < panel.quantity:
-                            pattern5.add_panel(panel, col * panel.width, row * panel.length, True, panel_id)
-            else:
-                # Use mixed orientation
-                # First place rotated panels in columns
-                panel_id = 0
-                for row in range(rows_rot):
-                    for col in range(cols_rot):
-                        if panel_id < panel.quantity:
-                            pattern5.add_panel(panel, col * panel.width, row * panel.length, True, panel_id)
-                            panel_id += 1
-                
-                # Then place standard panels at the bottom
-                if remaining_height >= panel.width:
-                    bottom_y = rows_rot * panel.length
-                    for col in range(cols_bottom):
-                        if panel_id < panel.quantity:
-                            pattern5.add_panel(panel, col * panel.length, bottom_y, False, panel_id)
-                            panel_id += 1
-            
-            self.patterns.append(pattern5)
+            if count:
+                unplaced.append((panel_id, count))
         
-        print(f"Generated {len(self.patterns)} cutting patterns for uniform panels")
+        return [optimizer.get_pattern() for optimizer in open_sheets], unplaced
+    
+    def _block_layout(self, panel: Panel):
+        """Block layout of the panel (kerf included) on the stock sheet, see blocks.py."""
+        # Imported here, blocks.py builds on this module
+        from .blocks import block_layout
+        kerf = self.options.kerf_thickness
+        return block_layout(self.stock_sheet.length, self.stock_sheet.width, panel.length + kerf,
+                            panel.width + kerf, panel.can_rotate(self.options.consider_grain))
     
-    def _generate_mixed_panel_patterns(self) -> None:
+    def _block_groups(self) -> List[Tuple[int, 'BlockLayout']]:
         """
-        Generate patterns for mixed panels using the Maximal Rectangles algorithm.
+        (panel type, block layout) of every panel type with enough panels for at least one
+        whole sheet of its block layout, largest panels first. Computed once per optimizer,
+        empty without options.block_packing.
         """
-        # Get all panels with their quantities
-        panels_with_quantities = []
-        for i, panel in enumerate(self.panels):
-            for _ in range(panel.quantity):
-                panels_with_quantities.append((i, panel))
-        
-        # Create different permutations and orderings to try
-        permutations = []
-        
-        # Strategy 1: Sort by area (largest first)
-        area_sorted = sorted(panels_with_quantities, key=lambda x: x[1].area(), reverse=True)
-        permutations.append(area_sorted)
-        
-        # Strategy 2: Sort by perimeter (largest first)
-        perimeter_sorted = sorted(panels_with_quantities, key=lambda x: 2*(x[1].length + x[1].width), reverse=True)
-        permutations.append(perimeter_sorted)
+        if self.block_groups is None and not self.options.block_packing:
+            self.block_groups = []
+        if self.block_groups is None:
+            from .blocks import block_bound
+            kerf = self.options.kerf_thickness
+            self.block_groups = []
+            for i, panel in enumerate(self.panels):
+                # The single block bound is free and never above the layout count, so it rules out small groups
+                bound = block_bound(self.stock_sheet.length, self.stock_sheet.width, panel.length + kerf,
+                                    panel.width + kerf, panel.can_rotate(self.options.consider_grain))
+                if not bound or panel.quantity < bound:
+                    continue
+                layout = self._block_layout(panel)
+                if panel.quantity >= layout.count:
+                    self.block_groups.append((i, layout))
+            self.block_groups.sort(key=lambda group: self.panels[group[0]].area(), reverse=True)
+        return self.block_groups
+    
+    def _pack_single_blocks(self, split_rule: Optional[str] = None) -> CuttingPattern:
+        """
+        Fill the sheet with the block layout that covers the most area among the panel types
+        with enough panels for it, then place the other panels in the space left.
+        """
+        panel_id, layout = max(self._block_groups(),
+                               key=lambda group: group[1].count * self.panels[group[0]].area())
+        optimizer = self._create_optimizer(split_rule)
+        placed = optimizer.place_layout(self.panels[panel_id], layout, panel_id, layout.count)
+        for other_id, count in self._panel_ordering(0, {panel_id: placed}):
+            if optimizer.place_run(self.panels[other_id], other_id, count) < count and self.options.use_single_sheet:
+                break
+        return optimizer.get_pattern()
+    
+    def _block_plan(self) -> List[Tuple[int, 'BlockLayout', int]]:
+        """
+        (panel type, block layout, sheets) of the whole sheets cut from each large panel type, see
+        _block_sheets. The last sheet's worth of each type is left to the other strategies, which
+        can then mix it with other panels; their cost no longer grows with the group size.
+        """
+        plan = []
+        sheets_left = self.stock_sheet.quantity
+        for panel_id, layout in self._block_groups():
+            sheets = min(self.panels[panel_id].quantity // layout.count - 1, sheets_left)
+            sheets_left -= sheets
+            plan.append((panel_id, layout, sheets))
+        return plan
+    
+    def _block_placed(self) -> Dict[int, int]:
+        """Number of panels per panel type on the sheets of _block_sheets."""
+        return {panel_id: sheets * layout.count for panel_id, layout, sheets in self._block_plan()}
+    
+    def _block_sheets(self, split_rule: Optional[str] = None) -> List[MaxRectsOptimizer]:
+        """
+        Packers for whole sheets of each large panel type cut with its block layout, laid out in
+        one step per sheet rather than per panel. The other panels are then packed first fit
+        over these sheets and new ones.
+        """
+        open_sheets = []
+        for panel_id, layout, sheets in self._block_plan():
+            panel = self.panels[panel_id]
+            for _ in range(sheets):
+                optimizer = self._create_optimizer(split_rule)
+                optimizer.place_layout(panel, layout, panel_id, layout.count)
+                open_sheets.append(optimizer)
+        return open_sheets
+    
+    def _search_enabled(self) -> bool:
+        return self.options.search_time_limit > 0 or self.options.search_max_iterations > 0
+    
+    def _search_orderings(self, start_index: int, split_rule: Optional[str] = None, multi_sheet: bool = False):
+        """
+        Anytime local search over panel order and forced rotations, starting from
+        the given ordering strategy and packing with the same packer. Uses late acceptance hill climbing with a
+        seeded random generator and stops when the time budget or the iteration
+        cap is spent. Returns the best (patterns, unplaced panels) found if it
+        beats the starting ordering, otherwise None.
+        """
+        search_start = time.perf_counter()
+        if self.options.search_time_limit > 0:
+            deadline = search_start + self.options.search_time_limit
+        else:
+            deadline = float('inf')
+        max_iterations = self.options.search_max_iterations
+        rng = random.Random(self.options.search_seed)
+        # Thousands of candidate layouts would drown the trace, only the outcome is recorded
+        trace, self.trace = self.trace, None
         
-        # Strategy 3: Sort by longest side (largest first)
-        longest_side_sorted = sorted(panels_with_quantities, key=lambda x: max(x[1].length, x[1].width), reverse=True)
-        permutations.append(longest_side_sorted)
+        def evaluate(sequence, rotations):
+            if multi_sheet:
+                return self._pack_multi_sequence(sequence, rotations, split_rule, self._block_sheets(split_rule))
+            return [self._pack_single_sequence(sequence, rotations, split_rule)], []
         
-        # Strategy 4: Sort by shortest side (smallest first)
-        shortest_side_sorted = sorted(panels_with_quantities, key=lambda x: min(x[1].length, x[1].width))
-        permutations.append(shortest_side_sorted)
+        # Across sheets the block sheets are fixed, the search reorders the other panels
+        sequence = self._panel_ordering(start_index, self._block_placed() if multi_sheet else None)
+        rotations: Dict[int, bool] = {}
+        rotatable = [i for i, panel in enumerate(self.panels) if panel.can_rotate(self.options.consider_grain)]
         
-        # Strategy 5: Sort by aspect ratio (most square first)
-        aspect_ratio_sorted = sorted(panels_with_quantities, 
-                                   key=lambda x: abs(x[1].length/x[1].width - 1))
-        permutations.append(aspect_ratio_sorted)
+        current_key = start_key = self._plan_key(evaluate(sequence, rotations)[0])
+        best, best_key = None, start_key
+        history = [current_key] * self.SEARCH_HISTORY_LENGTH
         
-        # For each permutation, try to generate a pattern
-        for perm_idx, perm in enumerate(permutations):
-            print(f"Trying permutation {perm_idx + 1}/{len(permutations)}...")
-            
-            # Create a new optimizer for each permutation
-            optimizer = MaxRectsOptimizer(self.stock_sheet, self.options.kerf_thickness, self.options.consider_grain)
-            
-            # Place each panel
-            for panel_id, panel in perm:
-                # Try to place the panel
-                if not optimizer.find_position_for_panel(panel, panel_id):
-                    # If using a single sheet and can't place, this pattern is incomplete
-                    if self.options.use_single_sheet:
-                        break
+        iteration = 0
+        while time.perf_counter() < deadline and (not max_iterations or iteration < max_iterations):
+            candidate_sequence, candidate_rotations = self._perturb(sequence, rotations, rotatable, rng)
+            result = evaluate(candidate_sequence, candidate_rotations)
+            key = self._plan_key(result[0])
+            if key > best_key and self._is_optimal(*result, multi_sheet=multi_sheet):
+                best, best_key = result, key
+                iteration += 1
+                break
             
-            # Add the pattern
-            self.patterns.append(optimizer.get_pattern())
+            # Late acceptance: accept if no worse than now or than the state a history length ago
+            slot = iteration % len(history)
+            if key >= current_key or key >= history[slot]:
+                sequence, rotations, current_key = candidate_sequence, candidate_rotations, key
+                if key > best_key:
+                    best, best_key = result, key
+            history[slot] = current_key
+            iteration += 1
+        else:
+            if not max_iterations or iteration < max_iterations:
+                # Stopped by the clock, not by the iteration cap
+                self.time_limited = True
+        
+        self.search_iterations += iteration
+        self.stats.add('search', time.perf_counter() - search_start, iteration)
+        self.trace = trace
+        if trace is not None:
+            trace.append(('search', iteration, best is not None))
+        _logger.debug("Search ran %d iterations, improved: %s", iteration, best is not None)
+        return best
+    
+    @staticmethod
+    def _perturb(sequence: PanelRuns, rotations, rotatable, rng: random.Random):
+        """
+        Random neighbour of a packing order of runs: swap two runs, move part of a run
+        elsewhere, reverse a segment or flip a rotation. Moving part of a run is how panels
+        of one type get spread through the order.
+        """
+        sequence = list(sequence)
+        n = len(sequence)
+        move = rng.randrange(4 if rotatable else 3)
+        if move == 1 and sequence and (n >= 2 or sequence[0][1] >= 2):
+            i = rng.randrange(n)
+            panel_id, count = sequence[i]
+            moved = rng.randint(1, count)
+            if moved == count:
+                del sequence[i]
+            else:
+                sequence[i] = (panel_id, count - moved)
+            insert_at = rng.randrange(len(sequence) + 1)
+            sequence.insert(insert_at, (panel_id, moved))
+            return _merge_runs(sequence), rotations
+        if move == 3 or n < 2:
+            if rotatable:
+                rotations = dict(rotations)
+                panel_index = rng.choice(rotatable)
+                # Cycle free -> forced standard -> forced rotated -> free
+                state = rotations.pop(panel_index, None)
+                if state is None:
+                    rotations[panel_index] = False
+                elif state is False:
+                    rotations[panel_index] = True
+            return sequence, rotations
         
-        print(f"Generated {len(self.patterns)} cutting patterns for mixed panels")
-    
\ No newline at end of file
+        i, j = sorted(rng.sample(range(n), 2))
+        if move == 0:
+            sequence[i], sequence[j] = sequence[j], sequence[i]
+        else:
+            sequence[i:j + 1] = reversed(sequence[i:j + 1])
+        return _merge_runs(sequence), rotations
+    
+    def _uniform_standard_pattern(self) -> CuttingPattern:
+        """Strategy 1: Grid-based packing with standard orientation."""
+        optimizer1 = self._create_optimizer()
+        optimizer1.place_run(self.panels[0], 0, self.panels[0].quantity)
+        return optimizer1.get_pattern()
+    
+    def _uniform_block_pattern(self) -> Optional[CuttingPattern]:
+        """Strategy 2: The best three-stage block layout of the panel, computed from the dimensions, see blocks.py."""
+        panel = self.panels[0]
+        layout = self._block_layout(panel)
+        if not layout.count:
+            return None
+        optimizer = self._create_optimizer()
+        optimizer.place_layout(panel, layout, 0, panel.quantity)
+        return optimizer.get_pattern()
+
+def _merge_runs(sequence: PanelRuns) -> PanelRuns:
+    """Join neighbouring runs of the same panel type."""
+    merged = []
+    for panel_id, count in sequence:
+        if merged and merged[-1][0] == panel_id:
+            merged[-1] = (panel_id, merged[-1][1] + count)
+        else:
+            merged.append((panel_id, count))
+    return merged
+
+# Strategy optimizer rebuilt once per pool worker process
+_worker_optimizer: Optional[EnhancedCuttingStockOptimizer] = None
+
+
+def _init_strategy_worker(inputs) -> None:
+    """Process pool initializer: rebuild the optimizer from the compact job description."""
+    global _worker_optimizer
+    _worker_optimizer = EnhancedCuttingStockOptimizer._from_compact_inputs(inputs)
+
+
+def _evaluate_strategy_task(strategy: str, args: tuple):
+    """Process pool task: run one strategy and return its compact result, the stats and the trace it recorded."""
+    _worker_optimizer.stats = OptimizerStats()
+    if _worker_optimizer.trace is not None:
+        _worker_optimizer.trace = []
+    compact = _worker_optimizer._compact_result(*_worker_optimizer._run_strategy(strategy, args))
+    return compact, _worker_optimizer.stats, _worker_optimizer.trace
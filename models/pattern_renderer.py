@@ -0,0 +1,233 @@
+"""
+Lightweight SVG and PDF rendering of cutting patterns.
+
+Pages are written directly from the placements of a CuttingPattern in a single pass.
+Panels sharing a color are emitted as one path and all labels as one text
+object, so a sheet with a thousand panels renders in a few milliseconds and
+nothing heavier than zlib is imported.
+"""
+import zlib
+from html import escape
+
+# Matplotlib's tab20 palette, the colors of the original matplotlib drawing
+PANEL_COLORS = (
+    '1f77b4', 'aec7e8', 'ff7f0e', 'ffbb78', '2ca02c', '98df8a', 'd62728', 'ff9896', '9467bd', 'c5b0d5',
+    '8c564b', 'c49c94', 'e377c2', 'f7b6d2', '7f7f7f', 'c7c7c7', 'bcbd22', 'dbdb8d', '17becf', '9edae5',
+)
+PANEL_ALPHA = 0.7
+
+# Page geometry in points: 12 x 12 inch, like the matplotlib figure
+PAGE_SIZE = 864
+MARGIN = 36
+TITLE_HEIGHT = 40
+STATS_HEIGHT = 84
+
+TITLE_FONT_SIZE = 14
+STATS_FONT_SIZE = 10
+LABEL_FONT_SIZE = 8
+MIN_LABEL_FONT_SIZE = 3
+
+# Helvetica-Bold advance widths (1/1000 em) used to center and fit labels
+_BOLD_WIDTHS = dict(
+    zip(' .,-/()x', (278, 278, 278, 333, 278, 333, 333, 556)),
+    **{digit: 556 for digit in '0123456789'},
+    **dict(zip('abcdefghijklmnopqrstuvwxyz',
+               (556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889,
+                611, 611, 611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500))),
+    **dict(zip('ABCDEFGHIJKLMNOPQRSTUVWXYZ',
+               (722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833,
+                722, 778, 667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611))),
+)
+
+
+def _text_width(text, font_size):
+    return sum(_BOLD_WIDTHS.get(char, 600) for char in text) * font_size / 1000.0
+
+
+def _blend(color):
+    """Flatten a palette color with PANEL_ALPHA over white, as PDF fills here are opaque."""
+    return tuple(PANEL_ALPHA * int(color[i:i + 2], 16) / 255.0 + 1 - PANEL_ALPHA for i in (0, 2, 4))
+
+
+_PDF_COLORS = tuple('%.3f %.3f %.3f rg' % _blend(color) for color in PANEL_COLORS)
+
+
+def _title(pattern, sheet_number, sheet_total):
+    if sheet_total > 1:
+        return f'Cutting Pattern - {pattern.stock_sheet.label} (sheet {sheet_number} of {sheet_total})'
+    return f'Cutting Pattern - {pattern.stock_sheet.label}'
+
+
+def _stats_lines(pattern, options):
+    stock_sheet = pattern.stock_sheet
+    used_area = stock_sheet.area() - pattern.waste_area
+    usage_percentage = used_area / stock_sheet.area() * 100
+    return [
+        f"Stock Sheet: {stock_sheet.length} x {stock_sheet.width}",
+        f"Used Area: {used_area:.2f} ({usage_percentage:.1f}%)",
+        f"Waste Area: {pattern.waste_area:.2f} ({100 - usage_percentage:.1f}%)",
+        f"Panels Placed: {len(pattern)}",
+        f"Kerf Width: {options.kerf_thickness}",
+    ]
+
+
+def _layout(pattern, options):
+    """
+    Scale the sheet into the drawing area and yield the page geometry of every panel
+    as (color index, x, y, width, height, label lines, label font size), y pointing up.
+    """
+    stock_sheet = pattern.stock_sheet
+    area_width = PAGE_SIZE - 2 * MARGIN
+    area_height = PAGE_SIZE - 2 * MARGIN - TITLE_HEIGHT - STATS_HEIGHT
+    scale = min(area_width / stock_sheet.length, area_height / stock_sheet.width)
+    origin_x = (PAGE_SIZE - stock_sheet.length * scale) / 2
+    origin_y = MARGIN + STATS_HEIGHT + (area_height - stock_sheet.width * scale) / 2
+
+    panels = []
+    for i, (panel, x, y, rotated, _panel_id) in enumerate(pattern.placements()):
+        if rotated:
+            length, width = panel.width, panel.length
+        else:
+            length, width = panel.length, panel.width
+        box_width, box_height = length * scale, width * scale
+
+        lines, font_size = None, 0
+        if options.labels_on_panels:
+            lines = (f"{panel.label}{' (rotated)' if rotated else ''}",
+                     f"{length:.1f} x {width:.1f}")
+            # Shrink labels to fit their panel, drop them when unreadable
+            widest = max(_text_width(line, LABEL_FONT_SIZE) for line in lines)
+            font_size = min(LABEL_FONT_SIZE, box_height / 2.4,
+                            LABEL_FONT_SIZE * box_width * 0.95 / widest if widest else LABEL_FONT_SIZE)
+            if font_size < MIN_LABEL_FONT_SIZE:
+                lines = None
+
+        panels.append((i % len(PANEL_COLORS), origin_x + x * scale, origin_y + y * scale,
+                       box_width, box_height, lines, font_size))
+
+    sheet_box = (origin_x, origin_y, stock_sheet.length * scale, stock_sheet.width * scale)
+    return sheet_box, panels
+
+
+def _pdf_string(text):
+    data = text.encode('cp1252', 'replace')
+    return b'(' + data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+def _pdf_page_content(pattern, options, sheet_number, sheet_total):
+    sheet_box, panels = _layout(pattern, options)
+    ops = ['1 1 1 rg 0 0 0 RG 2 w %.2f %.2f %.2f %.2f re B' % sheet_box]
+
+    # One filled path per color
+    by_color = {}
+    for color, x, y, width, height, _lines, _size in panels:
+        by_color.setdefault(color, []).append('%.2f %.2f %.2f %.2f re' % (x, y, width, height))
+    for color, rects in by_color.items():
+        ops.append(_PDF_COLORS[color])
+        ops.extend(rects)
+        ops.append('f')
+
+    # One stroked path for all outlines
+    if panels:
+        ops.append('0 0 0 RG 0.5 w')
+        ops.extend('%.2f %.2f %.2f %.2f re' % (x, y, width, height) for _c, x, y, width, height, _l, _s in panels)
+        ops.append('S')
+    content = '\n'.join(ops).encode('ascii')
+
+    # All text in one text object
+    text = [b'BT 0 0 0 rg']
+    for _color, x, y, width, height, lines, size in panels:
+        if not lines:
+            continue
+        line_height = size * 1.2
+        top = y + height / 2 + line_height * (len(lines) - 1) / 2 - size * 0.35
+        text.append(b'/F2 %.2f Tf' % size)
+        for n, line in enumerate(lines):
+            text.append(b'1 0 0 1 %.2f %.2f Tm %s Tj' % (
+                x + (width - _text_width(line, size)) / 2, top - n * line_height, _pdf_string(line)))
+
+    title = _title(pattern, sheet_number, sheet_total)
+    text.append(b'/F1 %d Tf 1 0 0 1 %.2f %.2f Tm %s Tj' % (
+        TITLE_FONT_SIZE, (PAGE_SIZE - _text_width(title, TITLE_FONT_SIZE)) / 2,
+        PAGE_SIZE - MARGIN - TITLE_FONT_SIZE, _pdf_string(title)))
+    text.append(b'/F1 %d Tf' % STATS_FONT_SIZE)
+    for n, line in enumerate(reversed(_stats_lines(pattern, options))):
+        text.append(b'1 0 0 1 %d %.2f Tm %s Tj' % (MARGIN, MARGIN + n * STATS_FONT_SIZE * 1.4, _pdf_string(line)))
+    text.append(b'ET')
+
+    return content + b'\n' + b'\n'.join(text)
+
+
+def render_pdf(patterns, options):
+    """Render the patterns as a PDF document with one page per stock sheet and return its bytes."""
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        None,  # page tree, filled in once the page object numbers are known
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>',
+    ]
+    page_refs = []
+    for sheet_number, pattern in enumerate(patterns, start=1):
+        stream = zlib.compress(_pdf_page_content(pattern, options, sheet_number, len(patterns)))
+        objects.append(b'<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream' % (len(stream), stream))
+        objects.append(b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] '
+                       b'/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents %d 0 R >>'
+                       % (PAGE_SIZE, PAGE_SIZE, len(objects)))
+        page_refs.append(b'%d 0 R' % len(objects))
+    objects[1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (b' '.join(page_refs), len(page_refs))
+
+    output = bytearray(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+    xref = len(output)
+    output += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    output += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    output += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(output)
+
+
+def render_svg(pattern, options, sheet_number=1, sheet_total=1):
+    """Render one stock sheet as a standalone SVG document."""
+    sheet_box, panels = _layout(pattern, options)
+
+    def flip(y, height=0):
+        return PAGE_SIZE - y - height
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {PAGE_SIZE} {PAGE_SIZE}" '
+        f'font-family="Helvetica, Arial, sans-serif">',
+        '<rect x="%.2f" y="%.2f" width="%.2f" height="%.2f" fill="white" stroke="black" stroke-width="2"/>'
+        % (sheet_box[0], flip(sheet_box[1], sheet_box[3]), sheet_box[2], sheet_box[3]),
+    ]
+
+    by_color = {}
+    for color, x, y, width, height, _lines, _size in panels:
+        by_color.setdefault(color, []).append('M%.2f %.2fh%.2fv%.2fh%.2fz' % (x, flip(y, height), width, height, -width))
+    for color, rects in by_color.items():
+        parts.append(f'<path fill="#{PANEL_COLORS[color]}" fill-opacity="{PANEL_ALPHA}" d="{"".join(rects)}"/>')
+    if panels:
+        outlines = ''.join('M%.2f %.2fh%.2fv%.2fh%.2fz' % (x, flip(y, height), width, height, -width)
+                           for _c, x, y, width, height, _l, _s in panels)
+        parts.append(f'<path fill="none" stroke="black" stroke-width="0.5" d="{outlines}"/>')
+
+    parts.append('<g text-anchor="middle" font-weight="bold">')
+    for _color, x, y, width, height, lines, size in panels:
+        if not lines:
+            continue
+        line_height = size * 1.2
+        top = flip(y + height / 2) - line_height * (len(lines) - 1) / 2 + size * 0.35
+        for n, line in enumerate(lines):
+            parts.append('<text x="%.2f" y="%.2f" font-size="%.2f">%s</text>'
+                         % (x + width / 2, top + n * line_height, size, escape(line)))
+    parts.append('</g>')
+
+    parts.append('<text x="%d" y="%d" font-size="%d" text-anchor="middle">%s</text>' % (
+        PAGE_SIZE // 2, MARGIN + TITLE_FONT_SIZE, TITLE_FONT_SIZE, escape(_title(pattern, sheet_number, sheet_total))))
+    stats = _stats_lines(pattern, options)
+    for n, line in enumerate(stats):
+        parts.append('<text x="%d" y="%.2f" font-size="%d">%s</text>' % (
+            MARGIN, flip(MARGIN + (len(stats) - 1 - n) * STATS_FONT_SIZE * 1.4), STATS_FONT_SIZE, escape(line)))
+    parts.append('</svg>')
+    return '\n'.join(parts)
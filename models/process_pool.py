@@ -0,0 +1,59 @@
+"""
+Process pools of the optimizer.
+
+Workers are never forked from the Odoo worker running the job: a fork copies the locks
+held by its other threads at that moment (logging, the registry, the queue runner's
+threads) and its open PostgreSQL connections into the children. They are started with
+forkserver, or spawn where it is missing, as fresh interpreters. These do not know the
+addons path of the server, so every worker first runs this file by path (with runpy,
+which only needs the standard library) to make the addons of the parent importable, then
+the initializer given. Initializer arguments, tasks and results must be plain data or
+instances of classes that both sides can import.
+"""
+import multiprocessing
+import runpy
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from importlib import import_module
+from typing import Callable, Optional
+
+# Start method of the workers, fork is never used, see the module docstring
+START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+# Name this file runs under in a worker, see _start_worker
+WORKER_RUN_NAME = '__cutlist_worker__'
+
+
+def process_pool(workers: int, initializer: Optional[Callable] = None, initargs: tuple = ()) -> ProcessPoolExecutor:
+    """
+    Executor of worker processes started as described in the module docstring, each
+    running initializer(*initargs) once, like the initializer of ProcessPoolExecutor.
+    """
+    # The namespace package of the addons, odoo.addons when run by Odoo
+    namespace = __package__.rsplit('.', 2)[0]
+    bootstrap = partial(runpy.run_path, __file__, {
+        'WORKER_SETUP': (
+            namespace,
+            [str(path) for path in sys.modules[namespace].__path__],
+            (initializer.__module__, initializer.__name__) if initializer else None,
+            initargs,
+        ),
+    }, WORKER_RUN_NAME)
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(START_METHOD),
+                               initializer=bootstrap)
+
+
+def _start_worker(namespace: str, paths: list, initializer: Optional[tuple], initargs: tuple) -> None:
+    """Make the addons paths of the parent importable in the worker, then run the initializer."""
+    package = import_module(namespace)
+    for path in paths:
+        if path not in package.__path__:
+            package.__path__.append(path)
+    if initializer is not None:
+        module, name = initializer
+        getattr(import_module(module), name)(*initargs)
+
+
+if __name__ == WORKER_RUN_NAME:
+    _start_worker(*WORKER_SETUP)  # noqa: F821, given by process_pool
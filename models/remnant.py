@@ -0,0 +1,155 @@
+"""
+Remnant stock.
+
+The free space left on the sheets of a finished job is not necessarily waste: every
+offcut of at least the minimum size set on the optimizer options is recorded as a
+remnant, and later jobs of the same material cut from the remnants first (see
+stock_selection.place_on_remnants). Remnants without grain are stored with their longer
+side as length; remnants with a grain keep the orientation they had on their sheet, since
+the packers lay grain-locked panels along the length of the stock. They are looked up
+through a partial index on (material, width, length) over the available ones only, so
+that finding the few that can host a job's panels stays cheap with tens of thousands of
+used remnants in the table.
+"""
+from typing import List, Tuple
+
+from odoo import models, fields, api, tools, _
+
+from odoo.addons.cutlist.models.paste5 import FreeRectangleIndex, Rectangle
+
+# Remnants offered to one job per stock sheet, the largest first
+REMNANT_CANDIDATES = 50
+
+# Offcuts recorded per sheet at most, the largest first
+MAX_OFFCUTS_PER_SHEET = 4
+
+
+def find_offcuts(length: float, width: float, used: List[Tuple[float, float, float, float]],
+                 min_length: float, min_width: float) -> List[Tuple[float, float, float, float]]:
+    """
+    Disjoint free rectangles (x, y, length, width) of a length x width sheet around the used
+    (x, y, length, width) footprints, with a longer side of at least min_length and a shorter
+    side of at least min_width. The maximal free rectangles are computed as by the MaxRects
+    packer, then the largest one is taken and cut out of the others, until none is big enough.
+    """
+    free = FreeRectangleIndex([Rectangle(0.0, 0.0, length, width)])
+    for x, y, used_length, used_width in used:
+        for piece in free.subtract(Rectangle(x, y, used_length, used_width)):
+            free.add(piece)
+    
+    def big_enough(rect):
+        return (max(rect.width, rect.height) >= min_length and min(rect.width, rect.height) >= min_width)
+    
+    offcuts = []
+    while len(offcuts) < MAX_OFFCUTS_PER_SHEET:
+        candidates = [rect for rect in free if big_enough(rect)]
+        if not candidates:
+            break
+        best = max(candidates, key=lambda rect: (rect.area(), -rect.x, -rect.y))
+        offcuts.append((best.x, best.y, best.width, best.height))
+        for piece in free.subtract(Rectangle(best.x, best.y, best.width, best.height)):
+            free.add(piece)
+    return offcuts
+
+
+class CuttingRemnant(models.Model):
+    _name = 'cutting.remnant'
+    _description = 'Stock Sheet Remnant'
+    _order = 'area desc, id'
+    
+    name = fields.Char('Name', required=True, index=True)
+    length = fields.Float('Length', required=True,
+                          help="Side along the length of the sheet it was cut from, the longer side without grain")
+    width = fields.Float('Width', required=True,
+                         help="Side along the width of the sheet it was cut from, the shorter side without grain")
+    area = fields.Float('Area', compute='_compute_area', store=True)
+    material_id = fields.Many2one('product.product', string='Material', help="Material of the sheet it was cut from")
+    grain_direction = fields.Selection([
+        ('none', 'No Grain Direction'),
+        ('horizontal', 'Horizontal'),
+        ('vertical', 'Vertical'),
+    ], string='Grain Direction', default='none', required=True)
+    state = fields.Selection([
+        ('available', 'Available'),
+        ('used', 'Used'),
+    ], string='Status', default='available', required=True)
+    source_job_id = fields.Many2one('cutting.job', string='Cut From Job', readonly=True, ondelete='set null')
+    reserved_job_id = fields.Many2one('cutting.job', string='Planned For Job', readonly=True, ondelete='set null',
+                                      help="Job whose cutting plan uses this remnant")
+    consumed_job_id = fields.Many2one('cutting.job', string='Used By Job', readonly=True, ondelete='set null')
+    notes = fields.Text('Notes')
+    
+    def init(self):
+        # Later jobs look the available remnants up by material and size
+        tools.create_index(self.env.cr, 'cutting_remnant_available_size_index', self._table,
+                           ['material_id', 'width', 'length'], where="state = 'available'")
+    
+    @api.depends('length', 'width')
+    def _compute_area(self):
+        for remnant in self:
+            remnant.area = remnant.length * remnant.width
+    
+    @api.constrains('length', 'width', 'grain_direction')
+    def _check_dimensions(self):
+        for remnant in self:
+            if remnant.width <= 0 or remnant.length <= 0:
+                raise models.ValidationError(_("A remnant needs a positive length and width."))
+            if remnant.grain_direction == 'none' and remnant.length < remnant.width:
+                raise models.ValidationError(_("A remnant without grain needs a length at least as long as its width."))
+    
+    @api.model
+    def _candidates(self, material, panels, job, excluded_ids=(), kerf=0.0):
+        """
+        Available remnants of the material (an id or 'default') that may host some of the
+        prepared panels with the kerf around them: both sides at least the narrowest of their
+        shorter sides and one at least the shortest of their longer sides, as remnants with a
+        grain may be wider than long. Remnants planned for other jobs or in excluded_ids are
+        skipped. At most REMNANT_CANDIDATES, the largest first.
+        """
+        if not panels:
+            return self.browse()
+        shorter = min(min(panel['length'], panel['width']) for panel in panels) + kerf
+        longer = min(max(panel['length'], panel['width']) for panel in panels) + kerf
+        domain = [
+            ('state', '=', 'available'),
+            ('material_id', '=', material if material != 'default' else False),
+            ('width', '>=', shorter),
+            ('length', '>=', shorter),
+            '|', ('length', '>=', longer), ('width', '>=', longer),
+            ('reserved_job_id', 'in', [False, job.id]),
+        ]
+        if excluded_ids:
+            domain.append(('id', 'not in', list(excluded_ids)))
+        return self.search(domain, limit=REMNANT_CANDIDATES)
+    
+    def _stock_sheet_data(self):
+        """Convert the remnant to the stock sheet format of the optimizer, one sheet that costs nothing."""
+        self.ensure_one()
+        return {
+            'length': self.length,
+            'width': self.width,
+            'quantity': 1,
+            'material': self.material_id.id if self.material_id else 'default',
+            'label': self.name,
+            'grain_direction': self.grain_direction,
+            'cost': 0.0,
+            'remnant_id': self.id,
+        }
+    
+    @api.model
+    def _offcut_values(self, job, material, grain_direction, offcut, sheet_number):
+        """
+        Values of the remnant for an (x, y, length, width) offcut of a sheet of the job. Only
+        offcuts without grain are turned to put their longer side first, see the module docstring.
+        """
+        _x, _y, offcut_length, offcut_width = offcut
+        if offcut_width > offcut_length and (grain_direction or 'none') == 'none':
+            offcut_length, offcut_width = offcut_width, offcut_length
+        return {
+            'name': _("%s, sheet %s: %s x %s", job.name, sheet_number, round(offcut_length, 1), round(offcut_width, 1)),
+            'length': offcut_length,
+            'width': offcut_width,
+            'material_id': material if material != 'default' else False,
+            'grain_direction': grain_direction or 'none',
+            'source_job_id': job.id,
+        }
@@ -0,0 +1,349 @@
+"""
+Cost-minimizing choice among several stock sheet sizes.
+
+When a job may draw on every stock sheet of its material, choose_stock decides which
+sizes to cut and how many sheets of each, so that the panels are placed at the lowest
+stock cost. It is a branch and bound over the sizes: a branch packs as much of the
+demand as it can on one size (up to the sheets available) and places what is left on
+the other sizes, recursively. Branches are explored from the lowest lower bound up and
+cut as soon as their bound cannot beat the best plan found so far. The bound of a branch
+is the cost of the whole sheets of its size needed by the area of the panels that fit on
+it, plus the continuous bound of the rest: its area spread over the sizes cheapest per
+unit of area, each up to its available sheets, as if sheets could be cut into any shape.
+Every size is tried first, but the rest of the demand only follows the sizes with the
+best bounds (BRANCH_WIDTH), which keeps the packings tried quadratic in the number of
+sizes at worst. Sizes that none of the panels left fit on, with the kerf and grain of the
+packer, are not branched on, and a packing that places nothing leaves the demand as is.
+
+Every plan found then has its least used sheets packed again on cheaper sizes, so that a
+half used large sheet at the end becomes a smaller one when that costs less.
+
+Packing itself is left to the solve function given, the optimizer of a single size,
+whose results are memoized per (size, demand).
+
+Remnants, the offcuts of earlier jobs (see cutting.remnant), are single sheets that cost
+nothing: place_on_remnants fills them, the largest first, before any of this.
+"""
+import math
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .paste5 import NoValidPatternError, OptimizerStats
+
+# Least used sheets of a plan tried on cheaper sizes
+TAIL_SHEETS = 2
+
+# Sizes tried for the rest of the demand at each level below the first one, best bounds first
+BRANCH_WIDTH = 1
+
+# Slack for float sums of costs and areas
+EPSILON = 1e-9
+
+# Demand left to place: {panel index: quantity}
+Demand = Dict[int, int]
+
+# A sheet of a plan: (size index, [[panel index, x, y, rotated], ...], used area)
+PlanSheet = Tuple[int, List[list], float]
+
+
+def sheet_costs(sheets) -> List[float]:
+    """
+    Cost of one sheet of each size: its cost when every size has one, its area otherwise,
+    so that the least stock area is used.
+    """
+    if all(sheet.get('cost') for sheet in sheets):
+        return [float(sheet['cost']) for sheet in sheets]
+    return [float(sheet['length']) * float(sheet['width']) for sheet in sheets]
+
+
+def stock_reference(sheet) -> list:
+    """What a sheet cut from a prepared stock sheet is recorded with: [material, grain, remnant id or False]."""
+    return [sheet['material'], sheet['grain_direction'] or 'none', sheet.get('remnant_id') or False]
+
+
+def fits(panel, sheet, kerf: float = 0.0, consider_grain: bool = False) -> bool:
+    """
+    Whether the panel fits on the sheet as the packers place it: its size plus the kerf,
+    turned only when its grain allows (see paste5.Panel.can_rotate).
+    """
+    length, width = float(panel['length']) + kerf, float(panel['width']) + kerf
+    sheet_length, sheet_width = float(sheet['length']), float(sheet['width'])
+    if length <= sheet_length and width <= sheet_width:
+        return True
+    can_rotate = not consider_grain or (panel['grain_direction'] or 'none') == 'none'
+    return can_rotate and width <= sheet_length and length <= sheet_width
+
+
+class StockChooser:
+    """
+    Branch and bound over the stock sizes, see the module docstring. sheets are prepared
+    stock sheet dicts (see CuttingJob._stock_sheet_data), solve(panels, sheet) packs
+    prepared panels on one size and returns a result of cutting_job._optimize_sheet.
+    kerf and consider_grain are those of the options solve packs with.
+    """
+    
+    def __init__(self, panels, sheets, solve: Callable, kerf: float = 0.0, consider_grain: bool = False):
+        self.panels = panels
+        self.sheets = sheets
+        self.solve = solve
+        self.costs = sheet_costs(sheets)
+        self.areas = [float(sheet['length']) * float(sheet['width']) for sheet in sheets]
+        self.available = [max(int(sheet['quantity']), 0) for sheet in sheets]
+        self.panel_areas = [float(panel['length']) * float(panel['width']) for panel in panels]
+        self.fitting = [[fits(panel, sheet, kerf, consider_grain) for sheet in sheets] for panel in panels]
+        self.stats = OptimizerStats()
+        self.trace: Optional[list] = None
+        # Whether a time limit stopped the search or solver of a packing, see EnhancedCuttingStockOptimizer
+        self.time_limited = False
+        self.pruned = 0
+        # (size, sheets allowed, demand) -> (plan sheets, demand left)
+        self._packed: Dict[tuple, Tuple[List[PlanSheet], Demand]] = {}
+        # (panels left unplaced, cost, plan sheets) of the best plan found
+        self.best: Optional[Tuple[int, float, List[PlanSheet]]] = None
+    
+    def choose(self) -> Tuple[List[PlanSheet], int]:
+        """Search the plan of least cost. Returns its sheets and the number of panels it leaves unplaced."""
+        start = time.perf_counter()
+        demand = {index: int(panel['quantity']) for index, panel in enumerate(self.panels)
+                  if int(panel['quantity']) > 0}
+        sizes = [size for size, available in enumerate(self.available) if available]
+        self._branch(demand, sizes, [], 0)
+        self.stats.add('stock selection', time.perf_counter() - start, len(self._packed))
+        self.stats.add('stock sizes pruned', 0.0, self.pruned)
+        if self.best is None:
+            return [], sum(demand.values())
+        unplaced, _cost, sheets = self.best
+        return sheets, unplaced
+    
+    def polish(self, solve: Callable) -> None:
+        """
+        Pack the panels of each size of the best plan again with solve, typically the
+        optimizer with its search enabled, and keep the sheets when fewer are needed.
+        """
+        if self.best is None:
+            return
+        unplaced, _cost, sheets = self.best
+        start = time.perf_counter()
+        polished = []
+        for size in sorted({size for size, _placements, _used in sheets}):
+            group = [sheet for sheet in sheets if sheet[0] == size]
+            packed, left = self._pack(self._demand(group), size, len(group), solve)
+            polished += packed if not left and len(packed) < len(group) else group
+        self.stats.add('stock polish', time.perf_counter() - start)
+        self.best = (unplaced, self._cost(polished), polished)
+    
+    def _cost(self, sheets: List[PlanSheet]) -> float:
+        return sum(self.costs[size] for size, _placements, _used in sheets)
+    
+    def _demand(self, sheets: List[PlanSheet]) -> Demand:
+        """Panels placed on the sheets."""
+        demand: Demand = {}
+        for _size, placements, _used in sheets:
+            for placement in placements:
+                demand[placement[0]] = demand.get(placement[0], 0) + 1
+        return demand
+    
+    def _can_improve(self, unplaced: int, cost: float) -> bool:
+        """Whether a plan leaving unplaced panels at this cost would beat the best one."""
+        if self.best is None:
+            return True
+        best_unplaced, best_cost, _sheets = self.best
+        return unplaced < best_unplaced or (unplaced == best_unplaced and cost < best_cost - EPSILON)
+    
+    def _area_bound(self, area: float, sizes: List[int]) -> float:
+        """Continuous lower bound on the cost of covering area with the sizes, see the module docstring."""
+        cost = 0.0
+        for size in sorted(sizes, key=lambda size: self.costs[size] / self.areas[size]):
+            if area <= EPSILON:
+                break
+            covered = min(area, self.areas[size] * self.available[size])
+            cost += covered / self.areas[size] * self.costs[size]
+            area -= covered
+        return cost
+    
+    def _bound(self, demand: Demand, size: int, sizes: List[int]) -> Tuple[int, float]:
+        """
+        Lower bound (panels left unplaced, cost) of a branch packing the demand on size
+        first, then on the other sizes.
+        """
+        others = [other for other in sizes if other != size]
+        area = fit_area = 0.0
+        unplaceable = 0
+        for index, quantity in demand.items():
+            panel_area = self.panel_areas[index] * quantity
+            area += panel_area
+            if self.fitting[index][size]:
+                fit_area += panel_area
+            elif not any(self.fitting[index][other] for other in others):
+                unplaceable += quantity
+        count = min(math.ceil(fit_area / self.areas[size] - EPSILON), self.available[size])
+        if count < self.available[size]:
+            # Every panel that fits goes on this size
+            rest = area - fit_area
+        else:
+            rest = area - min(fit_area, count * self.areas[size])
+        return unplaceable, count * self.costs[size] + self._area_bound(max(rest, 0.0), others)
+    
+    def _pack(self, demand: Demand, size: int, quantity: Optional[int] = None,
+              solve: Optional[Callable] = None) -> Tuple[List[PlanSheet], Demand]:
+        """
+        Pack the demand on at most quantity sheets of one size (all available by default),
+        with solve instead of the search's own solve function when given. Returns the
+        sheets and the demand left.
+        """
+        quantity = self.available[size] if quantity is None else quantity
+        key = (size, quantity, tuple(sorted(demand.items())))
+        memoize = solve is None
+        if memoize and key in self._packed:
+            return self._packed[key]
+        indexes = sorted(demand)
+        panels = [dict(self.panels[index], quantity=demand[index]) for index in indexes]
+        try:
+            result = (solve or self.solve)(panels, dict(self.sheets[size], quantity=quantity))
+        except NoValidPatternError:
+            # None of the panels could be placed on this size
+            packed = ([], dict(demand))
+            if memoize:
+                self._packed[key] = packed
+            return packed
+        self.stats.merge(result['stats'])
+        if result['trace'] is not None:
+            self.trace = (self.trace or []) + result['trace']
+        self.time_limited = self.time_limited or result.get('time_limited', False)
+        
+        left = dict(demand)
+        sheets = []
+        for placements in result['placements']:
+            # Panel indexes back to those of the job
+            placements = [[indexes[placement[0]]] + list(placement[1:]) for placement in placements]
+            for placement in placements:
+                left[placement[0]] -= 1
+            sheets.append((size, placements, sum(self.panel_areas[placement[0]] for placement in placements)))
+        packed = (sheets, {index: quantity for index, quantity in left.items() if quantity})
+        if memoize:
+            self._packed[key] = packed
+        return packed
+    
+    def _branch(self, demand: Demand, sizes: List[int], sheets: List[PlanSheet], depth: int) -> None:
+        """Complete the plan made of sheets by placing the demand on the sizes, keeping the best plan."""
+        if not demand or not sizes:
+            self._offer(sheets, demand)
+            return
+        cost = self._cost(sheets)
+        # Sizes none of the panels left fit on cannot extend the plan
+        candidates = sorted((self._bound(demand, size, sizes), size) for size in sizes
+                            if any(self.fitting[index][size] for index in demand))
+        if depth:
+            candidates = candidates[:BRANCH_WIDTH]
+        extended = False
+        for position, ((unplaceable, bound), size) in enumerate(candidates):
+            if not self._can_improve(unplaceable, cost + bound):
+                # Candidates are sorted by bound, none of the next ones can do better
+                self.pruned += len(candidates) - position
+                return
+            packed, left = self._pack(demand, size)
+            if not packed:
+                continue
+            extended = True
+            self._branch(left, [other for other in sizes if other != size], sheets + packed, depth + 1)
+        if not extended:
+            # No size takes any of the panels left
+            self._offer(sheets, demand)
+    
+    def _offer(self, sheets: List[PlanSheet], left: Demand) -> None:
+        """Keep a complete plan, its tail packed on cheaper sizes, if it beats the best one."""
+        sheets = self._improve_tail(sheets)
+        unplaced = sum(left.values())
+        cost = self._cost(sheets)
+        if self._can_improve(unplaced, cost):
+            self.best = (unplaced, cost, sheets)
+    
+    def _improve_tail(self, sheets: List[PlanSheet]) -> List[PlanSheet]:
+        """Pack the least used sheets of a plan on cheaper sizes when that lowers its cost."""
+        for count in range(1, min(TAIL_SHEETS, len(sheets)) + 1):
+            order = sorted(range(len(sheets)), key=lambda number: sheets[number][2] / self.areas[sheets[number][0]])
+            tail = set(order[:count])
+            kept = [sheet for number, sheet in enumerate(sheets) if number not in tail]
+            demand = self._demand([sheets[number] for number in tail])
+            demand_area = sum(self.panel_areas[index] * quantity for index, quantity in demand.items())
+            best_cost = self._cost([sheets[number] for number in tail])
+            best_sheets = None
+            for size in sorted(range(len(self.sheets)), key=lambda size: self.costs[size]):
+                if self.costs[size] >= best_cost - EPSILON:
+                    break
+                quantity = self.available[size] - sum(1 for sheet in kept if sheet[0] == size)
+                if quantity <= 0 or not all(self.fitting[index][size] for index in demand):
+                    continue
+                if math.ceil(demand_area / self.areas[size] - EPSILON) * self.costs[size] >= best_cost - EPSILON:
+                    continue
+                packed, left = self._pack(demand, size, quantity)
+                if not left and self._cost(packed) < best_cost - EPSILON:
+                    best_cost, best_sheets = self._cost(packed), packed
+            if best_sheets is not None:
+                sheets = kept + best_sheets
+        return sheets
+
+
+def choose_stock(panels, sheets, solve: Callable, polish: Optional[Callable] = None, kerf: float = 0.0,
+                 consider_grain: bool = False):
+    """
+    Place the prepared panels on the cheapest mix of the stock sheets, see StockChooser.
+    polish, when given, packs the chosen sizes again (see StockChooser.polish). Returns
+    the keys of cutting_job.optimize_job_data, every sheet with its own size and cost.
+    """
+    chooser = StockChooser(panels, sheets, solve, kerf, consider_grain)
+    plan, unplaced = chooser.choose()
+    if polish is not None:
+        chooser.polish(polish)
+        plan = chooser.best[2] if chooser.best else plan
+    
+    # Sheets of a size together, in the order of the stock sheets
+    return plan_result(sorted(plan, key=lambda sheet: sheet[0]), sheets, unplaced, chooser.stats, chooser.trace,
+                       chooser.time_limited)
+
+
+def place_on_remnants(panels, remnants, solve: Callable, kerf: float = 0.0, consider_grain: bool = False):
+    """
+    Cut what can be cut from the remnants (prepared stock sheets of one sheet each), the
+    largest first, packing the demand left on each with solve like StockChooser does.
+    Remnants that none of the demand left fits on, or where solve places nothing, are
+    skipped. Returns the keys of cutting_job.optimize_job_data for the remnants used, and
+    the demand {panel index: quantity} left for the regular stock.
+    """
+    start = time.perf_counter()
+    chooser = StockChooser(panels, remnants, solve, kerf, consider_grain)
+    demand = {index: int(panel['quantity']) for index, panel in enumerate(panels) if int(panel['quantity']) > 0}
+    plan = []
+    tried = 0
+    for size in sorted(range(len(remnants)), key=lambda size: -chooser.areas[size]):
+        if not demand:
+            break
+        if not any(chooser.fitting[index][size] for index in demand):
+            continue
+        tried += 1
+        packed, demand = chooser._pack(demand, size, 1)
+        plan += packed
+    chooser.stats.add('remnants', time.perf_counter() - start, tried)
+    return plan_result(plan, remnants, 0, chooser.stats, chooser.trace, chooser.time_limited), demand
+
+
+def plan_result(plan: List[PlanSheet], sheets, unplaced: int, stats: OptimizerStats, trace: Optional[list],
+                time_limited: bool = False):
+    """The keys of cutting_job.optimize_job_data for the plan sheets, cut from the sizes of sheets."""
+    sheet_area = sum(float(sheets[size]['length']) * float(sheets[size]['width']) for size, _placements, _used in plan)
+    used_area = sum(used for _size, _placements, used in plan)
+    return {
+        'usage_ratio': used_area / sheet_area if sheet_area else 0.0,
+        'waste_area': float(sheet_area - used_area),
+        'total_panels': sum(len(placements) for _size, placements, _used in plan),
+        'sheet_count': len(plan),
+        'unplaced_panels': unplaced,
+        'placements': [placements for _size, placements, _used in plan],
+        'sheet_sizes': [[float(sheets[size]['length']), float(sheets[size]['width']), sheets[size]['label']]
+                        for size, _placements, _used in plan],
+        'sheet_costs': [float(sheets[size].get('cost') or 0.0) for size, _placements, _used in plan],
+        'sheet_stock': [stock_reference(sheets[size]) for size, _placements, _used in plan],
+        'stats': stats,
+        'trace': trace,
+        'time_limited': time_limited,
+    }
@@ -0,0 +1,281 @@
+"""
+Warm start of a re-optimization after the lines of a job changed.
+
+The plan of the previous run is the starting point. Its placements are matched to the
+new panels by line and size: copies of panels that were removed, or whose quantity went
+down, free their space, the emptied sheets are dropped, and so are the sheets whose stock
+is no longer offered. The copies added are first packed into the free space of the kept
+sheets (the maximal free rectangles around the kept panels, as by the MaxRects packer),
+and what does not fit is optimized on new sheets from the stock left.
+
+Only the sheets touched by the edit are then improved: the least used of them, at most
+LOCAL_SHEETS, are packed again together with the panels that went to new sheets (with
+the least used sheets of the plan when that leaves room), and the
+repacked plan replaces the warm one when it is cheaper. The randomized search gets the
+share of its time and iteration limits of the panels packed again. The work is therefore
+bounded by the size of the edit, not of the job. When less than MIN_KEPT of the panels keep their
+place, the previous plan is of no use and reoptimize returns None.
+"""
+import hashlib
+import json
+import math
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+
+from .guillotine import cut_sequence
+from .paste5 import MaxRectsOptimizer, OptimizerStats, Panel, Rectangle, StockSheet
+
+# Sheets touched by the edit packed again with the new panels, the least used first
+LOCAL_SHEETS = 4
+
+# Share of the panels that must keep their place for the warm start to be worth it
+MIN_KEPT = 0.5
+
+# Options a previous plan stays valid under whatever their value: drawing, speed and search
+PLAN_NEUTRAL_OPTIONS = {
+    'labels_on_panels', 'renderer', 'vectorized_scoring', 'parallel_workers', 'profile_optimization', 'debug_trace',
+    'search_time_limit', 'search_max_iterations', 'search_seed', 'solver_time_limit', 'solver_mip_gap', 'warm_start',
+}
+
+
+def plan_key(options) -> str:
+    """Hash of the options that shape a plan, a previous plan is only reused under the same ones."""
+    shaping = {key: value for key, value in options.items() if key not in PLAN_NEUTRAL_OPTIONS}
+    encoded = json.dumps(shaping, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+def panel_key(panel) -> tuple:
+    """What identifies a prepared panel between two runs: its line, size, material and grain."""
+    return (panel['id'], round(float(panel['length']), 6), round(float(panel['width']), 6),
+            str(panel['material']), panel['grain_direction'] or 'none')
+
+
+def stock_key(sheet) -> tuple:
+    """What identifies a prepared stock sheet between two runs, a remnant by its id."""
+    if sheet.get('remnant_id'):
+        return ('remnant', sheet['remnant_id'])
+    return ('sheet', str(sheet['material']), round(float(sheet['length']), 6), round(float(sheet['width']), 6),
+            sheet['label'])
+
+
+def offered_stock(stock_sheet) -> Dict[tuple, int]:
+    """Sheets available per stock_key in the prepared stock, with its alternatives, remnants and other materials."""
+    offered = {}
+    for sheet in _stock_sheets(stock_sheet):
+        offered[stock_key(sheet)] = max(int(sheet['quantity']), 0)
+    return offered
+
+
+def _stock_sheets(stock_sheet):
+    sheets = [stock_sheet]
+    for other in (stock_sheet.get('material_stock') or {}).values():
+        sheets.append(other)
+    for sheet in list(sheets):
+        sheets += (sheet.get('alternatives') or []) + (sheet.get('remnants') or [])
+    return sheets
+
+
+def stock_left(stock_sheet, used: Counter):
+    """A copy of the prepared stock without the sheets used ({stock_key: count}), remnants used removed."""
+    stock_sheet = dict(stock_sheet, quantity=max(int(stock_sheet['quantity']) - used[stock_key(stock_sheet)], 0))
+    if stock_sheet.get('alternatives'):
+        stock_sheet['alternatives'] = [stock_left(sheet, used) for sheet in stock_sheet['alternatives']]
+    if stock_sheet.get('remnants'):
+        stock_sheet['remnants'] = [sheet for sheet in stock_sheet['remnants'] if not used[stock_key(sheet)]]
+    if stock_sheet.get('material_stock'):
+        stock_sheet['material_stock'] = {material: stock_left(sheet, used)
+                                         for material, sheet in stock_sheet['material_stock'].items()}
+    return stock_sheet
+
+
+class WarmSheet:
+    """A sheet of the plan being built: its size, cost and stock, and its [[panel index, x, y, rotated], ...]."""
+    __slots__ = ('length', 'width', 'label', 'cost', 'stock', 'placements', 'touched')
+    
+    def __init__(self, size, cost, stock, placements, touched=False):
+        self.length, self.width, self.label = float(size[0]), float(size[1]), size[2]
+        self.cost = float(cost or 0.0)
+        self.stock = list(stock)
+        self.placements = placements
+        self.touched = touched
+    
+    def key(self) -> tuple:
+        material, _grain, remnant_id = self.stock
+        if remnant_id:
+            return ('remnant', remnant_id)
+        return ('sheet', str(material), round(self.length, 6), round(self.width, 6), self.label)
+
+
+class WarmStart:
+    """
+    Re-optimization of a job from its previous plan, see the module docstring. panels,
+    stock_sheet and options are the prepared data of the job, panel_stock gives for every
+    panel the material (str) of the sheets it may go on, None when none. solve is
+    cutting_job.optimize_job_data.
+    """
+    
+    def __init__(self, panels, stock_sheet, options, panel_stock: List[Optional[str]], solve: Callable):
+        self.panels = panels
+        self.stock_sheet = stock_sheet
+        self.options = options
+        self.panel_stock = panel_stock
+        self.solve = solve
+        self.kerf = float(options['kerf_thickness'])
+        self.panel_areas = [float(panel['length']) * float(panel['width']) for panel in panels]
+        self.quantity = sum(int(panel['quantity']) for panel in panels)
+        self.stats = OptimizerStats()
+        self.trace: Optional[list] = None
+    
+    def run(self, previous) -> Optional[dict]:
+        """Optimize from the previous plan (see CuttingJob._previous_plan), or None when it is of no use."""
+        start = time.perf_counter()
+        sheets, demand = self._keep(previous)
+        kept = sum(len(sheet.placements) for sheet in sheets)
+        if kept < MIN_KEPT * self.quantity:
+            return None
+        self._insert(sheets, demand)
+        self.stats.add('warm start', time.perf_counter() - start, kept)
+        
+        plan, unplaced = self._complete(sheets, demand)
+        start = time.perf_counter()
+        touched = sorted((sheet for sheet in sheets if sheet.touched), key=self._usage)[:LOCAL_SHEETS]
+        if any(demand.values()):
+            # Panels went to new sheets, the least used sheets may take them instead
+            touched += sorted((sheet for sheet in sheets if not sheet.touched),
+                              key=self._usage)[:LOCAL_SHEETS - len(touched)]
+        if touched:
+            chosen = set(map(id, touched))
+            pool = Counter(demand)
+            for sheet in touched:
+                pool.update(placement[0] for placement in sheet.placements)
+            local_plan, local_unplaced = self._complete([sheet for sheet in sheets if id(sheet) not in chosen], pool)
+            if self._plan_key(local_plan, local_unplaced) < self._plan_key(plan, unplaced):
+                plan, unplaced = local_plan, local_unplaced
+            self.stats.add('local improvement', time.perf_counter() - start, len(touched))
+        return self._result(plan, unplaced)
+    
+    def _keep(self, previous):
+        """
+        The sheets of the previous plan without the copies no longer asked for, in order,
+        and the demand {panel index: quantity} they leave.
+        """
+        positions = {panel_key(panel): index for index, panel in enumerate(self.panels)}
+        previous_index = [positions.get(tuple(key)) for key in previous['panel_keys']]
+        demand = {index: int(panel['quantity']) for index, panel in enumerate(self.panels)}
+        available = Counter(offered_stock(self.stock_sheet))
+        sheets = []
+        for placements, size, cost, stock in zip(previous['sheets'], previous['sheet_sizes'],
+                                                 previous['sheet_costs'], previous['sheet_stock']):
+            sheet = WarmSheet(size, cost, stock, [])
+            if available[sheet.key()] <= 0:
+                # Its stock is gone, the panels it held are placed again
+                continue
+            for panel_index, x, y, rotated in placements:
+                index = previous_index[panel_index]
+                if index is None or not demand[index]:
+                    sheet.touched = True
+                    continue
+                demand[index] -= 1
+                sheet.placements.append([index, x, y, rotated])
+            if sheet.placements:
+                available[sheet.key()] -= 1
+                sheets.append(sheet)
+        return sheets, demand
+    
+    def _insert(self, sheets: List[WarmSheet], demand: Dict[int, int]) -> None:
+        """Pack the demand, the largest panels first, into the free space of the sheets of their material."""
+        if not any(demand.values()):
+            return
+        panel_objects = [Panel(length=float(panel['length']), width=float(panel['width']),
+                               quantity=int(panel['quantity']), label=panel['label'], material=panel['material'],
+                               grain_direction=panel['grain_direction'] or 'none') for panel in self.panels]
+        order = sorted(demand, key=lambda index: -self.panel_areas[index])
+        guillotine = self.options['packing_engine'] == 'guillotine'
+        for sheet in sheets:
+            wanted = [index for index in order if demand[index] and self.panel_stock[index] == str(sheet.stock[0])]
+            if not wanted:
+                continue
+            packer = MaxRectsOptimizer(StockSheet(length=sheet.length, width=sheet.width, label=sheet.label),
+                                       self.kerf, bool(self.options['consider_grain']), panels=panel_objects,
+                                       heuristic=self.options['placement_heuristic'])
+            for index, x, y, rotated in sheet.placements:
+                panel = panel_objects[index]
+                length, width = (panel.width, panel.length) if rotated else (panel.length, panel.width)
+                packer.pattern.add_placement(index, x, y, rotated, index)
+                packer.split_rectangle(Rectangle(x, y, length + self.kerf, width + self.kerf),
+                                       length + self.kerf, width + self.kerf)
+            for index in wanted:
+                packer.place_run(panel_objects[index], index, demand[index])
+            pattern = packer.get_pattern()
+            if len(pattern) == len(sheet.placements):
+                continue
+            if guillotine and cut_sequence(pattern, self.kerf) is None:
+                # The panels added would need cuts the saw cannot make, they go to new sheets
+                continue
+            for index, x, y, rotated in list(zip(pattern.panel_types, pattern.xs, pattern.ys,
+                                                 pattern.rotated))[len(sheet.placements):]:
+                demand[index] -= 1
+                sheet.placements.append([index, x, y, bool(rotated)])
+            sheet.touched = True
+    
+    def _complete(self, sheets: List[WarmSheet], demand) -> tuple:
+        """The sheets plus new ones for the demand, from the stock they leave. Returns them and the panels unplaced."""
+        indexes = sorted(index for index, quantity in demand.items() if quantity)
+        if not indexes:
+            return list(sheets), 0
+        used = Counter(sheet.key() for sheet in sheets)
+        result = self.solve([dict(self.panels[index], quantity=demand[index]) for index in indexes],
+                            stock_left(self.stock_sheet, used), self._scaled_options(sum(demand.values())))
+        self.stats.merge(result['stats'])
+        if result['trace'] is not None:
+            self.trace = (self.trace or []) + result['trace']
+        added = [WarmSheet(size, cost, stock, [[indexes[placement[0]]] + list(placement[1:])
+                                               for placement in placements])
+                 for placements, size, cost, stock in zip(result['placements'], result['sheet_sizes'],
+                                                          result['sheet_costs'], result['sheet_stock'])]
+        return list(sheets) + added, result['unplaced_panels']
+    
+    def _scaled_options(self, quantity: int):
+        """The options with the search limits cut down to the share of the panels that quantity is."""
+        share = quantity / self.quantity if self.quantity else 1.0
+        iterations = int(self.options['search_max_iterations'])
+        return dict(self.options, search_time_limit=float(self.options['search_time_limit']) * share,
+                    search_max_iterations=math.ceil(iterations * share) if iterations else 0)
+    
+    def _usage(self, sheet: WarmSheet) -> float:
+        return sum(self.panel_areas[placement[0]] for placement in sheet.placements) / (sheet.length * sheet.width)
+    
+    @staticmethod
+    def _plan_key(sheets: List[WarmSheet], unplaced: int) -> tuple:
+        """Plans compare by panels unplaced, then cost, then stock area."""
+        return (unplaced, round(sum(sheet.cost for sheet in sheets), 6),
+                round(sum(sheet.length * sheet.width for sheet in sheets), 6))
+    
+    def _result(self, sheets: List[WarmSheet], unplaced: int) -> dict:
+        """The keys of cutting_job.optimize_job_data for the plan."""
+        sheet_area = sum(sheet.length * sheet.width for sheet in sheets)
+        used_area = sum(self.panel_areas[placement[0]] for sheet in sheets for placement in sheet.placements)
+        return {
+            'usage_ratio': used_area / sheet_area if sheet_area else 0.0,
+            'waste_area': float(sheet_area - used_area),
+            'total_panels': sum(len(sheet.placements) for sheet in sheets),
+            'sheet_count': len(sheets),
+            'unplaced_panels': unplaced,
+            'placements': [sheet.placements for sheet in sheets],
+            'sheet_sizes': [[sheet.length, sheet.width, sheet.label] for sheet in sheets],
+            'sheet_costs': [sheet.cost for sheet in sheets],
+            'sheet_stock': [sheet.stock for sheet in sheets],
+            'stats': self.stats,
+            'trace': self.trace,
+        }
+
+
+def reoptimize(panels, stock_sheet, options, previous, panel_stock: List[Optional[str]],
+               solve: Callable) -> Optional[dict]:
+    """
+    Optimize the prepared data of a job from its previous plan, see WarmStart. Returns the
+    keys of cutting_job.optimize_job_data, or None when the previous plan is of no use.
+    """
+    return WarmStart(panels, stock_sheet, options, panel_stock, solve).run(previous)
@@ -0,0 +1,8 @@
+from . import test_batch
+from . import test_bounds
+from . import test_guillotine
+from . import test_nesting
+from . import test_packing
+from . import test_remnant
+from . import test_stock_selection
+from . import test_warm_start
@@ -0,0 +1,52 @@
+"""Prepared job data shared by the tests, in the format of CuttingJob._prepare_optimization_data."""
+
+# The defaults of cutting.optimizer.options, on several sheets and without the randomized search
+OPTIONS = {
+    'kerf_thickness': 0.0,
+    'labels_on_panels': True,
+    'use_single_sheet': False,
+    'consider_material': True,
+    'edge_banding': False,
+    'consider_grain': False,
+    'vectorized_scoring': False,
+    'parallel_workers': 0,
+    'search_time_limit': 0.0,
+    'search_max_iterations': 0,
+    'search_seed': 0,
+    'optimization_mode': 'heuristic',
+    'solver_time_limit': 60.0,
+    'solver_mip_gap': 0.01,
+    'placement_heuristic': 'bssf',
+    'packing_engine': 'maxrects',
+    'guillotine_split': 'shorter_leftover',
+    'block_packing': True,
+    'stock_selection': 'job',
+    'renderer': 'vector',
+    'profile_optimization': False,
+    'debug_trace': False,
+    'warm_start': True,
+}
+
+
+def make_panel(panel_id, length, width, quantity, grain_direction='none', material='default'):
+    return {
+        'id': panel_id,
+        'length': length,
+        'width': width,
+        'quantity': quantity,
+        'label': 'P%s' % panel_id,
+        'material': material,
+        'grain_direction': grain_direction,
+    }
+
+
+def make_sheet(label, length, width, quantity=100, cost=0.0, material='default'):
+    return {
+        'length': length,
+        'width': width,
+        'quantity': quantity,
+        'material': material,
+        'label': label,
+        'grain_direction': 'none',
+        'cost': cost,
+    }
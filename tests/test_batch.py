@@ -0,0 +1,57 @@
+from odoo.fields import Command
+from odoo.tests import BaseCase, TransactionCase
+
+from odoo.addons.cutlist.models.cutting_job import optimize_job_batch
+from odoo.addons.cutlist.tests.common import OPTIONS, make_panel, make_sheet
+
+
+class TestOptimizeJobBatch(BaseCase):
+    
+    def test_runs_without_packing_have_results(self):
+        # No stock of the panel material, and no stock size any panel fits: nothing is packed
+        orphan = ([make_panel(1, 600, 300, 2, material='7')], dict(make_sheet('MDF', 2440, 1220), material=3),
+                  OPTIONS)
+        alternatives = [make_sheet('small', 500, 200, cost=1.0), make_sheet('tiny', 100, 100, cost=0.5)]
+        unfit = ([make_panel(1, 600, 300, 2)], dict(make_sheet('small', 500, 200), alternatives=alternatives),
+                 dict(OPTIONS, stock_selection='cost'))
+        normal = ([make_panel(1, 600, 300, 2)], make_sheet('MDF', 2440, 1220), OPTIONS)
+        outcomes = optimize_job_batch([orphan, unfit, normal], 1)
+        self.assertEqual([error for _result, error in outcomes], [None, None, None])
+        self.assertEqual([result['unplaced_panels'] for result, _error in outcomes], [2, 2, 0])
+
+
+class TestBatchOptimization(TransactionCase):
+    
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Optimized in this process, the jobs are too small for worker processes to pay off
+        cls.env['ir.config_parameter'].sudo().set_param('cutlist.max_concurrent_jobs', 1)
+        mdf = cls.env['product.product'].create({'name': 'MDF'})
+        oak = cls.env['product.product'].create({'name': 'Oak'})
+        sheet = cls.env['cutting.stock.sheet'].create({
+            'name': 'MDF 2440 x 1220', 'length': 2440, 'width': 1220, 'material_id': mdf.id,
+            'available_quantity': 10,
+        })
+        options = cls.env['cutting.optimizer.options'].create({
+            'name': 'Batch', 'use_single_sheet': False, 'consider_material': True,
+        })
+        jobs = cls.env['cutting.job']
+        for name, material in (('Oak job', oak), ('MDF job', mdf)):
+            panel = cls.env['cutting.panel'].create({
+                'name': name, 'length': 600, 'width': 300, 'material_id': material.id,
+            })
+            jobs |= jobs.create({
+                'name': name, 'stock_sheet_id': sheet.id, 'options_id': options.id,
+                'line_ids': [Command.create({'panel_id': panel.id, 'quantity': 2})],
+            })
+        cls.oak_job, cls.mdf_job = jobs
+    
+    def test_job_without_stock_does_not_stop_the_batch(self):
+        errors = (self.oak_job | self.mdf_job)._optimize_batch()
+        self.assertEqual(errors, {self.oak_job.id: False, self.mdf_job.id: False})
+        self.assertEqual(self.oak_job.state, 'optimized')
+        self.assertEqual(self.oak_job.unplaced_panels, 2)
+        self.assertEqual(self.mdf_job.state, 'optimized')
+        self.assertEqual(self.mdf_job.total_panels, 2)
+        self.assertEqual(self.mdf_job.unplaced_panels, 0)
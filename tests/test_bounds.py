@@ -0,0 +1,37 @@
+from odoo.tests import BaseCase
+
+from odoo.addons.cutlist.models.bounds import (
+    area_bound, continuous_bound, l2_bound, large_item_bound, sheet_bound,
+)
+
+
+class TestBounds(BaseCase):
+    
+    # (items, sheet length, sheet width, sheets of an optimal plan), worked out by hand
+    INSTANCES = [
+        # Four quarters fill one sheet exactly
+        ([(5.0, 5.0, 4, True)], 10.0, 10.0, 1),
+        # No two panels larger than half the sheet both ways share one
+        ([(6.0, 6.0, 3, True)], 10.0, 10.0, 3),
+        # Two stacked and one turned in the strip left: three per sheet
+        ([(6.0, 4.0, 5, True)], 10.0, 10.0, 2),
+        # The panels across the whole length leave a 4 wide strip the square cannot use
+        ([(10.0, 6.0, 2, False), (5.0, 5.0, 1, False)], 10.0, 10.0, 3),
+        # Locked along the width, the strips only fit two per sheet
+        ([(3.0, 8.0, 5, False)], 10.0, 10.0, 2),
+        # Nothing fits, no plan places anything
+        ([(12.0, 3.0, 2, False)], 10.0, 10.0, 0),
+    ]
+    
+    def test_bounds_never_exceed_the_optimum(self):
+        for items, length, width, optimum in self.INSTANCES:
+            fitting = [item for item in items if item[0] <= length and item[1] <= width
+                       or item[3] and item[1] <= length and item[0] <= width]
+            for bound in (area_bound, large_item_bound, l2_bound):
+                self.assertLessEqual(bound(fitting, length, width), optimum, (bound.__name__, items))
+            self.assertLessEqual(sheet_bound(items, length, width), optimum, items)
+            self.assertLessEqual(continuous_bound(items, [(length, width), (length / 2, width)]), optimum, items)
+    
+    def test_large_panels_need_a_sheet_each(self):
+        self.assertEqual(sheet_bound([(6.0, 6.0, 3, True)], 10.0, 10.0), 3)
+        self.assertEqual(sheet_bound([(5.0, 5.0, 4, True)], 10.0, 10.0), 1)
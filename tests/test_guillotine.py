@@ -0,0 +1,56 @@
+import random
+
+from odoo.tests import BaseCase
+
+from odoo.addons.cutlist.models.cutting_job import _optimize_sheet
+from odoo.addons.cutlist.models.guillotine import cut_sequence
+from odoo.addons.cutlist.models.paste5 import CuttingPattern, Panel, StockSheet
+from odoo.addons.cutlist.tests.common import OPTIONS, make_panel, make_sheet
+
+
+def make_pattern(panels, placements, length, width):
+    """The CuttingPattern of a sheet of an optimize_job_data result."""
+    pattern = CuttingPattern(StockSheet(length=length, width=width), [
+        Panel(length=float(panel['length']), width=float(panel['width']), quantity=int(panel['quantity']))
+        for panel in panels
+    ])
+    for index, x, y, rotated in placements:
+        pattern.add_placement(index, x, y, rotated, index)
+    return pattern
+
+
+class TestCutSequence(BaseCase):
+    
+    def test_guillotine_layouts_can_be_cut(self):
+        rng = random.Random(15)
+        sheet = make_sheet('MDF', 2440, 1220)
+        for split in ('shorter_leftover', 'longer_leftover', 'shorter_axis', 'longer_axis', 'min_area', 'max_area'):
+            for consider_grain in (False, True):
+                kerf = rng.choice([0.0, 3.0])
+                options = dict(OPTIONS, packing_engine='guillotine', guillotine_split=split,
+                               consider_grain=consider_grain, kerf_thickness=kerf)
+                panels = [make_panel(index, rng.randint(60, 1200), rng.randint(40, 600), rng.randint(1, 5),
+                                     grain_direction=rng.choice(['none', 'horizontal']))
+                          for index in range(15)]
+                result = _optimize_sheet(panels, sheet, options)
+                self.assertEqual(result['unplaced_panels'], 0)
+                for placements in result['placements']:
+                    pattern = make_pattern(panels, placements, 2440, 1220)
+                    self.assertIsNotNone(cut_sequence(pattern, kerf), (split, consider_grain, placements))
+    
+    def test_cuts_of_two_strips(self):
+        panels = [make_panel(1, 600, 400, 1), make_panel(2, 300, 200, 1)]
+        pattern = make_pattern(panels, [[0, 0.0, 0.0, False], [1, 0.0, 403.0, False]], 1000, 800)
+        # The first stage cuts the two strips across the whole sheet, the second cuts them to length
+        self.assertEqual(cut_sequence(pattern, 3.0), [
+            ('horizontal', 400.0, 0.0, 1000.0, 1),
+            ('horizontal', 603.0, 0.0, 1000.0, 1),
+            ('vertical', 600.0, 0.0, 400.0, 2),
+            ('vertical', 300.0, 403.0, 603.0, 2),
+        ])
+    
+    def test_pinwheel_cannot_be_cut(self):
+        # Four panels around a square hole, no cut runs from edge to edge
+        panels = [make_panel(1, 600, 400, 2), make_panel(2, 400, 600, 2)]
+        placements = [[0, 0.0, 0.0, False], [1, 600.0, 0.0, False], [0, 400.0, 600.0, False], [1, 0.0, 400.0, False]]
+        self.assertIsNone(cut_sequence(make_pattern(panels, placements, 1000, 1000), 0.0))
@@ -0,0 +1,49 @@
+from collections import Counter
+
+from odoo.tests import BaseCase
+
+from odoo.addons.cutlist.models.nesting import merge_job_panels, split_nested_placements
+from odoo.addons.cutlist.tests.common import make_panel
+
+
+class TestNesting(BaseCase):
+    
+    def setUp(self):
+        super().setUp()
+        self.job_panels = [
+            (1, [make_panel(11, 600, 300, 2), make_panel(12, 400, 200, 1)]),
+            (2, [make_panel(21, 400, 200, 3), make_panel(22, 600, 300, 1, grain_direction='vertical')]),
+            (3, [make_panel(31, 600, 300, 1)]),
+        ]
+    
+    def _demanded(self):
+        return Counter({(job_id, index): panel['quantity'] for job_id, panels in self.job_panels
+                        for index, panel in enumerate(panels)})
+    
+    def test_identical_panels_are_merged(self):
+        merged, demands = merge_job_panels(self.job_panels)
+        # The grain tells the 600 x 300 panels of job 2 apart
+        self.assertEqual(len(merged), 3)
+        self.assertEqual([panel['quantity'] for panel in merged], [3, 4, 1])
+        self.assertEqual(demands[0], [(1, 0, 2), (3, 0, 1)])
+        self.assertEqual(sum(quantity for demand in demands for _job_id, _index, quantity in demand),
+                         sum(self._demanded().values()))
+    
+    def test_split_gives_every_job_its_panels(self):
+        merged, demands = merge_job_panels(self.job_panels)
+        copies = [[index, 0.0, 0.0, False] for index, panel in enumerate(merged) for _copy in range(panel['quantity'])]
+        sheets, unplaced = split_nested_placements([copies[:4], copies[4:]], demands)
+        self.assertEqual(unplaced, {})
+        self.assertEqual(Counter((job_id, index) for sheet in sheets for job_id, index, _x, _y, _rotated in sheet),
+                         self._demanded())
+        # Copies go to the jobs in order: the first sheet holds all of job 1's 600 x 300 panels
+        self.assertEqual([row[:2] for row in sheets[0][:2]], [[1, 0], [1, 0]])
+    
+    def test_split_reports_the_copies_not_placed(self):
+        merged, demands = merge_job_panels(self.job_panels)
+        copies = [[index, 0.0, 0.0, False] for index, panel in enumerate(merged) for _copy in range(panel['quantity'])]
+        # Drop the last 600 x 300 copy without grain and the grain-locked one
+        sheets, unplaced = split_nested_placements([copies[:2] + copies[3:-1]], demands)
+        self.assertEqual(unplaced, {(3, 0): 1, (2, 1): 1})
+        placed = Counter((job_id, index) for sheet in sheets for job_id, index, _x, _y, _rotated in sheet)
+        self.assertEqual(placed + Counter(unplaced), self._demanded())
@@ -0,0 +1,57 @@
+import random
+
+from odoo.tests import BaseCase
+
+from odoo.addons.cutlist.models.cutting_job import _optimize_sheet
+from odoo.addons.cutlist.tests.common import OPTIONS, make_panel, make_sheet
+
+# Slack for float sums of coordinates
+EPSILON = 1e-6
+
+
+def random_panels(rng, count, grain=False):
+    return [make_panel(index, rng.randint(60, 1200), rng.randint(40, 600), rng.randint(1, 5),
+                       grain_direction=rng.choice(['none', 'horizontal', 'vertical']) if grain else 'none')
+            for index in range(count)]
+
+
+class TestMaxRectsPlacements(BaseCase):
+    """Every layout keeps its panels and their kerf on the sheet and clear of each other."""
+    
+    def _check_sheet(self, panels, placements, length, width, kerf, consider_grain):
+        footprints = []
+        for index, x, y, rotated in placements:
+            panel = panels[index]
+            panel_length, panel_width = panel['length'], panel['width']
+            if rotated:
+                self.assertFalse(consider_grain and panel['grain_direction'] != 'none', panel)
+                panel_length, panel_width = panel_width, panel_length
+            footprint = (x, y, x + panel_length + kerf, y + panel_width + kerf)
+            self.assertTrue(x >= -EPSILON and y >= -EPSILON and footprint[2] <= length + EPSILON
+                            and footprint[3] <= width + EPSILON, footprint)
+            footprints.append(footprint)
+        footprints.sort()
+        for position, (x1, y1, x2, y2) in enumerate(footprints):
+            for other_x1, other_y1, other_x2, other_y2 in footprints[position + 1:]:
+                if other_x1 >= x2 - EPSILON:
+                    break
+                self.assertFalse(other_y1 < y2 - EPSILON and y1 < other_y2 - EPSILON,
+                                 ((x1, y1, x2, y2), (other_x1, other_y1, other_x2, other_y2)))
+    
+    def test_no_overlaps(self):
+        rng = random.Random(16)
+        sheet = make_sheet('MDF', 2440, 1220)
+        for engine in ('maxrects', 'guillotine', 'both'):
+            for heuristic in ('bssf', 'blsf', 'baf', 'bl', 'contact_point'):
+                for vectorized in (False, True):
+                    consider_grain = rng.random() < 0.5
+                    kerf = rng.choice([0.0, 3.0, 4.5])
+                    options = dict(OPTIONS, packing_engine=engine, placement_heuristic=heuristic, kerf_thickness=kerf,
+                                   vectorized_scoring=vectorized, consider_grain=consider_grain)
+                    panels = random_panels(rng, 15, consider_grain)
+                    result = _optimize_sheet(panels, sheet, options)
+                    self.assertEqual(result['unplaced_panels'], 0)
+                    self.assertEqual(sum(len(placements) for placements in result['placements']),
+                                     sum(panel['quantity'] for panel in panels))
+                    for placements in result['placements']:
+                        self._check_sheet(panels, placements, 2440, 1220, kerf, consider_grain)
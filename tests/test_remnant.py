@@ -0,0 +1,77 @@
+import random
+from functools import partial
+
+from odoo.tests import BaseCase
+
+from odoo.addons.cutlist.models.cutting_job import _optimize_sheet
+from odoo.addons.cutlist.models.remnant import MAX_OFFCUTS_PER_SHEET, find_offcuts
+from odoo.addons.cutlist.models.stock_selection import place_on_remnants
+from odoo.addons.cutlist.tests.common import OPTIONS, make_panel, make_sheet
+
+
+def overlap(first, second):
+    """Whether two (x, y, length, width) rectangles share some area."""
+    return (first[0] < second[0] + second[2] and second[0] < first[0] + first[2]
+            and first[1] < second[1] + second[3] and second[1] < first[1] + first[3])
+
+
+class TestFindOffcuts(BaseCase):
+    
+    def _check(self, length, width, used, min_length, min_width):
+        offcuts = find_offcuts(length, width, used, min_length, min_width)
+        self.assertLessEqual(len(offcuts), MAX_OFFCUTS_PER_SHEET)
+        for position, offcut in enumerate(offcuts):
+            x, y, offcut_length, offcut_width = offcut
+            self.assertTrue(0 <= x and 0 <= y and x + offcut_length <= length and y + offcut_width <= width)
+            self.assertGreaterEqual(max(offcut_length, offcut_width), min_length)
+            self.assertGreaterEqual(min(offcut_length, offcut_width), min_width)
+            for footprint in used:
+                self.assertFalse(overlap(offcut, footprint), (offcut, footprint))
+            for other in offcuts[position + 1:]:
+                self.assertFalse(overlap(offcut, other), (offcut, other))
+        return offcuts
+    
+    def test_corner_panel(self):
+        offcuts = self._check(2440, 1220, [(0, 0, 1003, 603)], 300, 100)
+        self.assertEqual(offcuts[0], (1003, 0, 1437, 1220))
+    
+    def test_full_sheet_leaves_nothing(self):
+        self.assertEqual(self._check(2440, 1220, [(0, 0, 2440, 1220)], 300, 100), [])
+    
+    def test_packed_sheets(self):
+        kerf = 3.0
+        rng = random.Random(7)
+        for _run in range(10):
+            panels = [make_panel(index, rng.randint(100, 900), rng.randint(80, 500), rng.randint(1, 4))
+                      for index in range(12)]
+            result = _optimize_sheet(panels, make_sheet('MDF', 2440, 1220), dict(OPTIONS, kerf_thickness=kerf))
+            for placements in result['placements']:
+                used = []
+                for index, x, y, rotated in placements:
+                    length, width = float(panels[index]['length']), float(panels[index]['width'])
+                    if rotated:
+                        length, width = width, length
+                    used.append((x, y, length + kerf, width + kerf))
+                self._check(2440, 1220, used, 300, 100)
+
+
+class TestPlaceOnRemnants(BaseCase):
+    
+    def setUp(self):
+        super().setUp()
+        self.solve = partial(_optimize_sheet, options=dict(OPTIONS, kerf_thickness=3.0))
+    
+    def test_remnants_too_small_with_the_kerf_are_skipped(self):
+        panels = [make_panel(1, 600, 300, 6), make_panel(2, 640, 300, 4)]
+        remnant = dict(make_sheet('remnant', 600, 300, quantity=1), remnant_id=1)
+        result, left = place_on_remnants(panels, [remnant], self.solve, 3.0)
+        self.assertEqual(result['sheet_count'], 0)
+        self.assertEqual(left, {0: 6, 1: 4})
+    
+    def test_remnants_fit_only_turned_are_skipped_with_grain(self):
+        panels = [make_panel(1, 300, 600, 2, grain_direction='horizontal'), make_panel(2, 200, 100, 2)]
+        remnant = dict(make_sheet('remnant', 700, 400, quantity=1), remnant_id=1)
+        solve = partial(_optimize_sheet, options=dict(OPTIONS, kerf_thickness=3.0, consider_grain=True))
+        result, left = place_on_remnants(panels, [remnant], solve, 3.0, True)
+        self.assertEqual(result['sheet_count'], 1)
+        self.assertEqual(left, {0: 2})
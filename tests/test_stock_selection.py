@@ -0,0 +1,42 @@
+from functools import partial
+
+from odoo.tests import BaseCase
+
+from odoo.addons.cutlist.models.cutting_job import _optimize_sheet
+from odoo.addons.cutlist.models.stock_selection import choose_stock, fits
+from odoo.addons.cutlist.tests.common import OPTIONS, make_panel, make_sheet
+
+
+class TestStockSelection(BaseCase):
+    
+    def setUp(self):
+        super().setUp()
+        self.options = dict(OPTIONS, kerf_thickness=3.0, stock_selection='cost')
+        self.solve = partial(_optimize_sheet, options=self.options)
+        self.panels = [make_panel(1, 600, 300, 6, grain_direction='horizontal'),
+                       make_panel(2, 640, 300, 4, grain_direction='horizontal')]
+    
+    def _choose(self, sheets, consider_grain=False):
+        solve = partial(_optimize_sheet, options=dict(self.options, consider_grain=consider_grain))
+        return choose_stock(self.panels, sheets, solve, None, self.options['kerf_thickness'], consider_grain)
+    
+    def test_fits_like_the_packer(self):
+        panel = make_panel(1, 600, 300, 1, grain_direction='horizontal')
+        self.assertTrue(fits(panel, make_sheet('exact', 600, 300)))
+        self.assertFalse(fits(panel, make_sheet('exact', 600, 300), kerf=3.0))
+        self.assertTrue(fits(panel, make_sheet('turned', 303, 603), kerf=3.0))
+        self.assertFalse(fits(panel, make_sheet('turned', 303, 603), kerf=3.0, consider_grain=True))
+    
+    def test_sizes_that_fit_nothing_are_skipped(self):
+        sheets = [make_sheet('big', 2440, 1220, cost=30.0), make_sheet('tiny', 100, 100, cost=1.0),
+                  make_sheet('tight', 602, 302, cost=0.5)]
+        for consider_grain in (False, True):
+            result = self._choose(sheets, consider_grain)
+            self.assertEqual(result['unplaced_panels'], 0)
+            self.assertEqual({label for _length, _width, label in result['sheet_sizes']}, {'big'})
+    
+    def test_grain_keeps_panels_off_sizes_they_only_fit_turned(self):
+        sheets = [make_sheet('big', 2440, 1220, cost=30.0), make_sheet('narrow', 320, 1220, cost=1.0)]
+        result = self._choose(sheets, consider_grain=True)
+        self.assertEqual(result['unplaced_panels'], 0)
+        self.assertEqual({label for _length, _width, label in result['sheet_sizes']}, {'big'})
@@ -0,0 +1,46 @@
+from odoo.tests import BaseCase
+
+from odoo.addons.cutlist.models.cutting_job import optimize_job_data, panel_materials
+from odoo.addons.cutlist.models.warm_start import panel_key, reoptimize
+from odoo.addons.cutlist.tests.common import OPTIONS, make_panel, make_sheet
+
+
+class TestWarmStart(BaseCase):
+    
+    def setUp(self):
+        super().setUp()
+        self.options = dict(OPTIONS, kerf_thickness=3.0)
+        self.sheet = make_sheet('MDF', 2440, 1220)
+        self.panels = [make_panel(index, 300 + 70 * index, 200 + 40 * index, 4) for index in range(10)]
+        result = optimize_job_data(self.panels, self.sheet, self.options)
+        self.previous = {
+            'panel_keys': [list(panel_key(panel)) for panel in self.panels],
+            'sheets': result['placements'],
+            'sheet_sizes': result['sheet_sizes'],
+            'sheet_costs': result['sheet_costs'],
+            'sheet_stock': result['sheet_stock'],
+        }
+    
+    def _reoptimize(self, panels):
+        return reoptimize(panels, self.sheet, self.options, self.previous,
+                          panel_materials(panels, self.sheet, self.options), optimize_job_data)
+    
+    def test_untouched_sheets_are_kept(self):
+        edited = 9
+        panels = [dict(panel, quantity=panel['quantity'] - 1) if index == edited else panel
+                  for index, panel in enumerate(self.panels)]
+        result = self._reoptimize(panels)
+        self.assertIsNotNone(result)
+        self.assertEqual(result['unplaced_panels'], 0)
+        untouched = [sheet for sheet in self.previous['sheets']
+                     if all(placement[0] != edited for placement in sheet)]
+        self.assertTrue(untouched)
+        for sheet in untouched:
+            self.assertIn(sheet, result['placements'])
+        placed = [placement[0] for sheet in result['placements'] for placement in sheet]
+        self.assertEqual([placed.count(index) for index in range(len(panels))],
+                         [panel['quantity'] for panel in panels])
+    
+    def test_previous_plan_unused_when_most_panels_changed(self):
+        panels = [dict(panel, id=panel['id'] + 100) for panel in self.panels]
+        self.assertIsNone(self._reoptimize(panels))